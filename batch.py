@@ -0,0 +1,60 @@
+"""Vectorized evaluation of many boards at once with NumPy.
+
+Boards are given either as an (N, 8, 8) array holding 1 for the
+player's disks, -1 for the opponent's and 0 for empty grids, or as an
+(N, 2) uint64 array of (own, opponent) bitboards. The scores match
+evaluation.evaluate.
+"""
+
+import numpy as np
+
+from evaluation import AROUND_CORNERS, CORNERS, CORNER_WEIGHT, SIDES, SIDE_WEIGHT, AROUND_WEIGHT
+
+
+def _squares(bb):
+    return [sq for sq in range(64) if bb >> sq & 1]
+
+
+CORNER_SQUARES = np.array([_squares(corner)[0] for corner, _ in AROUND_CORNERS])
+AROUND_SQUARES = np.array([_squares(around) for _, around in AROUND_CORNERS])
+
+
+def _square_weights():
+    weights = np.full(64, -1, dtype=np.int64)
+    weights[_squares(CORNERS)] = 1 + CORNER_WEIGHT
+    weights[_squares(SIDES)] += SIDE_WEIGHT
+    return weights
+
+
+SQUARE_WEIGHTS = _square_weights()
+
+
+def unpack_bitboards(boards):
+    """Convert an (N, 2) array of (own, opponent) bitboards into an
+       (N, 64) int8 array of 1, -1 and 0.
+    """
+    boards = np.ascontiguousarray(boards, dtype='<u8')
+    bits = np.unpackbits(boards.view(np.uint8).reshape(-1, 2, 8), axis=2, bitorder='little')
+    return bits[:, 0].astype(np.int8) - bits[:, 1].astype(np.int8)
+
+
+def to_squares(boards):
+    boards = np.asarray(boards)
+
+    if boards.ndim == 3 and boards.shape[1:] == (8, 8):
+        return boards.reshape(-1, 64).astype(np.int8)
+    if boards.ndim == 2 and boards.shape[1] == 2:
+        return unpack_bitboards(boards)
+    raise ValueError(f'expected an (N, 8, 8) or (N, 2) array, got {boards.shape}')
+
+
+def evaluate_batch(boards):
+    """Return an int64 array with the score of every board.
+    """
+    squares = to_squares(boards)
+    scores = squares @ SQUARE_WEIGHTS
+
+    empty_corners = squares[:, CORNER_SQUARES] == 0
+    arounds = squares[:, AROUND_SQUARES].sum(axis=2, dtype=np.int64)
+    scores += AROUND_WEIGHT * (arounds * empty_corners).sum(axis=1)
+    return scores
@@ -0,0 +1,142 @@
+"""Bitboard move generation.
+
+Each color is held as a 64-bit integer in which bit ``row * 8 + col``
+is set when a disk of that color is on the grid (row, col).
+"""
+
+GRID_NUM = 8
+
+FULL = 0xFFFFFFFFFFFFFFFF
+NOT_LEFT = 0xFEFEFEFEFEFEFEFE     # excludes column 0
+NOT_RIGHT = 0x7F7F7F7F7F7F7F7F    # excludes column 7
+
+# (shift, mask): positive shifts move toward higher bits.
+DIRECTIONS = (
+    (1, NOT_LEFT),      # (0, 1)
+    (-1, NOT_RIGHT),    # (0, -1)
+    (8, FULL),          # (1, 0)
+    (-8, FULL),         # (-1, 0)
+    (9, NOT_LEFT),      # (1, 1)
+    (7, NOT_RIGHT),     # (1, -1)
+    (-7, NOT_LEFT),     # (-1, 1)
+    (-9, NOT_RIGHT),    # (-1, -1)
+)
+
+START_BLACK = (1 << 28) | (1 << 35)
+START_WHITE = (1 << 27) | (1 << 36)
+
+
+def square(row, col):
+    return row * GRID_NUM + col
+
+
+def position(sq):
+    return divmod(sq, GRID_NUM)
+
+
+def square_name(sq):
+    row, col = position(sq)
+    return f'{"abcdefgh"[col]}{row + 1}'
+
+
+def parse_square(name):
+    return square(int(name[1]) - 1, 'abcdefgh'.index(name[0].lower()))
+
+
+def popcount(bb):
+    return bin(bb).count('1')
+
+
+def iter_squares(bb):
+    while bb:
+        lowest = bb & -bb
+        yield lowest.bit_length() - 1
+        bb ^= lowest
+
+
+def to_bitboards(disks, color):
+    """Convert a grid of disks (anything with a color attribute) into
+       a pair of bitboards (own, opponent) seen from color.
+    """
+    own = opp = 0
+    bit = 1
+
+    for row in disks:
+        for disk in row:
+            if disk:
+                if disk.color == color:
+                    own |= bit
+                else:
+                    opp |= bit
+            bit <<= 1
+    return own, opp
+
+
+def get_moves(own, opp):
+    empty = ~(own | opp) & FULL
+    moves = 0
+
+    for shift, mask in DIRECTIONS:
+        target = opp & mask
+        if shift > 0:
+            x = (own << shift) & target
+            x |= (x << shift) & target
+            x |= (x << shift) & target
+            x |= (x << shift) & target
+            x |= (x << shift) & target
+            x |= (x << shift) & target
+            moves |= (x << shift) & mask
+        else:
+            shift = -shift
+            x = (own >> shift) & target
+            x |= (x >> shift) & target
+            x |= (x >> shift) & target
+            x |= (x >> shift) & target
+            x |= (x >> shift) & target
+            x |= (x >> shift) & target
+            moves |= (x >> shift) & mask
+
+    return moves & empty
+
+
+def neighbours(bb):
+    """Return the squares next to any square of bb in one of the eight
+       directions.
+    """
+    result = 0
+    for shift, mask in DIRECTIONS:
+        if shift > 0:
+            result |= (bb << shift) & mask
+        else:
+            result |= (bb >> -shift) & mask
+    return result & FULL
+
+
+def get_flips(own, opp, sq):
+    move = 1 << sq
+    flips = 0
+
+    for shift, mask in DIRECTIONS:
+        line = 0
+        if shift > 0:
+            x = (move << shift) & mask
+            while x & opp:
+                line |= x
+                x = (x << shift) & mask
+        else:
+            shift = -shift
+            x = (move >> shift) & mask
+            while x & opp:
+                line |= x
+                x = (x >> shift) & mask
+        if x & own:
+            flips |= line
+
+    return flips
+
+
+def make_move(own, opp, sq):
+    """Return the bitboards (own, opponent) after own places a disk on sq.
+    """
+    flips = get_flips(own, opp, sq)
+    return own | flips | (1 << sq), opp ^ flips
@@ -0,0 +1,155 @@
+"""Opening book stored as a sorted binary file.
+
+Each record is (position hash, move, score) packed little-endian into
+11 bytes, and records are sorted by hash and move. OpeningBook memory
+maps the file and binary-searches it, so opening a book costs nothing
+and processes reading the same book share its pages.
+
+Build a book from self-play games with:
+
+    python book.py games.txt opening.bin --plies 12
+
+where each line of games.txt holds the moves of a game such as
+"f5d6c3d3c4" followed by the final disc difference (black - white).
+A game record file written by record.RecordWriter works as well.
+"""
+
+import argparse
+import mmap
+import struct
+from collections import defaultdict
+
+from bitboard import get_moves
+from gamestate import BLACK, PASS, GameState, parse_notation
+from record import is_record_file, read_records
+
+
+RECORD = struct.Struct('<QBh')
+
+
+class OpeningBook:
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.count = 0
+        self.data = None
+
+        if size := self.file.seek(0, 2):
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.count = size // RECORD.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self.file.close()
+
+    def key(self, i):
+        return RECORD.unpack_from(self.data, i * RECORD.size)[0]
+
+    def lookup(self, h):
+        """Return the (move, score) records stored for a position hash.
+        """
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < h:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        records = []
+        for i in range(lo, self.count):
+            key, move, score = RECORD.unpack_from(self.data, i * RECORD.size)
+            if key != h:
+                break
+            records.append((move, score))
+        return records
+
+    def best_move(self, state):
+        """Return the best scored legal move for the side to move,
+           or None if the position is not in the book.
+        """
+        moves = state.legal_moves()
+        if records := [(move, score) for move, score in self.lookup(state.hash) if moves >> move & 1]:
+            return max(records, key=lambda x: x[1])[0]
+        return None
+
+
+def replay(moves, state=None):
+    """Play moves from state (the start position by default), inserting
+       the passes that the records leave out, and yield (state, move)
+       before each move.
+    """
+    if state is None:
+        state = GameState()
+
+    for move in moves:
+        if move != PASS and not state.legal_moves() and get_moves(state.opp, state.own):
+            state.play(PASS)
+        yield state, move
+        state.play(move)
+
+
+def build_book(games, path, plies=12, min_count=1):
+    """Write a book from (moves, disc difference) pairs and return the
+       number of records written. A move scores the average final disc
+       difference seen from the player who made it.
+    """
+    stats = defaultdict(lambda: [0, 0])
+
+    for moves, diff in games:
+        for state, move in replay(moves[:plies]):
+            if move == PASS:
+                continue
+            total = stats[(state.hash, move)]
+            total[0] += diff if state.turn == BLACK else -diff
+            total[1] += 1
+
+    records = sorted(
+        (h, move, round(total / count))
+        for (h, move), (total, count) in stats.items() if count >= min_count
+    )
+
+    with open(path, 'wb') as f:
+        for record in records:
+            f.write(RECORD.pack(*record))
+    return len(records)
+
+
+def parse_game(line):
+    moves, diff = line.split()
+    return parse_notation(moves), int(diff)
+
+
+def read_games(path):
+    if is_record_file(path):
+        for record in read_records(path):
+            yield record.moves, record.black_discs - record.white_discs
+        return
+
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield parse_game(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build an opening book from self-play games')
+    parser.add_argument('games', help='text file with one game per line, or a game record file')
+    parser.add_argument('book', help='output book file')
+    parser.add_argument('--plies', type=int, default=12, help='number of opening moves to keep')
+    parser.add_argument('--min-count', type=int, default=1, help='minimum games per move')
+    args = parser.parse_args()
+
+    count = build_book(read_games(args.games), args.book, args.plies, args.min_count)
+    print(f'{count} records written to {args.book}')
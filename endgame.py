@@ -0,0 +1,176 @@
+"""Exact endgame solver.
+
+Searches to the end of the game and returns the final disc difference
+of the best line for the side to move. Deep nodes order moves by
+parity (empty regions with an odd number of squares first) and fastest
+first (fewest replies for the opponent); the last few empties go
+through a shallow path that only keeps the parity ordering.
+"""
+
+import time
+from collections import namedtuple
+
+from bitboard import FULL, get_flips, get_moves, popcount
+from gamestate import PASS
+from search import TimeUp
+
+
+SolveResult = namedtuple('SolveResult', 'move score nodes')
+
+QUADRANTS = (
+    0x000000000F0F0F0F,
+    0x00000000F0F0F0F0,
+    0x0F0F0F0F00000000,
+    0xF0F0F0F000000000,
+)
+
+
+def parity_mask(empties):
+    """Return the empty squares that lie in quadrants with an odd number of empties.
+    """
+    mask = 0
+    for quadrant in QUADRANTS:
+        if popcount(empties & quadrant) & 1:
+            mask |= quadrant
+    return empties & mask
+
+
+def parity_moves(moves, empties):
+    odd = parity_mask(empties)
+    first, second = moves & odd, moves & ~odd
+    ordered = []
+
+    for bb in (first, second):
+        while bb:
+            lowest = bb & -bb
+            ordered.append(lowest.bit_length() - 1)
+            bb ^= lowest
+    return ordered
+
+
+class EndgameSolver:
+
+    check_interval = 1024
+
+    def __init__(self, shallow_empties=6, time_limit=None):
+        self.shallow_empties = shallow_empties
+        self.time_limit = time_limit
+        self.nodes = 0
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+    def check_budget(self):
+        if self.stopped:
+            raise TimeUp()
+        if self.time_limit is not None and time.perf_counter() >= self.deadline:
+            raise TimeUp()
+
+    def solve(self, state):
+        """Return a SolveResult for the side to move of a GameState. The
+           score is the exact final disc difference under perfect play.
+           Raises TimeUp if time_limit runs out first.
+        """
+        self.nodes = 0
+        # shallow() counts nodes too, so the budget is checked once the
+        # count has passed the next check rather than on a multiple
+        self.next_check = self.check_interval
+        self.stopped = False
+        if self.time_limit is not None:
+            self.deadline = time.perf_counter() + self.time_limit
+
+        own, opp = state.own, state.opp
+        empties = ~(own | opp) & FULL
+        if not (moves := get_moves(own, opp)):
+            return SolveResult(PASS, -self.negamax(opp, own, -64, 64, empties, True), self.nodes)
+
+        alpha, beta = -65, 65
+        best_move = None
+
+        for sq in self.ordered_moves(own, opp, moves, empties):
+            flips = get_flips(own, opp, sq)
+            score = -self.negamax(
+                opp ^ flips, own | flips | (1 << sq), -beta, -alpha, empties ^ (1 << sq))
+            if score > alpha:
+                alpha = score
+                best_move = sq
+
+        return SolveResult(best_move, alpha, self.nodes)
+
+    def ordered_moves(self, own, opp, moves, empties):
+        candidates = []
+        odd = parity_mask(empties)
+
+        while moves:
+            lowest = moves & -moves
+            sq = lowest.bit_length() - 1
+            moves ^= lowest
+            flips = get_flips(own, opp, sq)
+            mobility = popcount(get_moves(opp ^ flips, own | flips | lowest))
+            candidates.append((mobility, not odd & lowest, sq))
+
+        candidates.sort()
+        return [sq for _, _, sq in candidates]
+
+    def negamax(self, own, opp, alpha, beta, empties, passed=False):
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.next_check = self.nodes + self.check_interval
+            self.check_budget()
+
+        if popcount(empties) <= self.shallow_empties:
+            return self.shallow(own, opp, alpha, beta, empties, passed)
+
+        if not (moves := get_moves(own, opp)):
+            if passed:
+                return popcount(own) - popcount(opp)
+            return -self.negamax(opp, own, -beta, -alpha, empties, True)
+
+        best = -65
+        for sq in self.ordered_moves(own, opp, moves, empties):
+            flips = get_flips(own, opp, sq)
+            score = -self.negamax(
+                opp ^ flips, own | flips | (1 << sq), -beta, -alpha, empties ^ (1 << sq))
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def shallow(self, own, opp, alpha, beta, empties, passed=False):
+        self.nodes += 1
+
+        if not empties:
+            return popcount(own) - popcount(opp)
+
+        if not empties & (empties - 1):
+            return self.last_move(own, opp, empties)
+
+        if not (moves := get_moves(own, opp)):
+            if passed:
+                return popcount(own) - popcount(opp)
+            return -self.shallow(opp, own, -beta, -alpha, empties, True)
+
+        best = -65
+        for sq in parity_moves(moves, empties):
+            flips = get_flips(own, opp, sq)
+            score = -self.shallow(
+                opp ^ flips, own | flips | (1 << sq), -beta, -alpha, empties ^ (1 << sq))
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def last_move(self, own, opp, empty):
+        sq = empty.bit_length() - 1
+        if flips := get_flips(own, opp, sq):
+            return popcount(own) + popcount(flips) + 1 - popcount(opp) + popcount(flips)
+        if flips := get_flips(opp, own, sq):
+            return popcount(own) - popcount(flips) - popcount(opp) - popcount(flips) - 1
+        return popcount(own) - popcount(opp)
@@ -0,0 +1,94 @@
+"""Position evaluation on bitboards.
+
+evaluate(own, opp) scores the corners, the squares around them and the
+sides seen from the side that owns the own bitboard. features(own, opp)
+measures the mobility of both sides with shifts and popcounts only:
+
+* mobility: the number of legal moves.
+* potential mobility: the empty squares next to an opponent disc, where
+  moves may appear later.
+* frontier: the discs next to an empty square, which give the opponent
+  moves.
+"""
+
+from collections import namedtuple
+
+from bitboard import FULL, get_moves, neighbours, popcount, square
+
+
+CORNERS = (
+    (1 << square(0, 0)) | (1 << square(0, 7)) | (1 << square(7, 0)) | (1 << square(7, 7))
+)
+
+# Each corner with the three squares around it.
+AROUND_CORNERS = tuple(
+    (1 << square(*corner), sum(1 << square(r, c) for r, c in around))
+    for corner, around in (
+        ((0, 0), ((0, 1), (1, 0), (1, 1))),
+        ((0, 7), ((0, 6), (1, 6), (1, 7))),
+        ((7, 0), ((6, 0), (6, 1), (7, 1))),
+        ((7, 7), ((6, 6), (6, 7), (7, 6))),
+    )
+)
+
+AROUNDS = 0
+for _, around in AROUND_CORNERS:
+    AROUNDS |= around
+
+EDGES = 0xFF000000000000FF | 0x8181818181818181
+SIDES = EDGES & ~CORNERS & ~AROUNDS
+NON_CORNERS = FULL & ~CORNERS
+
+CORNER_WEIGHT = 21
+SIDE_WEIGHT = 8
+AROUND_WEIGHT = -10
+
+# weights of the Features fields in mobility_score
+MOBILITY_WEIGHT = 3
+POTENTIAL_MOBILITY_WEIGHT = 1
+FRONTIER_WEIGHT = -1
+
+Features = namedtuple('Features', 'mobility potential_mobility frontier')
+
+
+def empty_corner_arounds(own, opp):
+    occupied = own | opp
+    arounds = 0
+
+    for corner, around in AROUND_CORNERS:
+        if not occupied & corner:
+            arounds |= around
+    return arounds
+
+
+def evaluate(own, opp):
+    arounds = empty_corner_arounds(own, opp)
+    corner = popcount(own & CORNERS) - popcount(opp & CORNERS)
+    non_corner = popcount(own & NON_CORNERS) - popcount(opp & NON_CORNERS)
+    side = popcount(own & SIDES) - popcount(opp & SIDES)
+    around = popcount(own & arounds) - popcount(opp & arounds)
+
+    return corner - non_corner \
+        + CORNER_WEIGHT * corner \
+        + SIDE_WEIGHT * side \
+        + AROUND_WEIGHT * around
+
+
+def features(own, opp):
+    """Return the Features of own minus those of opp.
+    """
+    empty = ~(own | opp) & FULL
+    next_to_empty = neighbours(empty)
+
+    return Features(
+        popcount(get_moves(own, opp)) - popcount(get_moves(opp, own)),
+        popcount(neighbours(opp) & empty) - popcount(neighbours(own) & empty),
+        popcount(own & next_to_empty) - popcount(opp & next_to_empty),
+    )
+
+
+def mobility_score(own, opp):
+    mobility, potential_mobility, frontier = features(own, opp)
+    return MOBILITY_WEIGHT * mobility \
+        + POTENTIAL_MOBILITY_WEIGHT * potential_mobility \
+        + FRONTIER_WEIGHT * frontier
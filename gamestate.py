@@ -0,0 +1,160 @@
+"""Headless game rules built on bitboards.
+
+Nothing here touches pygame, so simulations can run on machines
+without a display or mixer.
+"""
+
+from bitboard import START_BLACK, START_WHITE, get_flips, get_moves, parse_square, popcount, square, \
+    square_name
+from transposition import ZOBRIST_KEYS, ZOBRIST_SIDE, flip_key, zobrist_hash
+
+BLACK = 0
+WHITE = 1
+PASS = 64
+
+
+def notation(moves):
+    """Write moves as "f5d6c3", with "--" for a pass.
+    """
+    return ''.join('--' if move == PASS else square_name(move) for move in moves)
+
+
+def parse_notation(text):
+    return [PASS if text[i: i + 2] == '--' else parse_square(text[i: i + 2])
+            for i in range(0, len(text), 2)]
+
+
+class GameState:
+
+    def __init__(self, black=START_BLACK, white=START_WHITE, turn=BLACK):
+        self.boards = [black, white]
+        self.counts = [popcount(black), popcount(white)]
+        self._turn = turn
+        self.hash = zobrist_hash(black, white, turn)
+        self.history = []
+
+    @classmethod
+    def empty(cls):
+        return cls(0, 0)
+
+    def copy(self):
+        state = GameState.__new__(GameState)
+        state.boards = self.boards[:]
+        state.counts = self.counts[:]
+        state._turn = self._turn
+        state.hash = self.hash
+        state.history = self.history[:]
+        return state
+
+    @property
+    def turn(self):
+        return self._turn
+
+    @turn.setter
+    def turn(self, turn):
+        if turn != self._turn:
+            self.hash ^= ZOBRIST_SIDE
+            self._turn = turn
+
+    @property
+    def black(self):
+        return self.boards[BLACK]
+
+    @property
+    def white(self):
+        return self.boards[WHITE]
+
+    @property
+    def own(self):
+        return self.boards[self.turn]
+
+    @property
+    def opp(self):
+        return self.boards[self.turn ^ 1]
+
+    @property
+    def empties(self):
+        return ~(self.boards[BLACK] | self.boards[WHITE]) & 0xFFFFFFFFFFFFFFFF
+
+    @property
+    def empty_count(self):
+        return 64 - self.counts[BLACK] - self.counts[WHITE]
+
+    def is_full(self):
+        return self.counts[BLACK] + self.counts[WHITE] == 64
+
+    def get(self, row, col):
+        bit = 1 << square(row, col)
+        if self.boards[BLACK] & bit:
+            return BLACK
+        if self.boards[WHITE] & bit:
+            return WHITE
+        return None
+
+    def set(self, row, col, color):
+        sq = square(row, col)
+        bit = 1 << sq
+        if (current := self.get(row, col)) is not None:
+            self.hash ^= ZOBRIST_KEYS[current][sq]
+            self.counts[current] -= 1
+        self.hash ^= ZOBRIST_KEYS[color][sq]
+        self.counts[color] += 1
+        self.boards[color] |= bit
+        self.boards[color ^ 1] &= ~bit
+
+    def clear(self):
+        self.boards = [0, 0]
+        self.counts = [0, 0]
+        self._turn = BLACK
+        self.hash = 0
+        self.history = []
+
+    def count(self, color):
+        return self.counts[color]
+
+    def legal_moves(self):
+        return get_moves(self.boards[self.turn], self.boards[self.turn ^ 1])
+
+    def must_pass(self):
+        return not self.legal_moves() and not self.is_game_over()
+
+    def is_game_over(self):
+        if self.is_full():
+            return True
+        black, white = self.boards
+        return not get_moves(black, white) and not get_moves(white, black)
+
+    def play(self, move):
+        """Make a move (a square index or PASS) for the side to move.
+        """
+        turn = self._turn
+        if move == PASS:
+            self.history.append((PASS, 0, self.hash))
+        else:
+            own, opp = self.boards[turn], self.boards[turn ^ 1]
+            flips = get_flips(own, opp, move)
+            self.boards[turn] = own | flips | (1 << move)
+            self.boards[turn ^ 1] = opp ^ flips
+            n = popcount(flips)
+            self.counts[turn] += n + 1
+            self.counts[turn ^ 1] -= n
+            self.history.append((move, flips, self.hash))
+            self.hash ^= ZOBRIST_KEYS[turn][move] ^ flip_key(flips)
+        self.hash ^= ZOBRIST_SIDE
+        self._turn = turn ^ 1
+
+    def undo(self):
+        move, flips, self.hash = self.history.pop()
+        self._turn ^= 1
+        if move != PASS:
+            self.boards[self._turn] ^= flips | (1 << move)
+            self.boards[self._turn ^ 1] |= flips
+            n = popcount(flips)
+            self.counts[self._turn] -= n + 1
+            self.counts[self._turn ^ 1] += n
+
+    def winner(self):
+        black, white = self.count(BLACK), self.count(WHITE)
+        if black == white:
+            return None
+        return BLACK if black > white else WHITE
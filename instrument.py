@@ -0,0 +1,117 @@
+"""Optional timing and call counting for the game loop.
+
+An Instrument wraps methods of the objects it is attached to, so the
+wrappers only exist when instrumentation is on and the loop costs the
+same as before when it is off. It keeps per-phase durations, a
+histogram of frame work times and call counts, and can dump them as
+JSON:
+
+    python othello.py --profile profile.json --overlay
+"""
+
+import bisect
+import functools
+import json
+import time
+from collections import Counter
+
+
+# upper bounds of the frame time histogram buckets in milliseconds
+BUCKETS = (1, 2, 4, 8, 16, 33, 50, 100, 250)
+
+
+class Phase:
+
+    __slots__ = ('count', 'total', 'max', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.total = self.max = self.last = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 3) if self.count else 0,
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class Instrument:
+
+    def __init__(self, path=None, clock=time.perf_counter):
+        self.path = path
+        self.clock = clock
+        self.phases = {}
+        self.calls = Counter()
+        self.histogram = [0] * (len(BUCKETS) + 1)
+        self.frame = Phase()
+        self.frame_work = 0.0
+
+    def add(self, name, seconds, frame=False):
+        if (phase := self.phases.get(name)) is None:
+            phase = self.phases[name] = Phase()
+        phase.add(seconds)
+        if frame:
+            self.frame_work += seconds
+
+    def end_frame(self):
+        """Close the current frame. Its time is the sum of the frame
+           phases since the last call, so waiting for events is left out.
+        """
+        self.frame.add(self.frame_work)
+        self.histogram[bisect.bisect_right(BUCKETS, self.frame_work * 1000)] += 1
+        self.frame_work = 0.0
+
+    def timed(self, name, func, frame=False):
+        clock = self.clock
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, clock() - start, frame)
+        return wrapper
+
+    def counted(self, name, func):
+        calls = self.calls
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return func(*args, **kwargs)
+        return wrapper
+
+    def time(self, obj, attr, name=None, frame=False):
+        """Replace the method attr of obj with a timed wrapper. Frame
+           phases add up to the frame time.
+        """
+        setattr(obj, attr, self.timed(name or attr, getattr(obj, attr), frame))
+
+    def count(self, obj, attr, name=None):
+        setattr(obj, attr, self.counted(name or attr, getattr(obj, attr)))
+
+    def summary(self):
+        return f'frame {self.frame.last * 1000:.1f} ms (max {self.frame.max * 1000:.1f})'
+
+    def report(self):
+        labels = [f'<{bound}ms' for bound in BUCKETS] + [f'>={BUCKETS[-1]}ms']
+        return {
+            'frames': self.frame.to_dict(),
+            'frame_histogram': dict(zip(labels, self.histogram)),
+            'phases': {name: phase.to_dict() for name, phase in sorted(self.phases.items())},
+            'calls': dict(sorted(self.calls.items())),
+        }
+
+    def dump(self, path=None):
+        with open(path or self.path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
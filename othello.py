@@ -1,11 +1,26 @@
+import argparse
+import math
 import pygame
 import random
 import sys
-from collections import namedtuple
+import threading
+import time
+from collections import OrderedDict, namedtuple
 from enum import Enum, auto
 from pathlib import Path
 from pygame.locals import *
 
+from bitboard import get_flips, get_moves, iter_squares, make_move, popcount, position, square, to_bitboards
+from book import OpeningBook
+from endgame import EndgameSolver
+from evaluation import AROUNDS, CORNERS, SIDES, evaluate, mobility_score
+from gamestate import PASS, GameState
+from instrument import Instrument
+from parallel import ParallelSearcher
+from pattern import PatternEvaluator, load_weights
+from scheduler import Scheduler
+from search import Searcher, TimeUp
+
 
 SCREEN = Rect(0, 0, 840, 700)
 
@@ -19,7 +34,15 @@ GRAY = (221, 221, 221)
 
 
 Point = namedtuple('Point', 'x y')
-Candidate = namedtuple('Candidate', 'evaluation row col corners arounds sides')
+
+
+class Candidate(namedtuple('Candidate', 'evaluation row col corners arounds sides mobility', defaults=(0,))):
+
+    __slots__ = ()
+
+    @property
+    def score(self):
+        return self.evaluation + self.mobility
 
 
 class Status(Enum):
@@ -78,12 +101,59 @@ class Sounds(Files):
         return Path('sounds', f'{self.name.lower()}.wav')
 
 
+class ImageCache:
+    """Decoded and scaled surfaces shared by all sprites, keyed by
+       (file path, size).
+    """
+
+    surfaces = {}
+
+    @classmethod
+    def get(cls, file_path, size=None):
+        key = (str(file_path), size)
+        if (surface := cls.surfaces.get(key)) is None:
+            surface = pygame.image.load(file_path).convert_alpha()
+            if size:
+                surface = pygame.transform.scale(surface, size)
+            cls.surfaces[key] = surface
+        return surface
+
+    @classmethod
+    def clear(cls):
+        cls.surfaces.clear()
+
+
+class TextCache:
+    """Rendered text surfaces shared by all labels, keyed by
+       (font, text, color). Only the max_size most recently used
+       surfaces are kept.
+    """
+
+    max_size = 128
+    surfaces = OrderedDict()
+
+    @classmethod
+    def render(cls, font, text, color):
+        key = (font, text, color)
+        if (surface := cls.surfaces.get(key)) is None:
+            surface = font.render(text, True, color)
+            cls.surfaces[key] = surface
+            if len(cls.surfaces) > cls.max_size:
+                cls.surfaces.popitem(last=False)
+        else:
+            cls.surfaces.move_to_end(key)
+        return surface
+
+    @classmethod
+    def clear(cls):
+        cls.surfaces.clear()
+
+
 class Disk(pygame.sprite.Sprite):
 
     def __init__(self, disk, center):
         super().__init__(self.containers)
-        self.image = pygame.image.load(disk.filepath).convert_alpha()
-        self.image = pygame.transform.scale(self.image, (99, 90))
+        self.image = ImageCache.get(disk.filepath, (99, 90))
         self.rect = self.image.get_rect()
         self.rect.centerx, self.rect.centery = center
         self.color = disk
@@ -93,8 +163,7 @@ class DisplayDisk(pygame.sprite.Sprite):
 
     def __init__(self, file_path):
         super().__init__(self.containers)
-        self.image = pygame.image.load(file_path).convert_alpha()
-        self.image = pygame.transform.scale(self.image, (150, 105))
+        self.image = ImageCache.get(file_path, (150, 105))
         self.rect = self.image.get_rect()
         self.rect.centerx, self.rect.centery = 80, 180
 
@@ -103,7 +172,7 @@ class Button(pygame.sprite.Sprite):
 
     def __init__(self, file_path, center, game):
         super().__init__(self.containers)
-        self.image = pygame.image.load(file_path).convert_alpha()
+        self.image = ImageCache.get(file_path)
         self.rect = self.image.get_rect()
         self.rect.centerx, self.rect.centery = center
         self.left = self.rect.left
@@ -135,6 +204,17 @@ class Board:
         self.display_group = display_group
         self.set_displays(game)
         self.player_color = None
+        self.status = None
+        self.black_score = self.white_score = ''
+        # the disks as bitboards, kept in step with the sprites by place and clear
+        self.state = GameState.empty()
+        self.moves = {}
+        self.layer = None
+        self.regions = (
+            (Rect(20, self.top + 5, 180, 170), self.draw_turn_display),
+            (Rect(20, self.top + 215, 180, 220), self.draw_score_display),
+            (Rect(490, 660, 20, 20), self.draw_players_color),
+        )
 
     def setup(self):
         for r in range(3, 5):
@@ -153,18 +233,20 @@ class Board:
             for c in range(self.grid_num):
                 if disk := self.disks[r][c]:
                     self.disks[r][c] = disk.kill()
+        self.state.clear()
+        self.moves.clear()
 
     def set_displays(self, game):
         _ = Disk(Piece.BLACK, (80, 390))
         _ = Disk(Piece.WHITE, (80, 455))
         self.button = Button(Images.BUTTON.filepath, (102, self.top + 510), game)
         title_font = pygame.font.SysFont(None, 50)
-        self.text_turn = title_font.render('TURN', True, BLACK)
-        self.text_score = title_font.render('SCORE', True, BLACK)
+        self.text_turn = TextCache.render(title_font, 'TURN', BLACK)
+        self.text_score = TextCache.render(title_font, 'SCORE', BLACK)
         text_font = pygame.font.SysFont(None, 30)
-        self.text_pass = text_font.render('PASS', True, RED)
-        self.text_win = text_font.render('WIN', True, RED)
-        self.text_draw = text_font.render('DRAW', True, RED)
+        self.text_pass = TextCache.render(text_font, 'PASS', RED)
+        self.text_win = TextCache.render(text_font, 'WIN', RED)
+        self.text_draw = TextCache.render(text_font, 'DRAW', RED)
         self.score_font = pygame.font.SysFont(None, 40)
 
     def draw_background(self, screen):
@@ -201,8 +283,8 @@ class Board:
     def draw_score_display(self, screen):
         pygame.draw.rect(screen, GREEN, (40, self.top + 280, 80, 150))
         screen.blit(self.text_score, (25, self.top + 220))
-        black_score = self.score_font.render(self.black_score, True, BLACK)
-        white_score = self.score_font.render(self.white_score, True, BLACK)
+        black_score = TextCache.render(self.score_font, self.black_score, BLACK)
+        white_score = TextCache.render(self.score_font, self.white_score, BLACK)
         screen.blit(black_score, (140, 380))
         screen.blit(white_score, (140, 445))
 
@@ -222,13 +304,41 @@ class Board:
         if self.player_color == Piece.WHITE:
             pygame.draw.circle(screen, WHITE, (500, 670), 7)
 
+    def layer_state(self):
+        return (self.status, (self.black_score, self.white_score), self.player_color)
+
+    def create_layer(self, screen):
+        """Draw the parts of the board that never change onto a surface
+           in the format of screen.
+        """
+        self.layer = screen.copy()
+        self.layer.fill(GRAY)
+        self.draw_background(self.layer)
+        self.draw_button(self.layer)
+        self.draw_grids(self.layer)
+        self.drawn = {}
+
+    def update_layer(self):
+        """Redraw only the regions of the layer whose state changed.
+        """
+        for i, value in enumerate(self.layer_state()):
+            if i not in self.drawn or self.drawn[i] != value:
+                region, draw = self.regions[i]
+                self.layer.fill(GRAY, region)
+                draw(self.layer)
+                self.drawn[i] = value
+
+    def invalidate(self):
+        """Rebuild the whole layer on the next draw, e.g. after the
+           screen size or the colors changed.
+        """
+        self.layer = None
+
     def draw(self, screen):
-        self.draw_background(screen)
-        self.draw_turn_display(screen)
-        self.draw_score_display(screen)
-        self.draw_button(screen)
-        self.draw_grids(screen)
-        self.draw_players_color(screen)
+        if self.layer is None:
+            self.create_layer(screen)
+        self.update_layer()
+        screen.blit(self.layer, (0, 0))
 
     def find_position(self, x, y):
         row = (y - self.top) // self.grid_size
@@ -240,7 +350,26 @@ class Board:
         center_x = self.left + self.grid_size * col + self.grid_size // 2
         return Point(center_x, center_y)
 
+    def legal_moves(self, color):
+        """Return the legal moves of color as a bitboard. They are
+           computed once per position and color, and place, clear and
+           render throw them away.
+        """
+        color = getattr(color, 'value', color)
+        if (moves := self.moves.get(color)) is None:
+            moves = self.moves[color] = get_moves(self.state.boards[color], self.state.boards[color ^ 1])
+        return moves
+
+    def bitboards(self, color):
+        """Return the bitboards (own, opponent) of the disks seen from
+           color, which the board keeps along with the sprites.
+        """
+        color = getattr(color, 'value', color)
+        return self.state.boards[color], self.state.boards[color ^ 1]
+
     def place(self, row, col, color):
+        self.state.set(row, col, color.value)
+        self.moves.clear()
         self.disks[row][col] = Disk(color, self.grid_center(row, col))
 
     def reverse(self, row, col, color):
@@ -253,8 +382,7 @@ class Cursor(pygame.sprite.Sprite):
 
     def __init__(self, board):
         super().__init__(self.containers)
-        self.image = pygame.image.load(Images.CURSOR.filepath).convert_alpha()
-        self.image = pygame.transform.scale(self.image, (50, 50))
+        self.image = ImageCache.get(Images.CURSOR.filepath, (50, 50))
         self.rect = self.image.get_rect()
         self.visible = False
         self.board = board
@@ -290,60 +418,25 @@ class Cursor(pygame.sprite.Sprite):
 
 class GameLogic:
 
+    def bitboards(self, disks, color):
+        """Return the bitboards (own, opponent) of a grid seen from color.
+        """
+        return to_bitboards(disks, color)
+
+    def legal_moves(self, disks, color):
+        return get_moves(*self.bitboards(disks, color))
+
     def has_placeables(self, disks, color):
-        for r in range(Board.grid_num):
-            for c in range(Board.grid_num):
-                if self.is_placeable(r, c, disks, color):
-                    return True
-        return False
+        return self.legal_moves(disks, color) != 0
 
     def is_placeable(self, row, col, disks, color):
         if not disks[row][col]:
-            for i in range(-1, 2):
-                for j in range(-1, 2):
-                    if i == 0 and j == 0:
-                        continue
-                    if row + i < 0 or row + i >= Board.grid_num or \
-                            col + j < 0 or col + j >= Board.grid_num:
-                        continue
-                    if not disks[row + i][col + j]:
-                        continue
-                    if disks[row + i][col + j].color == color:
-                        continue
-                    if self.reverse_check(disks, color, row + i, col + j, i, j, 0):
-                        return True
+            return get_flips(*self.bitboards(disks, color), square(row, col)) != 0
         return False
 
-    def reverse_check(self, disks, color, row, col, r, c, cnt=0):
-        if 0 <= row < Board.grid_num and 0 <= col < Board.grid_num:
-            if disk := disks[row][col]:
-                if disk.color != color:
-                    cnt += 1
-                    return self.reverse_check(disks, color, row + r, col + c, r, c, cnt)
-                else:
-                    return cnt
-
-    def get_reversibles(self, row, col, r, c, cnt):
-        for i in range(cnt):
-            target_row = row + r * i
-            target_col = col + c * i
-
-            yield (target_row, target_col)
-
     def find_reversibles(self, row, col, disks, color):
-        for r in range(-1, 2):
-            for c in range(-1, 2):
-                if r == 0 and c == 0:
-                    continue
-                if row + r < 0 or row + r >= Board.grid_num or \
-                        col + c < 0 or col + c >= Board.grid_num:
-                    continue
-                if not disks[row + r][col + c]:
-                    continue
-                if disks[row + r][col + c].color == color:
-                    continue
-                if cnt := self.reverse_check(disks, color, row + r, col + c, r, c):
-                    yield from self.get_reversibles(row + r, col + c, r, c, cnt)
+        for sq in iter_squares(get_flips(*self.bitboards(disks, color), square(row, col))):
+            yield position(sq)
 
 
 class Players(GameLogic):
@@ -363,6 +456,22 @@ class Players(GameLogic):
     def create_sounds(self):
         self.sound = pygame.mixer.Sound(Sounds.DISK.filepath)
 
+    def bitboards(self, disks, color):
+        if disks is self.board.disks:
+            return self.board.bitboards(color)
+        return super().bitboards(disks, color)
+
+    def legal_moves(self, disks, color):
+        if disks is self.board.disks:
+            return self.board.legal_moves(color)
+        return super().legal_moves(disks, color)
+
+    def is_placeable(self, row, col, disks, color):
+        if disks is self.board.disks:
+            # the legal moves of the ply, which has_placeables shares
+            return not disks[row][col] and self.board.legal_moves(color) >> square(row, col) & 1 == 1
+        return super().is_placeable(row, col, disks, color)
+
     def reverse(self):
         self.sound.play()
         for row, col in self.find_reversibles(*self.clicked, self.board.disks, self.color):
@@ -391,172 +500,134 @@ class Player(Players):
 
 class Opponent(Players):
 
+    book = None
+    # evaluation.evaluate, or the PatternEvaluator of a weight file given with --weights
+    evaluate = staticmethod(evaluate)
+    endgame_empties = 12
+    endgame_time_limit = 3.0
+
     def __init__(self, board, piece):
         super().__init__(board, piece)
+        self.solver = EndgameSolver(time_limit=self.endgame_time_limit)
 
-        self.around_corners = [
-            (0, 1), (1, 0), (1, 1),
-            (0, 6), (1, 6), (1, 7),
-            (6, 0), (6, 1), (7, 1),
-            (6, 6), (6, 7), (7, 6)
-        ]
-        self.corners = [(0, 0), (0, 7), (7, 0), (7, 7)]
-
-    def get_placeables(self, disks, color):
-        for r in range(self.board.grid_num):
-            for c in range(self.board.grid_num):
-                if not disks[r][c]:
-                    if self.is_placeable(r, c, disks, color.value):
-                        yield r, c
-
-    def find_corners(self, grids):
-        for pos in grids:
-            if pos in self.corners:
-                return pos
-
-    def _corners(self):
-        for r, c in self.corners:
-            yield (r, c)
-
-    def _non_corners(self):
-        for r in range(self.board.grid_num):
-            for c in range(self.board.grid_num):
-                if (r, c) in self.corners:
-                    continue
-                yield (r, c)
-
-    def _around_corners(self, corners):
-        start = 0
-
-        for corner in corners:
-            around_corner = self.around_corners[start: start + 3]
-            start += 3
-            if not corner:
-                for r, c in around_corner:
-                    yield (r, c)
-
-    def _sides(self):
-        for r in range(self.board.grid_num):
-            for c in range(self.board.grid_num):
-                if (r, c) in self.corners or (r, c) in self.around_corners:
-                    continue
-                if r in (0, 7) or c in (0, 7):
-                    yield (r, c)
-
-    def counter(self, disks, grids):
-        opponent = own = 0
-
-        for r, c in grids():
-            if not disks[r][c]:
-                continue
-            if disks[r][c] == self.color:
-                own += 1
-            else:
-                opponent += 1
-
-        return opponent, own
-
-    def copy_current_board(self):
-        disks = [[None for _ in range(self.board.grid_num)] for _ in range(self.board.grid_num)]
-
-        for r in range(self.board.grid_num):
-            for c in range(self.board.grid_num):
-                if disk := self.board.disks[r][c]:
-                    disks[r][c] = disk.color
-        return disks
-
-    def simulate(self, disks, color):
-        empty_corners = [(r, c) for r, c in self.corners if not disks[r][c]]
-        empty_around = [(r, c) for r, c in self.around_corners if not disks[r][c]]
-        empty_sides = [(r, c) for (r, c) in self._sides() if not disks[r][c]]
-
-        corners = arounds = sides = 0
-
-        for r, c in self.get_placeables(disks, color):
-            temp = [line[:] for line in disks]
-            temp[r][c] = color
-            for row, col in self.find_reversibles(r, c, temp, color.value):
-                temp[row][col] = color
-
-            corners += sum(1 for r, c in empty_corners if temp[r][c] == color)
-            arounds += sum(1 for r, c in empty_around if temp[r][c] == color)
-            sides += sum(1 for r, c in empty_sides if temp[r][c] == color)
-
-        return corners, arounds, sides
-
-    def evaluate(self, disks):
-        corner_opponent, corner_own = self.counter(disks, self._corners)
-        not_corner_opponent, not_corner_own = self.counter(disks, self._non_corners)
-        corners = (disks[r][c] for r, c in self.corners)
-        around_opponent, around_own = self.counter(disks, lambda: self._around_corners(corners))
-        side_opponent, side_own = self.counter(disks, self._sides)
+    def count_replies(self, own, opp):
+        """Count the moves of own onto corners, squares around corners
+           and sides.
+        """
+        moves = get_moves(own, opp)
+        return popcount(moves & CORNERS), popcount(moves & AROUNDS), popcount(moves & SIDES)
 
-        evaluation = (corner_own - corner_opponent) \
-            - (not_corner_own - not_corner_opponent) \
-            + 21 * (corner_own - corner_opponent) \
-            + 8 * (side_own - side_opponent) \
-            - 10 * (around_own - around_opponent)
+    def find_best_move(self, grids, own, opp):
+        for r, c in grids:
+            next_own, next_opp = make_move(own, opp, square(r, c))
+            evaluation = self.evaluate(next_own, next_opp)
+            corners, arounds, sides = self.count_replies(next_opp, next_own)
+            yield Candidate(evaluation, r, c, corners, arounds, sides, mobility_score(next_own, next_opp))
 
-        return evaluation
+    def guess(self, grids, own, opp):
+        candidates = [cand for cand in self.find_best_move(grids, own, opp)]
 
-    def find_best_move(self, grids, disks, color):
-        for r, c in grids:
-            temp = [line[:] for line in disks]
-            temp[r][c] = color
-            for row, col in self.find_reversibles(r, c, temp, color.value):
-                temp[row][col] = color
-            evaluation = self.evaluate(temp)
-            corners, arounds, sides = self.simulate(temp, self.opposite_color)
-            yield Candidate(evaluation, r, c, corners, arounds, sides)
-
-    def guess(self, grids, disks):
-        candidates = [cand for cand in self.find_best_move(grids, disks, self.color)]
-
-        if all(c.evaluation == c.corners == c.arounds == c.sides == 0 for c in candidates):
+        if all(c.evaluation == c.mobility == c.corners == c.arounds == c.sides == 0 for c in candidates):
             cand = random.choice(candidates)
         elif filtered := [c for c in candidates if c.corners == 0 and c.arounds > 0 and c.sides == 0]:
-            filtered.sort(key=lambda x: (-x.evaluation, -x.arounds))
+            filtered.sort(key=lambda x: (-x.score, -x.arounds))
             cand = filtered[0]
         elif filtered := [c for c in candidates if c.corners == 0 and c.arounds > 0]:
-            filtered.sort(key=lambda x: (-x.evaluation, x.sides, -x.arounds))
+            filtered.sort(key=lambda x: (-x.score, x.sides, -x.arounds))
             cand = filtered[0]
         elif filtered := [c for c in candidates if c.corners == 0 and c.sides == 0]:
-            cand = max(filtered, key=lambda x: x.evaluation)
+            cand = max(filtered, key=lambda x: x.score)
         elif filtered := [cand for cand in candidates if cand.corners == 0]:
-            filtered.sort(key=lambda x: (-x.evaluation, x.sides))
+            filtered.sort(key=lambda x: (-x.score, x.sides))
             cand = filtered[0]
         elif filtered := [c for c in candidates if c.arounds > 0 and c.sides == 0]:
-            filtered.sort(key=lambda x: (-x.evaluation, x.corners, -x.arounds))
+            filtered.sort(key=lambda x: (-x.score, x.corners, -x.arounds))
             cand = filtered[0]
         elif filtered := [c for c in candidates if c.arounds > 0]:
-            filtered.sort(key=lambda x: (-x.evaluation, x.corners, x.sides, -x.arounds))
+            filtered.sort(key=lambda x: (-x.score, x.corners, x.sides, -x.arounds))
             cand = filtered[0]
         elif filtered := [c for c in candidates if c.sides == 0]:
-            filtered.sort(key=lambda x: (-x.evaluation, x.corners))
+            filtered.sort(key=lambda x: (-x.score, x.corners))
             cand = filtered[0]
         elif filtered := [c for c in candidates if c.sides > 0]:
-            filtered.sort(key=lambda x: (-x.evaluation, x.corners, x.sides))
+            filtered.sort(key=lambda x: (-x.score, x.corners, x.sides))
             cand = filtered[0]
         else:
-            cand = max(candidates, key=lambda x: x.evaluation)
+            cand = max(candidates, key=lambda x: x.score)
 
         return cand.row, cand.col
 
-    def place(self):
-        disks = self.copy_current_board()
-        placeable_grids = [pos for pos in self.get_placeables(disks, self.color)]
+    def current_state(self):
+        return GameState(*self.board.state.boards, self.color.value)
 
-        if not (pos := self.find_corners(placeable_grids)):
-            if filtered := [grid for grid in placeable_grids if grid not in self.around_corners]:
-                placeable_grids = filtered
-            pos = self.guess(placeable_grids, disks)
+    def stop(self):
+        """Ask a move computation running on another thread to finish early.
+        """
+        self.solver.stop()
+
+    def book_move(self):
+        if self.book is not None:
+            state = GameState(*self.board.state.boards, self.color.value)
+            if (move := self.book.best_move(state)) is not None:
+                return position(move)
+        return None
+
+    def endgame_move(self, state):
+        if state.empty_count <= self.endgame_empties:
+            try:
+                result = self.solver.solve(state)
+            except TimeUp:
+                return None
+            if result.move != PASS:
+                return position(result.move)
+        return None
+
+    def select(self, state):
+        if pos := self.endgame_move(state):
+            return pos
+
+        moves = state.legal_moves()
+        if corners := moves & CORNERS:
+            return position(next(iter_squares(corners)))
+        if moves & ~AROUNDS:
+            moves &= ~AROUNDS
+        return self.guess([position(sq) for sq in iter_squares(moves)], state.own, state.opp)
 
+    def place(self):
+        if not (pos := self.book_move()):
+            pos = self.select(self.current_state())
         self.click(*pos)
 
 
+class SearchOpponent(Opponent):
+
+    def __init__(self, board, piece, time_limit=0.2, processes=1):
+        super().__init__(board, piece)
+        self.time_limit = time_limit
+        # a solve gets half of the move's time, the search what it leaves
+        self.solver.time_limit = time_limit / 2
+        if processes > 1:
+            self.searcher = ParallelSearcher(processes, time_limit, evaluate=self.evaluate)
+        else:
+            self.searcher = Searcher(self.evaluate, time_limit=time_limit)
+
+    def stop(self):
+        super().stop()
+        self.searcher.stop()
+
+    def select(self, state):
+        start = time.perf_counter()
+        if pos := self.endgame_move(state):
+            return pos
+        self.searcher.time_limit = self.time_limit - (time.perf_counter() - start)
+        return position(self.searcher.search(state).move)
+
+
 class Othello:
 
-    def __init__(self):
+    idle_timeout = 1.0
+
+    def __init__(self, opponent=Opponent, dirty_rects=False, async_ai=False, fast=False):
         pygame.init()
         self.screen = pygame.display.set_mode(SCREEN.size)
         pygame.display.set_caption('Othello game board')
@@ -571,8 +642,18 @@ class Othello:
         self.board = Board(self, self.display_group)
         self.cursor = Cursor(self.board)
         self.player = Player(self.board, Piece.BLACK)
-        self.opponent = Opponent(self.board, Piece.WHITE)
+        self.opponent = opponent(self.board, Piece.WHITE)
         self.status = None
+        self.scheduler = Scheduler(fast)
+        self.dirty_rects = dirty_rects
+        self.async_ai = async_ai
+        self.worker = None
+        self.game_id = 0
+        self.scene = None
+        self.scene_key = None
+        self.cursor_rect = None
+        self.instrument = None
+        self.overlay = False
         self.create_events()
 
     def create_events(self):
@@ -582,16 +663,12 @@ class Othello:
         self._guess = pygame.USEREVENT + 3
         self._pass = pygame.USEREVENT + 4
         self._gameover = pygame.USEREVENT + 5
+        self._moved = pygame.USEREVENT + 6
 
     def calc_score(self):
-        black = sum(sum(
-            disk.color == Piece.BLACK for disk in row if disk) for row in self.disks)
-        white = sum(sum(
-            disk.color == Piece.WHITE for disk in row if disk) for row in self.disks)
-        self.board.set_score(black, white)
-        if black + white == 64:
-            return False
-        return True
+        state = self.board.state
+        self.board.set_score(state.count(Piece.BLACK.value), state.count(Piece.WHITE.value))
+        return not state.is_full()
 
     def change_first_player(self):
         for player in (self.player, self.opponent):
@@ -599,8 +676,8 @@ class Othello:
             player.set_color(color)
 
     def start(self):
-        self.timer = 0
-        self.event = None
+        self.cancel_thinking()
+        self.scheduler.cancel_all()
         self.board.setup()
         self.player.turn = self.player.color == Piece.BLACK
         self.opponent.turn = self.opponent.color == Piece.BLACK
@@ -612,13 +689,17 @@ class Othello:
             self.board.set_turn(self.opponent.display_disk)
             self.set_timer(self._place)
 
-    def set_timer(self, event_type, t=40):
-        """Using pygame.set_timer resulted in program crash, but no errors
-           were raised.
+    def set_timer(self, event_type, delay=0.65):
+        """Post an event of event_type after delay seconds. Using
+           pygame.set_timer resulted in program crash, but no errors were
+           raised, so the timers run on self.scheduler.
         """
         self.status = Status.SET_TIMER
-        self.event = pygame.event.Event(event_type)
-        self.timer = t
+        return self.scheduler.schedule(delay, self.post_event, pygame.event.Event(event_type))
+
+    def post_event(self, event):
+        self.status = Status.PLAY
+        pygame.event.post(event)
 
     @property
     def current_player(self):
@@ -635,8 +716,42 @@ class Othello:
                     self.set_timer(self._reverse)
 
     def place_disk(self):
-        self.opponent.place()
-        self.set_timer(self._reverse)
+        if self.async_ai:
+            self.think()
+        else:
+            self.opponent.place()
+            self.set_timer(self._reverse)
+
+    def think(self):
+        """Compute the opponent's move on a worker thread, so that the
+           loop keeps drawing and handling input. The move comes back as
+           a _moved event tagged with the game it was computed for.
+        """
+        if pos := self.opponent.book_move():
+            pygame.event.post(pygame.event.Event(self._moved, pos=pos, game=self.game_id))
+        else:
+            self.worker = threading.Thread(
+                target=self.select_move, args=(self.opponent.current_state(), self.game_id), daemon=True)
+            self.worker.start()
+
+    def select_move(self, state, game_id):
+        pos = self.opponent.select(state)
+        pygame.event.post(pygame.event.Event(self._moved, pos=pos, game=game_id))
+
+    def move_opponent(self, event):
+        if event.game == self.game_id:
+            self.opponent.click(*event.pos)
+            self.set_timer(self._reverse)
+
+    def cancel_thinking(self):
+        """Stop a running move computation and drop its result.
+        """
+        self.game_id += 1
+        if self.worker:
+            while self.worker.is_alive():
+                self.opponent.stop()
+                self.worker.join(0.01)
+            self.worker = None
 
     def reverse_disks(self):
         self.current_player.reverse()
@@ -652,6 +767,7 @@ class Othello:
     def take_turns(self):
         self.player.turn = not self.player.turn
         self.opponent.turn = not self.opponent.turn
+        self.board.state.turn = self.current_player.color.value
         self.board.set_turn(self.current_player.display_disk)
         self.set_timer(self._guess)
 
@@ -676,58 +792,198 @@ class Othello:
             self.board.status = Status.WIN
         self.status = Status.GAMEOVER
 
+    def draw(self):
+        self.board.draw(self.screen)
+        self.disk_group.update()
+        self.disk_group.draw(self.screen)
+        self.display_group.update()
+        self.display_group.draw(self.screen)
+
+        if self.cursor.visible:
+            self.cursor_group.update()
+            self.cursor_group.draw(self.screen)
+
+    def draw_changes(self):
+        """Redraw only what changed since the last frame and return the
+           dirty rects. Everything but the cursor is kept in self.scene,
+           which is rebuilt only when the board, the disks or the panels
+           change; the cursor is restored from it when it moves.
+        """
+        board = self.board
+        panels = (board.status, board.black_score, board.white_score,
+                  board.player_color, self.display_group.sprite)
+        key = (panels, tuple(board.state.boards))
+        rects = []
+
+        if key != self.scene_key:
+            if self.scene is None:
+                self.scene = self.screen.copy()
+            board.draw(self.scene)
+            self.disk_group.draw(self.scene)
+            self.display_group.draw(self.scene)
+            self.screen.blit(self.scene, (0, 0))
+
+            if self.scene_key is not None and self.scene_key[0] == panels:
+                rects.append(Rect(board.left - 20, board.top - 20, board.side + 40, board.side + 40))
+            else:
+                rects.append(SCREEN)
+            self.scene_key = key
+            self.cursor_rect = None
+
+        cursor_rect = self.cursor.rect.copy() if self.cursor.visible else None
+        if cursor_rect != self.cursor_rect or rects:
+            if self.cursor_rect:
+                self.screen.blit(self.scene, self.cursor_rect, self.cursor_rect)
+                rects.append(self.cursor_rect)
+            if cursor_rect:
+                self.cursor_group.draw(self.screen)
+                rects.append(cursor_rect)
+            self.cursor_rect = cursor_rect
+
+        return rects
+
+    def get_events(self):
+        """Return the pending events. If there are none, block until one
+           arrives or the next timer is due (at most idle_timeout seconds)
+           instead of polling at the full frame rate. The opponent's worker
+           thread posts its move as an event, so it wakes the loop too.
+        """
+        if (timeout := self.scheduler.next_due()) is None or timeout > self.idle_timeout:
+            timeout = self.idle_timeout
+
+        if (events := pygame.event.get()) or timeout == 0:
+            return events
+        if (event := pygame.event.wait(math.ceil(timeout * 1000))).type == NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def attach(self, instrument, overlay=False):
+        """Wrap the main loop phases, drawing, AI calls and the move
+           generation helpers with an Instrument. Without one nothing is
+           wrapped, so the loop runs as fast as before.
+        """
+        self.instrument = instrument
+        self.overlay = overlay
+        self.overlay_font = pygame.font.SysFont(None, 24)
+
+        instrument.time(self.scheduler, 'run_due', 'timers', frame=True)
+        instrument.time(self, 'render', frame=True)
+        instrument.time(self, 'handle_events', 'events', frame=True)
+        instrument.time(self, 'get_events', 'wait')
+        instrument.time(self.board, 'draw', 'board')
+        for group in (self.disk_group, self.display_group, self.cursor_group):
+            instrument.time(group, 'draw', 'sprites')
+        instrument.time(self, 'update_display', 'display')
+        instrument.time(self.opponent, 'select', 'ai')
+
+        for player in (self.player, self.opponent):
+            instrument.count(player, 'is_placeable')
+            instrument.count(player, 'find_reversibles')
+        instrument.count(self.opponent, 'evaluate')
+        # a ParallelSearcher evaluates in its worker processes
+        if isinstance(searcher := getattr(self.opponent, 'searcher', None), Searcher):
+            instrument.count(searcher, 'evaluate', 'search.evaluate')
+
+    def draw_overlay(self):
+        area = Rect(SCREEN.right - 290, 10, 280, 30)
+        if self.scene:
+            self.screen.blit(self.scene, area, area)
+        else:
+            self.screen.fill(GRAY, area)
+        text = TextCache.render(self.overlay_font, self.instrument.summary(), RED)
+        self.screen.blit(text, text.get_rect(midright=area.midright))
+        return area
+
+    def update_display(self, rects=None):
+        if rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+
+    def render(self):
+        if self.dirty_rects:
+            rects = self.draw_changes()
+            if self.overlay:
+                rects.append(self.draw_overlay())
+            if rects:
+                self.update_display(rects)
+        else:
+            self.draw()
+            if self.overlay:
+                self.draw_overlay()
+            self.update_display()
+
+    def quit(self):
+        if self.instrument and self.instrument.path:
+            self.instrument.dump()
+        pygame.quit()
+        sys.exit()
+
+    def handle_events(self, events):
+        for event in events:
+            if event.type == QUIT:
+                self.quit()
+            if event.type == MOUSEMOTION:
+                x, y = event.pos
+                self.cursor.show(Point(*event.pos))
+            if event.type == self._reverse:
+                self.reverse_disks()
+            if event.type == self._place:
+                self.place_disk()
+            if event.type == self._change:
+                self.take_turns()
+            if event.type == self._guess:
+                self.guess_placeable()
+            if event.type == self._pass:
+                self.pass_turn()
+            if event.type == self._gameover:
+                self.game_over()
+            if event.type == self._moved:
+                self.move_opponent(event)
+            # if event.type == MOUSEBUTTONDOWN and event.button == 1:
+            if event.type == MOUSEBUTTONUP and event.button == 1:
+                if self.board.button.rect.collidepoint(*event.pos):
+                    self.board.button.click()
+                else:
+                    self.player_click(event.pos)
+
     def run(self):
         clock = pygame.time.Clock()
         self.start()
 
         while True:
-            if self.status == Status.SET_TIMER:
-                self.timer -= 1
-                if self.timer == 0:
-                    self.status = Status.PLAY
-                    pygame.event.post(self.event)
-
+            self.scheduler.run_due()
             clock.tick(60)
-            self.screen.fill(GRAY)
-            self.board.draw(self.screen)
-            self.disk_group.update()
-            self.disk_group.draw(self.screen)
-            self.display_group.update()
-            self.display_group.draw(self.screen)
-
-            if self.cursor.visible:
-                self.cursor_group.update()
-                self.cursor_group.draw(self.screen)
-
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == MOUSEMOTION:
-                    x, y = event.pos
-                    self.cursor.show(Point(*event.pos))
-                if event.type == self._reverse:
-                    self.reverse_disks()
-                if event.type == self._place:
-                    self.place_disk()
-                if event.type == self._change:
-                    self.take_turns()
-                if event.type == self._guess:
-                    self.guess_placeable()
-                if event.type == self._pass:
-                    self.pass_turn()
-                if event.type == self._gameover:
-                    self.game_over()
-                # if event.type == MOUSEBUTTONDOWN and event.button == 1:
-                if event.type == MOUSEBUTTONUP and event.button == 1:
-                    if self.board.button.rect.collidepoint(*event.pos):
-                        self.board.button.click()
-                    else:
-                        self.player_click(event.pos)
-
-            pygame.display.update()
+            self.render()
+            self.handle_events(self.get_events())
+            if self.instrument:
+                self.instrument.end_frame()
 
 
 if __name__ == '__main__':
-    game = Othello()
+    parser = argparse.ArgumentParser(description='Othello game board')
+    parser.add_argument('--search', action='store_true', help='play against the alpha-beta search opponent')
+    parser.add_argument('--time-limit', type=float, default=0.2, help='seconds per move for --search')
+    parser.add_argument('--processes', type=int, default=1, help='worker processes for --search')
+    parser.add_argument('--book', help='opening book file built with book.py')
+    parser.add_argument('--weights', help='evaluation weight file fitted with train.py')
+    parser.add_argument('--dirty-rects', action='store_true', help='update only the changed parts of the screen')
+    parser.add_argument('--async-ai', action='store_true', help='compute the opponent moves on a worker thread')
+    parser.add_argument('--fast', action='store_true', help='play without pauses between moves')
+    parser.add_argument('--profile', help='write timings and call counts as JSON to this file on exit')
+    parser.add_argument('--overlay', action='store_true', help='show the frame time on the screen')
+    args = parser.parse_args()
+
+    if args.weights:
+        Opponent.evaluate = staticmethod(PatternEvaluator(load_weights(args.weights)).evaluate)
+    options = dict(dirty_rects=args.dirty_rects, async_ai=args.async_ai, fast=args.fast)
+    if args.search:
+        game = Othello(
+            lambda board, piece: SearchOpponent(board, piece, args.time_limit, args.processes), **options)
+    else:
+        game = Othello(**options)
+    if args.book:
+        game.opponent.book = OpeningBook(args.book)
+    if args.profile or args.overlay:
+        game.attach(Instrument(args.profile), args.overlay)
     game.run()
@@ -0,0 +1,110 @@
+"""Root-splitting parallel search on a process pool.
+
+Every iteration of the iterative deepening splits the root moves into
+one group per worker. Each worker searches its group with its own
+Searcher, whose transposition table lives in the worker and is kept
+between iterations and moves, and the master merges the best move and
+score of every group. An iteration counts only when every group
+finishes before the time limit.
+"""
+
+import multiprocessing
+import os
+import time
+
+from bitboard import get_moves, popcount
+from evaluation import evaluate
+from gamestate import PASS
+from search import DISC_SCORE, SearchResult, Searcher, TimeUp, ordered_moves
+
+
+_searcher = None
+
+
+def init_worker(tt_bytes, evaluate=evaluate):
+    global _searcher
+    _searcher = Searcher(evaluate, time_limit=None, tt_bytes=tt_bytes)
+
+
+def search_moves(task):
+    """Search a group of root moves to depth in a worker. Return
+       (move, score, nodes), with move None if time ran out.
+    """
+    own, opp, color, h, moves, depth, time_left = task
+    searcher = _searcher
+    if depth == 1:
+        searcher.tt.new_search()
+    searcher.nodes = 0
+    searcher.stopped = False
+    searcher.time_limit = time_left
+    searcher.deadline = time.perf_counter() + time_left
+
+    try:
+        move, score = searcher.search_root(own, opp, color, h, moves, depth)
+    except TimeUp:
+        return None, None, searcher.nodes
+    return move, score, searcher.nodes
+
+
+class ParallelSearcher:
+
+    def __init__(self, processes=None, time_limit=0.2, max_depth=60, tt_bytes=16 * 1024 * 1024,
+                 evaluate=evaluate):
+        self.processes = processes or os.cpu_count()
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.stopped = False
+        # spawn, because forking a process that runs pygame and threads is not safe
+        context = multiprocessing.get_context('spawn')
+        self.pool = context.Pool(self.processes, init_worker, (tt_bytes, evaluate))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def stop(self):
+        """Stop after the running iteration. The workers stop at the
+           time limit.
+        """
+        self.stopped = True
+
+    def search(self, state):
+        """Search the side to move of a GameState and return a SearchResult,
+           like Searcher.search.
+        """
+        self.stopped = False
+        deadline = time.perf_counter() + self.time_limit
+
+        own, opp = state.own, state.opp
+        if not (moves := get_moves(own, opp)):
+            return SearchResult(PASS, None, 0, 0)
+
+        root_moves = ordered_moves(moves)
+        best = SearchResult(root_moves[0], None, 0, 0)
+        empties = popcount(~(own | opp) & 0xFFFFFFFFFFFFFFFF)
+        nodes = 0
+
+        for depth in range(1, self.max_depth + 1):
+            if self.stopped or (time_left := deadline - time.perf_counter()) <= 0:
+                break
+            tasks = [(own, opp, state.turn, state.hash, root_moves[i::self.processes], depth, time_left)
+                     for i in range(min(self.processes, len(root_moves)))]
+            results = self.pool.map(search_moves, tasks)
+            nodes += sum(result[2] for result in results)
+            if any(move is None for move, _, _ in results):
+                break
+
+            move, score, _ = max(results, key=lambda x: x[1])
+            best = SearchResult(move, score, depth, nodes)
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if abs(score) >= DISC_SCORE or depth >= empties:
+                break
+
+        return best._replace(nodes=nodes)
@@ -0,0 +1,223 @@
+"""Pattern-table evaluation on bitboards.
+
+The board is covered by pattern instances: the edges with their X
+squares, the 3x3 and 2x5 corner regions, the second to fourth lines and
+the diagonals. Each instance reads its squares as a base-3 index (0
+empty, 1 own, 2 opponent) and looks the index up in the weight table of
+its pattern; the instances of one pattern are the symmetric images of
+each other and share the table. Every game phase has its own tables.
+
+The indices of all instances are computed at once: ROW_TABLES give, for
+each row byte of a bitboard, the digits it adds to every instance packed
+as 16-bit fields of one integer, so an evaluation is 16 lookups, one
+addition per lookup and one weight lookup per instance.
+
+The default weights reproduce evaluation.evaluate exactly. Weights
+fitted by train.py are stored in a weight file: WEIGHTS_HEADER followed
+by the float32 tables of every phase and pattern, little-endian.
+"""
+
+import functools
+import struct
+import sys
+from array import array
+from operator import getitem
+
+from bitboard import popcount, square
+from evaluation import AROUND_CORNERS, AROUND_WEIGHT, CORNERS, CORNER_WEIGHT, SIDES, SIDE_WEIGHT
+
+
+PHASES = 6
+
+# the phase of a position by its number of discs
+PHASE = tuple(max(n - 4, 0) * PHASES // 61 for n in range(65))
+
+SYMMETRIES = (
+    lambda r, c: (r, c),
+    lambda r, c: (r, 7 - c),
+    lambda r, c: (7 - r, c),
+    lambda r, c: (7 - r, 7 - c),
+    lambda r, c: (c, r),
+    lambda r, c: (c, 7 - r),
+    lambda r, c: (7 - c, r),
+    lambda r, c: (7 - c, 7 - r),
+)
+
+# The squares of one instance of each pattern. The first digit of an
+# index is the first square.
+PATTERNS = (
+    ('corner3x3', tuple((r, c) for r in range(3) for c in range(3))),
+    ('edge2x', tuple((0, c) for c in range(8)) + ((1, 1), (1, 6))),
+    ('corner2x5', tuple((r, c) for r in range(2) for c in range(5))),
+    ('hv2', tuple((1, c) for c in range(8))),
+    ('hv3', tuple((2, c) for c in range(8))),
+    ('hv4', tuple((3, c) for c in range(8))),
+    ('diag8', tuple((i, i) for i in range(8))),
+    ('diag7', tuple((i, i + 1) for i in range(7))),
+    ('diag6', tuple((i, i + 2) for i in range(6))),
+    ('diag5', tuple((i, i + 3) for i in range(5))),
+    ('diag4', tuple((i, i + 4) for i in range(4))),
+)
+
+NAMES = tuple(name for name, _ in PATTERNS)
+
+
+def pattern_instances(squares):
+    """Return the distinct symmetric images of a pattern as tuples of
+       square indices.
+    """
+    instances = []
+    seen = set()
+
+    for symmetry in SYMMETRIES:
+        instance = tuple(square(*symmetry(r, c)) for r, c in squares)
+        if (key := frozenset(instance)) not in seen:
+            seen.add(key)
+            instances.append(instance)
+    return instances
+
+
+# (pattern number, squares) of every instance
+INSTANCES = tuple(
+    (i, instance) for i, (_, squares) in enumerate(PATTERNS) for instance in pattern_instances(squares)
+)
+
+SIZES = tuple(3 ** len(squares) for _, squares in PATTERNS)
+
+# magic, number of phases, number of patterns
+WEIGHTS_HEADER = struct.Struct('<4sHH')
+WEIGHTS_MAGIC = b'OPW1'
+
+FIELD_BITS = 16
+INDEX_BYTES = len(INSTANCES) * FIELD_BITS // 8
+
+
+def make_row_tables():
+    """Return a (own table, opponent table) pair for each row. Entry b
+       of a table holds, packed as 16-bit fields, the digits that the
+       bits of row byte b add to the index of every instance.
+    """
+    digits = [[0] * 8 for _ in range(8)]
+    for field, (_, instance) in enumerate(INSTANCES):
+        for k, sq in enumerate(instance):
+            digits[sq // 8][sq % 8] += 3 ** k << field * FIELD_BITS
+
+    tables = []
+    for row in digits:
+        own = [sum(row[c] for c in range(8) if b >> c & 1) for b in range(256)]
+        tables.append((tuple(own), tuple(2 * x for x in own)))
+    return tuple(tables)
+
+
+ROW_TABLES = make_row_tables()
+
+
+def pattern_indices(own, opp):
+    """Return the index of every instance, in the order of INSTANCES.
+    """
+    packed = 0
+    for own_table, opp_table in ROW_TABLES:
+        packed += own_table[own & 0xFF] + opp_table[opp & 0xFF]
+        own >>= 8
+        opp >>= 8
+    return memoryview(packed.to_bytes(INDEX_BYTES, sys.byteorder)).cast('H')
+
+
+@functools.lru_cache(maxsize=None)
+def linear_weights():
+    """Return one table per pattern that adds up to evaluation.evaluate.
+
+    Each square is scored by the first pattern that covers it, split
+    evenly between the instances of that pattern that cover it. The
+    squares around a corner are scored by the 3x3 corner pattern, which
+    sees whether the corner is empty.
+    """
+    square_weights = [
+        CORNER_WEIGHT + 1 if CORNERS >> sq & 1 else SIDE_WEIGHT - 1 if SIDES >> sq & 1 else -1
+        for sq in range(64)
+    ]
+    corners = {}
+    for corner, around in AROUND_CORNERS:
+        for sq in range(64):
+            if around >> sq & 1:
+                corners[sq] = corner.bit_length() - 1
+
+    owners = {}
+    for i, instance in INSTANCES:
+        for sq in instance:
+            owners.setdefault(sq, i)
+    shares = [sum(sq in instance for j, instance in INSTANCES if j == owners[sq]) for sq in range(64)]
+
+    tables = []
+    for i in range(len(PATTERNS)):
+        instance = next(instance for j, instance in INSTANCES if j == i)
+        table = [0.0]
+
+        # extend the table one square (one digit) at a time
+        for sq in instance:
+            weights = [square_weights[sq] / shares[sq] if owners[sq] == i else 0.0] * len(table)
+            if owners[sq] == i and sq in corners:
+                # the corner comes before its around squares in the pattern
+                place = 3 ** instance.index(corners[sq])
+                weights = [w + AROUND_WEIGHT if not index // place % 3 else w for index, w in enumerate(weights)]
+            table += [x + w for x, w in zip(table, weights)] + [x - w for x, w in zip(table, weights)]
+        tables.append(array('f', table))
+    return tables
+
+
+class WeightsError(Exception):
+    pass
+
+
+def save_weights(weights, path):
+    """Write per phase, per pattern tables (anything with tobytes and
+       float32 items) to a weight file.
+    """
+    with open(path, 'wb') as f:
+        f.write(WEIGHTS_HEADER.pack(WEIGHTS_MAGIC, PHASES, len(PATTERNS)))
+        for tables in weights:
+            for table in tables:
+                table = array('f', bytes(table))
+                if sys.byteorder == 'big':
+                    table.byteswap()
+                f.write(table.tobytes())
+
+
+def load_weights(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, phases, patterns = WEIGHTS_HEADER.unpack_from(data)
+    if magic != WEIGHTS_MAGIC or phases != PHASES or patterns != len(PATTERNS):
+        raise WeightsError(f'{path} is not a weight file for these patterns')
+    if len(data) != WEIGHTS_HEADER.size + 4 * PHASES * sum(SIZES):
+        raise WeightsError(f'{path} has a wrong size')
+
+    weights = []
+    offset = WEIGHTS_HEADER.size
+    for _ in range(PHASES):
+        tables = []
+        for size in SIZES:
+            table = array('f', data[offset: offset + 4 * size])
+            if sys.byteorder == 'big':
+                table.byteswap()
+            tables.append(table)
+            offset += 4 * size
+        weights.append(tables)
+    return weights
+
+
+class PatternEvaluator:
+    """Score positions with pattern tables. weights holds, for each
+       phase, one table per pattern indexed by the pattern index.
+    """
+
+    def __init__(self, weights=None):
+        if weights is None:
+            weights = [linear_weights()] * PHASES
+        self.weights = weights
+        self.tables = [[tables[i] for i, _ in INSTANCES] for tables in weights]
+
+    def evaluate(self, own, opp):
+        tables = self.tables[PHASE[popcount(own | opp)]]
+        return round(sum(map(getitem, tables, pattern_indices(own, opp))))
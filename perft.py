@@ -0,0 +1,106 @@
+"""Perft: count the leaf nodes of the game tree to a fixed depth.
+
+A pass counts as a move, and a finished game counts as a leaf however
+many plies are left. The counts checked against KNOWN_COUNTS make a
+correctness oracle for the move generator, and nodes per second make a
+speed gate for it:
+
+    python perft.py --depth 8 --min-rate 500000
+"""
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+from bitboard import get_flips, get_moves
+from gamestate import GameState, parse_notation
+
+
+PerftResult = namedtuple('PerftResult', 'name depth nodes expected seconds')
+
+POSITIONS = {
+    'start': '',
+    'midgame': 'e6f6g6d6c6g7g8b6c4h8f7e3f2e7f5c3d3h5b2g5',
+    'pass': 'd3c3f5f6e6d6g7g5d7h8b3c7h5c8e7g6f7f4g8g4c6f8f3h7e8h3h4e3e2d8b8g3h2a8h6',
+    'endgame': 'e6f6g6d6c6g7g8b6c4h8f7e3f2e7f5c3d3h5b2g5h7c5a6a7b4d7h4a1c2a3b5h6a2a4d8h3f8d2b3c8a5e8c1f4f3g1',
+}
+
+KNOWN_COUNTS = {
+    'start': [4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288, 24571284, 212258800],
+    'midgame': [5, 50, 431, 5137, 53074, 670674],
+    'pass': [13, 43, 540, 2412, 29054, 160095, 1834046],
+    'endgame': [7, 34, 213, 1016, 5834, 25950, 127694],
+}
+
+
+def perft(own, opp, depth, passed=False, get_moves=get_moves, get_flips=get_flips):
+    if depth == 0:
+        return 1
+
+    if not (moves := get_moves(own, opp)):
+        if passed:
+            return 1
+        return perft(opp, own, depth - 1, True, get_moves, get_flips)
+
+    if depth == 1:
+        return bin(moves).count('1')
+
+    nodes = 0
+    while moves:
+        lowest = moves & -moves
+        moves ^= lowest
+        flips = get_flips(own, opp, lowest.bit_length() - 1)
+        nodes += perft(opp ^ flips, own | flips | lowest, depth - 1, False, get_moves, get_flips)
+    return nodes
+
+
+def get_position(name):
+    state = GameState()
+    for move in parse_notation(POSITIONS[name]):
+        state.play(move)
+    return state
+
+
+def run(depth, names=None):
+    """Yield a PerftResult for every position from depth 1 up to depth.
+    """
+    for name in names or POSITIONS:
+        state = get_position(name)
+        known = KNOWN_COUNTS[name]
+        for d in range(1, depth + 1):
+            start = time.perf_counter()
+            nodes = perft(state.own, state.opp, d)
+            seconds = time.perf_counter() - start
+            expected = known[d - 1] if d <= len(known) else None
+            yield PerftResult(name, d, nodes, expected, seconds)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Count and time move generation to a fixed depth')
+    parser.add_argument('--depth', type=int, default=7, help='maximum depth')
+    parser.add_argument('--positions', nargs='*', choices=list(POSITIONS), help='positions to run')
+    parser.add_argument('--min-rate', type=float, default=0, help='fail below this many nodes per second')
+    args = parser.parse_args()
+
+    failed = False
+    total_nodes = total_seconds = 0
+    for result in run(args.depth, args.positions):
+        if result.expected is None:
+            check = 'unknown'
+        elif result.nodes == result.expected:
+            check = 'ok'
+        else:
+            check = f'FAIL (expected {result.expected})'
+            failed = True
+        total_nodes += result.nodes
+        total_seconds += result.seconds
+        rate = result.nodes / result.seconds if result.seconds else 0
+        print(f'{result.name:8} {result.depth:2} {result.nodes:12} {result.seconds:9.3f}s {rate:12.0f} nodes/s  {check}')
+
+    rate = total_nodes / total_seconds if total_seconds else 0
+    print(f'total {total_nodes} nodes in {total_seconds:.3f}s, {rate:.0f} nodes/s')
+    if rate < args.min_rate:
+        print(f'FAIL: below {args.min_rate:.0f} nodes/s')
+        failed = True
+    sys.exit(1 if failed else 0)
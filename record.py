@@ -0,0 +1,142 @@
+"""Compact game records.
+
+A record file starts with MAGIC and holds any number of games, each
+framed as a FRAME header followed by the two player names (UTF-8) and
+one byte per move: the square index, or 64 (gamestate.PASS) for a
+pass. Files are only ever appended to, and the reader streams one game
+at a time, so files of millions of games never have to fit in memory.
+A frame cut short by a crash is skipped by the reader.
+
+    with RecordWriter('games.ogr') as writer:
+        writer.write(GameRecord('search', 'random', bytes(moves), 40, 24))
+
+    for game in read_records('games.ogr'):
+        ...
+"""
+
+import struct
+from collections import namedtuple
+
+from gamestate import BLACK, WHITE, GameState
+
+
+MAGIC = b'OGR1'
+
+# move count, black discs, white discs, black name length, white name length
+FRAME = struct.Struct('<HBBBB')
+
+GameRecord = namedtuple('GameRecord', 'black white moves black_discs white_discs')
+
+
+class RecordError(Exception):
+    pass
+
+
+def from_state(state, black, white):
+    """Make a GameRecord of the moves played on a GameState so far.
+    """
+    return GameRecord(
+        black, white, bytes(move for move, _, _ in state.history), state.count(BLACK), state.count(WHITE))
+
+
+def replay(record):
+    """Return the GameState after the moves of a record.
+    """
+    state = GameState()
+    for move in record.moves:
+        state.play(move)
+    return state
+
+
+def encode(record):
+    black, white = record.black.encode(), record.white.encode()
+    header = FRAME.pack(len(record.moves), record.black_discs, record.white_discs, len(black), len(white))
+    return b''.join((header, black, white, bytes(record.moves)))
+
+
+def decode(data, offset=0):
+    """Decode the game framed at offset of data. Return the GameRecord
+       and the offset of the next frame.
+    """
+    count, black_discs, white_discs, black_len, white_len = FRAME.unpack_from(data, offset)
+    offset += FRAME.size
+    black = bytes(data[offset: offset + black_len]).decode()
+    offset += black_len
+    white = bytes(data[offset: offset + white_len]).decode()
+    offset += white_len
+    moves = bytes(data[offset: offset + count])
+    return GameRecord(black, white, moves, black_discs, white_discs), offset + count
+
+
+def scan(f):
+    """Skip from frame to frame of an open record file and return the
+       number of whole games and the offset where the last one ends.
+    """
+    size = f.seek(0, 2)
+    f.seek(0)
+    if f.read(len(MAGIC)) != MAGIC:
+        raise RecordError(f'{f.name} is not a game record file')
+
+    count, end = 0, len(MAGIC)
+    while len(header := f.read(FRAME.size)) == FRAME.size:
+        moves, _, _, black_len, white_len = FRAME.unpack(header)
+        if (next_end := end + FRAME.size + black_len + white_len + moves) > size:
+            break
+        count, end = count + 1, f.seek(next_end)
+    return count, end
+
+
+class RecordWriter:
+    """Append games to a record file. A frame left incomplete by a crash
+       at the end of an existing file is cut off first.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'a+b')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        else:
+            _, end = scan(self.file)
+            self.file.truncate(end)
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, record):
+        self.file.write(encode(record))
+        self.count += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def is_record_file(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_records(path):
+    """Yield the GameRecords of a file one by one.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise RecordError(f'{path} is not a game record file')
+
+        while len(header := f.read(FRAME.size)) == FRAME.size:
+            count, _, _, black_len, white_len = FRAME.unpack(header)
+            size = black_len + white_len + count
+            if len(body := f.read(size)) < size:
+                break
+            yield decode(header + body)[0]
+
+
+def count_records(path):
+    with open(path, 'rb') as f:
+        return scan(f)[0]
@@ -0,0 +1,85 @@
+"""Timed callbacks on a monotonic clock.
+
+Timers are kept in a heap ordered by due time, so any number of them
+can be pending at once. Pacing follows the clock, not the frame rate.
+In fast mode every delay is treated as zero, which lets headless or
+AI-vs-AI games skip the artificial pauses.
+"""
+
+import heapq
+import itertools
+import time
+
+
+class Timer:
+
+    __slots__ = ('when', 'callback', 'args')
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+
+    @property
+    def cancelled(self):
+        return self.callback is None
+
+    def cancel(self):
+        self.callback = self.args = None
+
+
+class Scheduler:
+
+    def __init__(self, fast=False, clock=time.monotonic):
+        self.fast = fast
+        self.clock = clock
+        self.queue = []
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return sum(not timer.cancelled for _, _, timer in self.queue)
+
+    def schedule(self, delay, callback, *args):
+        """Call callback(*args) once delay seconds have passed and
+           return a Timer that can be cancelled.
+        """
+        timer = Timer(self.clock() + (0 if self.fast else delay), callback, args)
+        heapq.heappush(self.queue, (timer.when, next(self.counter), timer))
+        return timer
+
+    def cancel(self, timer):
+        timer.cancel()
+
+    def cancel_all(self):
+        for _, _, timer in self.queue:
+            timer.cancel()
+        self.queue.clear()
+
+    def next_due(self):
+        """Return the seconds until the next timer is due (0 if one is
+           overdue), or None if nothing is pending.
+        """
+        while self.queue and self.queue[0][2].cancelled:
+            heapq.heappop(self.queue)
+        if self.queue:
+            return max(0, self.queue[0][0] - self.clock())
+        return None
+
+    def run_due(self):
+        """Call every timer that is due, in due order, and return how
+           many were called. Timers scheduled by the callbacks wait for
+           the next call, even with a zero delay.
+        """
+        now = self.clock()
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            due.append(heapq.heappop(self.queue)[2])
+
+        count = 0
+        for timer in due:
+            if not timer.cancelled:
+                callback, args = timer.callback, timer.args
+                timer.cancel()
+                callback(*args)
+                count += 1
+        return count
@@ -0,0 +1,177 @@
+"""Negamax alpha-beta search with iterative deepening.
+
+The search stops at a wall-clock or node budget and returns the best
+move of the deepest iteration it completed. Results are kept in a
+transposition table between iterations and between moves.
+"""
+
+import time
+from collections import namedtuple
+
+from bitboard import get_flips, get_moves, popcount
+from evaluation import evaluate
+from gamestate import PASS
+from transposition import EXACT, LOWER, NO_MOVE, UPPER, ZOBRIST_KEYS, ZOBRIST_SIDE, \
+    TranspositionTable, flip_key
+
+
+INFINITY = 1 << 30
+DISC_SCORE = 1000
+
+SearchResult = namedtuple('SearchResult', 'move score depth nodes')
+
+# Squares from the most to the least promising, used to order moves.
+SQUARE_WEIGHTS = (
+    100, -20, 10, 5, 5, 10, -20, 100,
+    -20, -50, -2, -2, -2, -2, -50, -20,
+    10, -2, 1, 1, 1, 1, -2, 10,
+    5, -2, 1, 0, 0, 1, -2, 5,
+    5, -2, 1, 0, 0, 1, -2, 5,
+    10, -2, 1, 1, 1, 1, -2, 10,
+    -20, -50, -2, -2, -2, -2, -50, -20,
+    100, -20, 10, 5, 5, 10, -20, 100,
+)
+MOVE_ORDER = tuple(sorted(range(64), key=lambda sq: -SQUARE_WEIGHTS[sq]))
+
+
+class TimeUp(Exception):
+    pass
+
+
+def final_score(own, opp):
+    return (popcount(own) - popcount(opp)) * DISC_SCORE
+
+
+def ordered_moves(moves, first=NO_MOVE):
+    ordered = [sq for sq in MOVE_ORDER if moves >> sq & 1]
+    if first != NO_MOVE and moves >> first & 1:
+        ordered.remove(first)
+        ordered.insert(0, first)
+    return ordered
+
+
+class Searcher:
+
+    check_interval = 256
+
+    def __init__(self, evaluate=evaluate, time_limit=0.2, node_limit=None, max_depth=60,
+                 tt_bytes=16 * 1024 * 1024):
+        self.evaluate = evaluate
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self.tt = TranspositionTable(tt_bytes)
+        self.nodes = 0
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+    def check_budget(self):
+        if self.stopped:
+            raise TimeUp()
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise TimeUp()
+        if self.time_limit is not None and time.perf_counter() >= self.deadline:
+            raise TimeUp()
+
+    def search(self, state):
+        """Search the side to move of a GameState and return a SearchResult.
+           The move is PASS when the side to move has no legal moves.
+        """
+        self.nodes = 0
+        self.stopped = False
+        if self.time_limit is not None:
+            self.deadline = time.perf_counter() + self.time_limit
+        self.tt.new_search()
+
+        own, opp = state.own, state.opp
+        if not (moves := get_moves(own, opp)):
+            return SearchResult(PASS, None, 0, 0)
+
+        entry = self.tt.probe(state.hash)
+        root_moves = ordered_moves(moves, entry.move if entry else NO_MOVE)
+        best = SearchResult(root_moves[0], None, 0, 0)
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                move, score = self.search_root(own, opp, state.turn, state.hash, root_moves, depth)
+            except TimeUp:
+                break
+            best = SearchResult(move, score, depth, self.nodes)
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if abs(score) >= DISC_SCORE or depth >= popcount(~(own | opp) & 0xFFFFFFFFFFFFFFFF):
+                break
+
+        return best._replace(nodes=self.nodes)
+
+    def search_root(self, own, opp, color, h, moves, depth):
+        alpha, beta = -INFINITY, INFINITY
+        best_move = moves[0]
+        keys = ZOBRIST_KEYS[color]
+
+        for sq in moves:
+            flips = get_flips(own, opp, sq)
+            child = h ^ keys[sq] ^ flip_key(flips) ^ ZOBRIST_SIDE
+            score = -self.negamax(
+                opp ^ flips, own | flips | (1 << sq), color ^ 1, child, depth - 1, -beta, -alpha)
+            if score > alpha:
+                alpha = score
+                best_move = sq
+
+        self.tt.store(h, depth, EXACT, alpha, best_move)
+        return best_move, alpha
+
+    def negamax(self, own, opp, color, h, depth, alpha, beta, passed=False):
+        self.nodes += 1
+        if self.nodes % self.check_interval == 0:
+            self.check_budget()
+
+        if depth <= 0:
+            return self.evaluate(own, opp)
+
+        alpha_orig = alpha
+        tt_move = NO_MOVE
+        if entry := self.tt.probe(h):
+            tt_move = entry.move
+            if entry.depth >= depth:
+                if entry.flag == EXACT:
+                    return entry.score
+                if entry.flag == LOWER:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if alpha >= beta:
+                    return entry.score
+
+        if not (moves := get_moves(own, opp)):
+            if passed:
+                return final_score(own, opp)
+            return -self.negamax(opp, own, color ^ 1, h ^ ZOBRIST_SIDE, depth, -beta, -alpha, True)
+
+        best = -INFINITY
+        best_move = NO_MOVE
+        keys = ZOBRIST_KEYS[color]
+
+        for sq in ordered_moves(moves, tt_move):
+            flips = get_flips(own, opp, sq)
+            child = h ^ keys[sq] ^ flip_key(flips) ^ ZOBRIST_SIDE
+            score = -self.negamax(
+                opp ^ flips, own | flips | (1 << sq), color ^ 1, child, depth - 1, -beta, -alpha)
+            if score > best:
+                best = score
+                best_move = sq
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(h, depth, flag, best, best_move)
+        return best
@@ -0,0 +1,361 @@
+"""Headless game server for many concurrent human-vs-engine games.
+
+    python server.py serve --port 7777 --workers 4
+    python server.py bench --port 7777 --sessions 1000
+
+Every connection is one game session. The protocol is line based text;
+the server greets with "HELLO othello 1" and answers the commands:
+
+    NEW [engine] [black|white]  start a game, playing the given color
+                                (black) against engine (heuristic)
+    MOVE <square>               play a move such as f5
+    BOARD                       show the board
+    STATS                       show the server counters and latencies
+    QUIT                        close the session
+
+with these lines:
+
+    PLAYED <color> <square>     a move, "--" for a pass
+    BOARD <64 cells> <color>    the grids row by row (X black, O white,
+                                . empty) and the side to move
+    END <black> <white> <winner>
+    STATS sessions <n> games <n> moves <n> p50 <ms> p99 <ms>
+    ERROR <reason>
+    BYE
+
+After NEW and after every move of the client the server plays the
+passes and engine moves up to the next move of the client, then sends
+BOARD, and END when the game is over. Engines ("heuristic",
+"search[:seconds]", "random" as in tournament.py, with a search time of
+at most --max-time seconds) think in a bounded pool of worker processes,
+so a slow search never holds up the other sessions. The latency of a
+move is the time from a MOVE to the engine's reply; the bench command
+plays random clients against the server and reports the latencies they
+see.
+"""
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import os
+import random
+import time
+
+from bitboard import parse_square, square_name
+from gamestate import BLACK, PASS, WHITE, GameState
+from tournament import create_engine, init_worker
+
+
+COLORS = ('black', 'white')
+CELLS = 'XO.'
+ENGINES = ('heuristic', 'search', 'random')
+DEFAULT_ENGINE = 'heuristic'
+# seconds per search move: the default of SearchOpponent and the most a
+# client may ask for
+SEARCH_TIME = 0.2
+MAX_SEARCH_TIME = 1.0
+LATENCY_SAMPLES = 100000
+# pending connections, so that thousands of clients can connect at once
+BACKLOG = 4096
+
+_engines = {}
+
+
+def choose_move(name, seconds, black, white, turn):
+    """Return the move of an engine in a position. Runs in a worker,
+       which keeps one engine per (name, seconds) from parse_engine.
+    """
+    if (engine := _engines.get((name, seconds))) is None:
+        engine = _engines[name, seconds] = create_engine(name if seconds is None else f'{name}:{seconds}')
+    return engine.choose(GameState(black, white, turn))
+
+
+def format_board(state):
+    black, white = state.boards
+    cells = ''.join(
+        CELLS[BLACK] if black >> sq & 1 else CELLS[WHITE] if white >> sq & 1 else CELLS[2] for sq in range(64)
+    )
+    return f'BOARD {cells} {COLORS[state.turn]}'
+
+
+def parse_board(line):
+    """Return the GameState of a BOARD line.
+    """
+    _, cells, color = line.split()
+    black = sum(1 << sq for sq, cell in enumerate(cells) if cell == CELLS[BLACK])
+    white = sum(1 << sq for sq, cell in enumerate(cells) if cell == CELLS[WHITE])
+    return GameState(black, white, COLORS.index(color))
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, len(ordered) * p // 100)]
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def parse_engine(spec, max_time=MAX_SEARCH_TIME):
+    """Return (name, seconds) of an engine spec, seconds being None for
+       engines without a time limit. The search time must be above 0 and
+       at most max_time; it is rounded to tenths of a second, so that a
+       worker keeps few engines and transposition tables.
+    """
+    name, sep, arg = spec.partition(':')
+    if name not in ENGINES or (sep and name != 'search'):
+        raise ProtocolError(f'unknown engine {spec}')
+    if name != 'search':
+        return name, None
+
+    try:
+        seconds = float(arg) if sep else min(SEARCH_TIME, max_time)
+    except ValueError:
+        raise ProtocolError(f'bad search time {arg}')
+    if not 0 < seconds <= max_time:
+        raise ProtocolError(f'bad search time {arg}')
+    return name, max(0.1, round(seconds, 1))
+
+
+class Session:
+
+    def __init__(self):
+        self.state = None
+        self.color = BLACK
+        self.engine = (DEFAULT_ENGINE, None)
+
+
+class GameServer:
+
+    def __init__(self, workers=None, executor=None, weights=None, max_time=MAX_SEARCH_TIME):
+        self.workers = workers or os.cpu_count()
+        self.max_time = max_time
+        if executor is None:
+            initializer, initargs = (init_worker, (weights,)) if weights else (None, ())
+            executor = concurrent.futures.ProcessPoolExecutor(self.workers, initializer=initializer, initargs=initargs)
+        self.executor = executor
+        self.server = None
+        self.pending = None
+        self.connections = {}
+        self.sessions = self.games = self.moves = 0
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    async def start(self, host='127.0.0.1', port=7777, path=None):
+        # at most one engine move per worker is handed to the pool at a time
+        self.pending = asyncio.Semaphore(self.workers)
+        if path:
+            self.server = await asyncio.start_unix_server(self.handle, path, backlog=BACKLOG)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port, backlog=BACKLOG)
+        return self.server
+
+    async def close(self):
+        """Stop listening, end every session and shut the pool down.
+        """
+        self.server.close()
+        for writer in self.connections:
+            writer.close()
+        await asyncio.gather(*self.connections.values(), return_exceptions=True)
+        await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    async def send(self, writer, line):
+        writer.write(line.encode() + b'\n')
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        session = Session()
+        self.sessions += 1
+        self.connections[writer] = asyncio.current_task()
+
+        try:
+            await self.send(writer, 'HELLO othello 1')
+            while line := await reader.readline():
+                if not (words := line.decode(errors='replace').split()):
+                    continue
+                command, args = words[0].upper(), words[1:]
+                if command == 'QUIT':
+                    await self.send(writer, 'BYE')
+                    break
+                try:
+                    await self.dispatch(session, writer, command, args)
+                except ProtocolError as e:
+                    await self.send(writer, f'ERROR {e}')
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            del self.connections[writer]
+            writer.close()
+
+    async def dispatch(self, session, writer, command, args):
+        if command == 'NEW':
+            await self.new_game(session, writer, *args)
+        elif command == 'MOVE':
+            await self.move(session, writer, *args)
+        elif command == 'BOARD':
+            if session.state is None:
+                raise ProtocolError('no game')
+            await self.send(writer, format_board(session.state))
+        elif command == 'STATS':
+            await self.send(writer, self.stats())
+        else:
+            raise ProtocolError(f'unknown command {command}')
+
+    async def new_game(self, session, writer, engine=DEFAULT_ENGINE, color='black', *_):
+        if color not in COLORS:
+            raise ProtocolError(f'unknown color {color}')
+        session.engine = parse_engine(engine, self.max_time)
+        session.state = GameState()
+        session.color = COLORS.index(color)
+        self.games += 1
+        await self.advance(session, writer)
+
+    async def move(self, session, writer, name=None, *_):
+        received = time.perf_counter()
+        if (state := session.state) is None or state.is_game_over():
+            raise ProtocolError('no game')
+        if state.turn != session.color:
+            raise ProtocolError('not your turn')
+        try:
+            sq = parse_square(name)
+        except (TypeError, ValueError, IndexError):
+            raise ProtocolError(f'bad square {name}')
+        if len(name) != 2 or not 0 <= sq < 64 or not state.legal_moves() >> sq & 1:
+            raise ProtocolError(f'illegal move {name}')
+
+        state.play(sq)
+        self.moves += 1
+        await self.send(writer, f'PLAYED {COLORS[session.color]} {square_name(sq)}')
+        await self.advance(session, writer, received)
+
+    async def engine_move(self, engine, state):
+        async with self.pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, choose_move, *engine, *state.boards, state.turn)
+
+    async def advance(self, session, writer, received=None):
+        """Play the passes and engine moves up to the next move of the
+           client or the end of the game.
+        """
+        state = session.state
+
+        while not state.is_game_over():
+            if state.legal_moves():
+                if state.turn == session.color:
+                    break
+                move = await self.engine_move(session.engine, state)
+                self.moves += 1
+            else:
+                move = PASS
+            color = state.turn
+            state.play(move)
+            await self.send(writer, f'PLAYED {COLORS[color]} {"--" if move == PASS else square_name(move)}')
+
+            if received is not None and move != PASS:
+                self.latencies.append(time.perf_counter() - received)
+                received = None
+
+        await self.send(writer, format_board(state))
+        if state.is_game_over():
+            winner = state.winner()
+            await self.send(
+                writer, f'END {state.count(BLACK)} {state.count(WHITE)} {"draw" if winner is None else COLORS[winner]}')
+
+    def stats(self):
+        latencies = list(self.latencies)
+        return f'STATS sessions {self.sessions} games {self.games} moves {self.moves} ' \
+            f'p50 {percentile(latencies, 50) * 1000:.1f} p99 {percentile(latencies, 99) * 1000:.1f}'
+
+
+async def connect(host='127.0.0.1', port=7777, path=None):
+    if path:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+
+async def play_session(reader, writer, engine='random', color='black', rand=random):
+    """Play one game with random moves over an open connection. Return
+       the END line and the seconds from every move to the engine's reply.
+    """
+    own = COLORS.index(color)
+    latencies = []
+    sent = None
+
+    await reader.readline()
+    writer.write(f'NEW {engine} {color}\n'.encode())
+
+    while line := (await reader.readline()).decode():
+        words = line.split()
+        if words[0] == 'ERROR':
+            raise ProtocolError(line.strip())
+        if words[0] == 'END':
+            break
+        if words[0] == 'PLAYED' and words[1] != color and sent is not None:
+            latencies.append(time.perf_counter() - sent)
+            sent = None
+        elif words[0] == 'BOARD':
+            state = parse_board(line)
+            if state.turn == own and (moves := state.legal_moves()):
+                move = rand.choice([sq for sq in range(64) if moves >> sq & 1])
+                writer.write(f'MOVE {square_name(move)}\n'.encode())
+                sent = time.perf_counter()
+
+    writer.write(b'QUIT\n')
+    await reader.readline()
+    writer.close()
+    return line.strip(), latencies
+
+
+async def bench(sessions, engine='random', host='127.0.0.1', port=7777, path=None, seed=0):
+    """Play sessions random clients at once and return (games, moves,
+       latencies, seconds).
+    """
+    async def client(number):
+        reader, writer = await connect(host, port, path)
+        return await play_session(reader, writer, engine, rand=random.Random(seed + number))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client(i) for i in range(sessions)))
+    latencies = [latency for _, session_latencies in results for latency in session_latencies]
+    return len(results), len(latencies), latencies, time.perf_counter() - start
+
+
+async def serve(args):
+    server = GameServer(args.workers, weights=args.weights, max_time=args.max_time)
+    await server.start(args.host, args.port, args.unix)
+    print(f'serving on {args.unix or f"{args.host}:{args.port}"} with {server.workers} workers')
+    async with server.server:
+        await server.server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve concurrent games over a line protocol')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name, description in (('serve', 'run the server'), ('bench', 'play random clients against a server')):
+        command = commands.add_parser(name, help=description)
+        command.add_argument('--host', default='127.0.0.1', help='address to listen on or connect to')
+        command.add_argument('--port', type=int, default=7777, help='TCP port')
+        command.add_argument('--unix', help='Unix socket path to use instead of TCP')
+        if name == 'serve':
+            command.add_argument('--workers', type=int, default=None, help='engine worker processes (all cores)')
+            command.add_argument('--weights', help='evaluation weight file fitted with train.py')
+            command.add_argument('--max-time', type=float, default=MAX_SEARCH_TIME,
+                                 help='longest search time in seconds a client may ask for')
+        else:
+            command.add_argument('--sessions', type=int, default=100, help='concurrent sessions')
+            command.add_argument('--engine', default='random', help='engine the sessions play against')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        asyncio.run(serve(args))
+    else:
+        games, moves, latencies, elapsed = asyncio.run(
+            bench(args.sessions, args.engine, args.host, args.port, args.unix))
+        print(f'{games} games, {moves} moves in {elapsed:.1f}s ({moves / elapsed:.0f} moves/s)')
+        print(f'move latency p50 {percentile(latencies, 50) * 1000:.1f} ms, '
+              f'p99 {percentile(latencies, 99) * 1000:.1f} ms')
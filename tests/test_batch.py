@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from unittest import TestCase, main
+
+from batch import evaluate_batch, to_squares, unpack_bitboards
+from bitboard import square
+from evaluation import evaluate
+
+
+class TestUtils:
+
+    def get_bitboard(self, positions):
+        bb = 0
+        for r, c in positions:
+            bb |= 1 << square(r, c)
+        return bb
+
+    def get_random_boards(self, n, seed):
+        rand = random.Random(seed)
+        boards = []
+        for _ in range(n):
+            own = rand.getrandbits(64) & rand.getrandbits(64)
+            opp = rand.getrandbits(64) & rand.getrandbits(64) & ~own
+            boards.append((own, opp))
+        return boards
+
+
+class EvaluateBatchTestCase(TestCase, TestUtils):
+    """Tests for evaluate_batch function
+    """
+
+    def test_unpack_bitboards(self):
+        own = self.get_bitboard([(0, 0), (3, 4)])
+        opp = self.get_bitboard([(7, 7)])
+        result = unpack_bitboards(np.array([(own, opp)], dtype=np.uint64))
+        expect = np.zeros((1, 64), dtype=np.int8)
+        expect[0, [0, 28]] = 1
+        expect[0, 63] = -1
+        np.testing.assert_array_equal(result, expect)
+
+    def test_to_squares_error(self):
+        for shape in [(3, 64), (8, 8), (2, 3, 2)]:
+            with self.subTest(shape):
+                with self.assertRaises(ValueError):
+                    to_squares(np.zeros(shape))
+
+    def test_evaluate_bitboards(self):
+        boards = self.get_random_boards(500, 1)
+        result = evaluate_batch(np.array(boards, dtype=np.uint64))
+        expect = [evaluate(own, opp) for own, opp in boards]
+        self.assertEqual(result.tolist(), expect)
+
+    def test_evaluate_grids(self):
+        boards = self.get_random_boards(100, 2)
+        grids = unpack_bitboards(np.array(boards, dtype=np.uint64)).reshape(-1, 8, 8)
+        result = evaluate_batch(grids)
+        expect = [evaluate(own, opp) for own, opp in boards]
+        self.assertEqual(result.tolist(), expect)
+
+    def test_evaluate_known(self):
+        white = self.get_bitboard([(0, 0), (0, 1), (0, 2), (1, 0), (2, 0)])
+        black = self.get_bitboard([(0, 5), (1, 2), (1, 3), (1, 4), (2, 2), (2, 3), (3, 2), (3, 3)])
+        result = evaluate_batch(np.array([(white, black), (black, white)], dtype=np.uint64))
+        self.assertEqual(result.tolist(), [34, -34])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+from bitboard import START_BLACK, START_WHITE, get_flips, get_moves, \
+    iter_squares, make_move, neighbours, popcount, position, square, to_bitboards
+
+
+class TestUtils:
+
+    def get_bitboard(self, positions):
+        bb = 0
+        for r, c in positions:
+            bb |= 1 << square(r, c)
+        return bb
+
+    def naive_flips(self, own, opp, row, col):
+        flips = 0
+        for i in range(-1, 2):
+            for j in range(-1, 2):
+                if i == 0 and j == 0:
+                    continue
+                line = 0
+                r, c = row + i, col + j
+                while 0 <= r < 8 and 0 <= c < 8 and opp & (1 << square(r, c)):
+                    line |= 1 << square(r, c)
+                    r, c = r + i, c + j
+                if 0 <= r < 8 and 0 <= c < 8 and own & (1 << square(r, c)):
+                    flips |= line
+        return flips
+
+
+class BitboardTestCase(TestCase, TestUtils):
+    """Tests for bitboard functions
+    """
+
+    def setUp(self):
+        black_pos = [(2, 2), (3, 3), (3, 4), (4, 4)]
+        white_pos = [(4, 3), (5, 3), (5, 4), (5, 5)]
+        self.black = self.get_bitboard(black_pos)
+        self.white = self.get_bitboard(white_pos)
+
+    def test_square_position(self):
+        tests = [[(0, 0), 0], [(3, 4), 28], [(7, 7), 63], [(5, 2), 42]]
+        for (row, col), expect in tests:
+            with self.subTest((row, col)):
+                self.assertEqual(square(row, col), expect)
+                self.assertEqual(position(expect), (row, col))
+
+    def test_popcount(self):
+        tests = [[0, 0], [START_BLACK, 2], [0xFFFFFFFFFFFFFFFF, 64], [0b1011, 3]]
+        for bb, expect in tests:
+            with self.subTest(bb):
+                self.assertEqual(popcount(bb), expect)
+
+    def test_neighbours(self):
+        tests = [
+            [[(0, 0)], [(0, 1), (1, 0), (1, 1)]],
+            [[(0, 7)], [(0, 6), (1, 6), (1, 7)]],
+            [[(7, 0)], [(6, 0), (6, 1), (7, 1)]],
+            [[(3, 3)], [(2, 2), (2, 3), (2, 4), (3, 2), (3, 4), (4, 2), (4, 3), (4, 4)]],
+            [[(0, 0), (0, 1)], [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)]],
+        ]
+        for positions, expect in tests:
+            with self.subTest(positions):
+                self.assertEqual(neighbours(self.get_bitboard(positions)), self.get_bitboard(expect))
+
+    def test_iter_squares(self):
+        result = [sq for sq in iter_squares(self.black)]
+        self.assertEqual(result, [18, 27, 28, 36])
+
+    def test_to_bitboards(self):
+        disks = [[None for _ in range(8)] for _ in range(8)]
+        disks[0][0] = Disk(0)
+        disks[7][7] = Disk(1)
+        disks[3][4] = Disk(0)
+        self.assertEqual(to_bitboards(disks, 0), (1 | 1 << 28, 1 << 63))
+        self.assertEqual(to_bitboards(disks, 1), (1 << 63, 1 | 1 << 28))
+
+    def test_get_moves_start(self):
+        moves = get_moves(START_BLACK, START_WHITE)
+        expect = self.get_bitboard([(2, 3), (3, 2), (4, 5), (5, 4)])
+        self.assertEqual(moves, expect)
+
+    def test_get_moves(self):
+        tests = [
+            [(self.black, self.white), [(4, 2), (5, 2), (6, 2), (6, 3), (6, 4), (6, 6)]],
+            [(self.white, self.black), [(1, 1), (2, 3), (2, 4), (2, 5), (3, 5), (4, 5)]]
+        ]
+        for (own, opp), expect in tests:
+            with self.subTest(expect):
+                result = [position(sq) for sq in iter_squares(get_moves(own, opp))]
+                self.assertEqual(result, expect)
+
+    def test_get_moves_no_wrap(self):
+        own = self.get_bitboard([(0, 7)])
+        opp = self.get_bitboard([(1, 0)])
+        self.assertEqual(get_moves(own, opp), 0)
+
+    def test_get_flips(self):
+        tests = [
+            [(self.black, self.white, square(6, 3)), [(4, 3), (5, 3)]],
+            [(self.white, self.black, square(1, 1)), [(2, 2), (3, 3), (4, 4)]],
+            [(self.white, self.black, square(2, 3)), [(3, 3)]],
+            [(self.white, self.black, square(0, 0)), []]
+        ]
+        for test, expect in tests:
+            with self.subTest(test):
+                result = [position(sq) for sq in iter_squares(get_flips(*test))]
+                self.assertEqual(result, expect)
+
+    def test_make_move(self):
+        own, opp = make_move(START_BLACK, START_WHITE, square(2, 3))
+        self.assertEqual(own, self.get_bitboard([(2, 3), (3, 3), (3, 4), (4, 3)]))
+        self.assertEqual(opp, self.get_bitboard([(4, 4)]))
+
+    def test_random_games(self):
+        rand = random.Random(1)
+
+        for _ in range(20):
+            own, opp = START_BLACK, START_WHITE
+            passes = 0
+            while passes < 2:
+                empties = [sq for sq in range(64) if not (own | opp) & (1 << sq)]
+                expect = [sq for sq in empties if self.naive_flips(own, opp, *position(sq))]
+                moves = get_moves(own, opp)
+                self.assertEqual([sq for sq in iter_squares(moves)], expect)
+                for sq in expect:
+                    self.assertEqual(get_flips(own, opp, sq), self.naive_flips(own, opp, *position(sq)))
+                if not expect:
+                    passes += 1
+                    own, opp = opp, own
+                    continue
+                passes = 0
+                own, opp = make_move(own, opp, rand.choice(expect))
+                own, opp = opp, own
+
+
+class Disk:
+
+    def __init__(self, color):
+        self.color = color
+
+
+if __name__ == '__main__':
+    main()
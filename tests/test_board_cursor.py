@@ -6,7 +6,7 @@ from pathlib import Path
 from pygame.locals import *
 from unittest import TestCase, main, mock
 
-from othello import Board, Othello, Piece, Status, Images, Point, Cursor, Button
+from othello import Board, Othello, Piece, Status, Images, Point, Cursor, Button, ImageCache, TextCache
 
 
 class BoardTestCase(TestCase):
@@ -14,6 +14,7 @@ class BoardTestCase(TestCase):
     """
 
     def setUp(self):
+        TextCache.clear()
         mock.patch('othello.Button').start()
         self.mock_disk_class = mock.patch('othello.Disk').start()
 
@@ -104,6 +105,17 @@ class BoardTestCase(TestCase):
         self.assertEqual(
             (self.board.black_score, self.board.white_score), ('20', '15'))
 
+    def test_draw_score_display(self):
+        self.board.score_font.render.side_effect = ['20', '15']
+        self.board.set_score(20, 15)
+
+        with mock.patch('othello.pygame.draw.rect'):
+            for _ in range(2):
+                self.board.draw_score_display(self.mock_screen)
+                self.mock_screen.blit.assert_has_calls(
+                    [mock.call('20', (140, 380)), mock.call('15', (140, 445))])
+        self.assertEqual(self.board.score_font.render.call_count, 7)
+
     def test_draw_grids(self):
         calls = []
         for i in range(9):
@@ -128,6 +140,45 @@ class BoardTestCase(TestCase):
                 self.assertEqual(mock_circle.call_args_list, calls)
                 mock_circle.reset_mock()
 
+    def test_draw(self):
+        with mock.patch('othello.Board.draw_background') as mock_background, \
+                mock.patch('othello.Board.draw_button'), \
+                mock.patch('othello.Board.draw_grids') as mock_grids, \
+                mock.patch('othello.Board.update_layer') as mock_update:
+            for _ in range(2):
+                self.board.draw(self.mock_screen)
+            mock_background.assert_called_once_with(self.mock_screen.copy.return_value)
+            mock_grids.assert_called_once()
+            self.assertEqual(mock_update.call_count, 2)
+            self.mock_screen.blit.assert_called_with(self.board.layer, (0, 0))
+
+            self.board.invalidate()
+            self.board.draw(self.mock_screen)
+            self.assertEqual(mock_background.call_count, 2)
+
+    def test_update_layer(self):
+        with mock.patch('othello.pygame.draw.rect'), \
+                mock.patch('othello.pygame.draw.line'), \
+                mock.patch('othello.Board.draw_turn_display') as mock_turn, \
+                mock.patch('othello.Board.draw_score_display') as mock_score, \
+                mock.patch('othello.Board.draw_players_color') as mock_color:
+            self.board.regions = tuple((region, m) for (region, _), m in zip(
+                self.board.regions, (mock_turn, mock_score, mock_color)))
+            self.board.create_layer(self.mock_screen)
+            layer = self.board.layer
+            self.board.update_layer()
+            for m in (mock_turn, mock_score, mock_color):
+                m.assert_called_once_with(layer)
+                m.reset_mock()
+
+            layer.fill.reset_mock()
+            self.board.set_score(3, 2)
+            self.board.update_layer()
+            mock_score.assert_called_once_with(layer)
+            layer.fill.assert_called_once_with((221, 221, 221), self.board.regions[1][0])
+            mock_turn.assert_not_called()
+            mock_color.assert_not_called()
+
     def test_find_position(self):
         tests = [
             [(392, 93), (0, 2)],
@@ -154,6 +205,28 @@ class BoardTestCase(TestCase):
                 center = self.board.grid_center(*test)
                 self.assertEqual(center, expect)
 
+    def test_legal_moves(self):
+        self.board.setup()
+        with mock.patch('othello.get_moves') as mock_moves:
+            mock_moves.return_value = 0x0000102004080000
+            for _ in range(2):
+                self.assertEqual(self.board.legal_moves(Piece.BLACK), 0x0000102004080000)
+                self.assertEqual(self.board.legal_moves(Piece.BLACK.value), 0x0000102004080000)
+            mock_moves.assert_called_once_with(self.board.state.black, self.board.state.white)
+
+            self.board.legal_moves(Piece.WHITE)
+            self.assertEqual(mock_moves.call_count, 2)
+            self.board.place(2, 3, Piece.BLACK)
+            self.board.legal_moves(Piece.BLACK)
+            self.assertEqual(mock_moves.call_count, 3)
+
+    def test_bitboards(self):
+        self.board.setup()
+        self.board.place(2, 3, Piece.BLACK)
+        black, white = self.board.state.black, self.board.state.white
+        self.assertEqual(self.board.bitboards(Piece.BLACK), (black, white))
+        self.assertEqual(self.board.bitboards(Piece.WHITE.value), (white, black))
+
     def test_place(self):
         tests = [
             (5, 5, Piece.BLACK),
@@ -175,6 +248,7 @@ class BoardTestCase(TestCase):
         for row, col, color in tests:
             with self.subTest():
                 self.assertEqual(self.disks[row][col].color, color)
+                self.assertEqual(self.board.state.get(row, col), color.value)
 
     def test_reverse(self):
         tests = [
@@ -200,6 +274,7 @@ class CursorTestCase(TestCase):
     """
 
     def setUp(self):
+        ImageCache.clear()
         Cursor.containers = mock.MagicMock()
         mock.patch('othello.pygame.image.load').start()
         mock.patch('othello.pygame.sprite.Sprite').start()
@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+from bitboard import parse_square, square_name
+from book import RECORD, OpeningBook, build_book, parse_game, read_games, replay
+from gamestate import BLACK, WHITE, PASS, GameState
+from record import GameRecord, RecordWriter
+
+
+class TestUtils:
+
+    def get_moves(self, notation):
+        return [parse_square(notation[i: i + 2]) for i in range(0, len(notation), 2)]
+
+
+class BuildBookTestCase(TestCase, TestUtils):
+    """Tests for build_book function
+    """
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, 'book.bin')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_square_name(self):
+        tests = [['a1', 0], ['h1', 7], ['d3', 19], ['h8', 63]]
+        for name, sq in tests:
+            with self.subTest(name):
+                self.assertEqual(square_name(sq), name)
+                self.assertEqual(parse_square(name), sq)
+
+    def test_parse_game(self):
+        self.assertEqual(parse_game('f5d6c3 -4\n'), (self.get_moves('f5d6c3'), -4))
+
+    def test_read_games(self):
+        text = os.path.join(self.tempdir.name, 'games.txt')
+        with open(text, 'w') as f:
+            f.write('f5d6c3 -4\n\nf5f6 10\n')
+        records = os.path.join(self.tempdir.name, 'games.ogr')
+        with RecordWriter(records) as writer:
+            writer.write(GameRecord('a', 'b', bytes(self.get_moves('f5d6c3')), 30, 34))
+            writer.write(GameRecord('a', 'b', bytes(self.get_moves('f5f6')), 37, 27))
+
+        for path in (text, records):
+            with self.subTest(path):
+                games = [(list(moves), diff) for moves, diff in read_games(path)]
+                self.assertEqual(games, [(self.get_moves('f5d6c3'), -4), (self.get_moves('f5f6'), 10)])
+
+    def test_replay_pass(self):
+        # White has no legal moves, so a pass is played before black's move.
+        state = GameState(0b11, 0b100, WHITE)
+        result = [(s.turn, move) for s, move in replay([3], state)]
+        self.assertEqual(result, [(BLACK, 3)])
+        self.assertEqual(state.history[0][0], PASS)
+        self.assertEqual(state.black, 0b1111)
+
+    def test_build_book(self):
+        games = [
+            (self.get_moves('f5d6c3'), 10),
+            (self.get_moves('f5d6c4'), -6),
+            (self.get_moves('d3c5'), 20),
+        ]
+        count = build_book(games, self.path, plies=2)
+        self.assertEqual(count, 4)
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        records = [RECORD.unpack_from(data, i) for i in range(0, len(data), RECORD.size)]
+        self.assertEqual(records, sorted(records))
+
+        with OpeningBook(self.path) as book:
+            self.assertEqual(len(book), 4)
+            start = GameState()
+            self.assertEqual(sorted(book.lookup(start.hash)), [(parse_square('d3'), 20), (parse_square('f5'), 2)])
+            self.assertEqual(book.best_move(start), parse_square('d3'))
+
+            start.play(parse_square('f5'))
+            self.assertEqual(book.lookup(start.hash), [(parse_square('d6'), -2)])
+            self.assertEqual(book.best_move(start), parse_square('d6'))
+
+            start.play(parse_square('d6'))
+            self.assertEqual(book.best_move(start), None)
+
+    def test_min_count(self):
+        games = [
+            (self.get_moves('f5d6'), 10),
+            (self.get_moves('f5f6'), 4),
+            (self.get_moves('d3'), 20),
+        ]
+        count = build_book(games, self.path, plies=1, min_count=2)
+        self.assertEqual(count, 1)
+
+        with OpeningBook(self.path) as book:
+            self.assertEqual(book.best_move(GameState()), parse_square('f5'))
+
+    def test_empty_book(self):
+        build_book([], self.path)
+        with OpeningBook(self.path) as book:
+            self.assertEqual(len(book), 0)
+            self.assertEqual(book.best_move(GameState()), None)
+
+
+if __name__ == '__main__':
+    main()
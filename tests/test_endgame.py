@@ -0,0 +1,117 @@
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+from bitboard import get_flips, get_moves, iter_squares, popcount, square
+from endgame import EndgameSolver, SolveResult, parity_mask, parity_moves
+from gamestate import BLACK, WHITE, PASS, GameState
+from search import TimeUp
+
+
+class TestUtils:
+
+    def get_bitboard(self, positions):
+        bb = 0
+        for r, c in positions:
+            bb |= 1 << square(r, c)
+        return bb
+
+    def get_position(self, empties, seed):
+        rand = random.Random(seed)
+        state = GameState()
+
+        while popcount(state.empties) > empties:
+            if state.is_game_over():
+                state = GameState()
+            if moves := [sq for sq in iter_squares(state.legal_moves())]:
+                state.play(rand.choice(moves))
+            else:
+                state.play(PASS)
+        return state
+
+    def minimax(self, own, opp, passed=False):
+        if not (moves := get_moves(own, opp)):
+            if passed:
+                return popcount(own) - popcount(opp)
+            return -self.minimax(opp, own, True)
+
+        best = -65
+        for sq in iter_squares(moves):
+            flips = get_flips(own, opp, sq)
+            best = max(best, -self.minimax(opp ^ flips, own | flips | (1 << sq)))
+        return best
+
+
+class EndgameSolverTestCase(TestCase, TestUtils):
+    """Tests for EndgameSolver class
+    """
+
+    def test_parity_mask(self):
+        empties = self.get_bitboard([(0, 0), (0, 1), (2, 6), (7, 7), (6, 6), (5, 5)])
+        expect = self.get_bitboard([(2, 6), (7, 7), (6, 6), (5, 5)])
+        self.assertEqual(parity_mask(empties), expect)
+
+    def test_parity_moves(self):
+        empties = self.get_bitboard([(0, 0), (0, 1), (2, 6), (7, 7)])
+        moves = self.get_bitboard([(0, 0), (2, 6), (7, 7)])
+        self.assertEqual(parity_moves(moves, empties), [square(2, 6), square(7, 7), square(0, 0)])
+
+    def test_last_move(self):
+        solver = EndgameSolver()
+        own = self.get_bitboard([(0, 0)])
+        opp = self.get_bitboard([(0, 1), (0, 2)])
+        empty = self.get_bitboard([(0, 3)])
+        tests = [
+            [(own, opp, empty), 4],
+            [(opp, own, empty), -4],
+            [(own, opp, self.get_bitboard([(5, 5)])), -1]
+        ]
+        for test, expect in tests:
+            with self.subTest(test):
+                self.assertEqual(solver.last_move(*test), expect)
+
+    def test_solve(self):
+        solver = EndgameSolver(shallow_empties=4)
+
+        for seed in range(6):
+            state = self.get_position(8, seed)
+            with self.subTest(seed):
+                result = solver.solve(state)
+                expect = self.minimax(state.own, state.opp)
+                self.assertEqual(result.score, expect)
+                if result.move != PASS:
+                    state.play(result.move)
+                    self.assertEqual(-self.minimax(state.own, state.opp), expect)
+
+    def test_solve_pass(self):
+        state = GameState(self.get_bitboard([(0, 0), (0, 1)]), self.get_bitboard([(0, 2)]), WHITE)
+        result = EndgameSolver().solve(state)
+        self.assertEqual(result.move, PASS)
+        self.assertEqual(result.score, -4)
+
+    def test_solve_game_over(self):
+        state = GameState(0xFFFFFFFF, 0xFFFFFFFF00000000)
+        result = EndgameSolver().solve(state)
+        self.assertEqual(result, SolveResult(PASS, 0, 2))
+
+    def test_time_limit(self):
+        solver = EndgameSolver(time_limit=0)
+        solver.check_interval = 1
+        with self.assertRaises(TimeUp):
+            solver.solve(self.get_position(14, 0))
+
+    def test_time_limit_shallow_nodes(self):
+        # Most nodes are counted in the shallow search, so the count skips
+        # over multiples of check_interval.
+        solver = EndgameSolver(time_limit=0)
+        solver.check_interval = 64
+        with self.assertRaises(TimeUp):
+            solver.solve(self.get_position(12, 0))
+        self.assertTrue(solver.nodes < 64 * 8)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,8 +6,13 @@ from pathlib import Path
 from pygame.locals import *
 from unittest import TestCase, main, mock
 
+from bitboard import get_moves, iter_squares, make_move, position, square, to_bitboards
+from endgame import SolveResult
+from evaluation import evaluate, mobility_score
+from gamestate import PASS, GameState
 from othello import Board, GameLogic, Piece, Disk, Players, \
-    Player, Images, Point, Opponent, Candidate
+    Player, Images, Point, Opponent, Candidate, SearchOpponent
+from search import SearchResult, TimeUp
 
 
 class TestUtils:
@@ -49,9 +54,8 @@ class TestUtils:
         for cand in cands:
             yield cand
 
-    def get_placeables(self, positions):
-        for pos in positions:
-            yield pos
+    def get_moves(self, positions):
+        return sum(1 << square(r, c) for r, c in positions)
 
 
 class GameLogicTestCase(TestCase, TestUtils):
@@ -75,28 +79,6 @@ class GameLogicTestCase(TestCase, TestUtils):
             self.get_disk_instance(Piece.WHITE)
         )
 
-    def test_reverse_check(self):
-        tests = [
-            [(self.piece_disks, Piece.BLACK.value, 5, 3, -1, 0), 2],
-            [(self.piece_disks, Piece.BLACK.value, 5, 3, -1, -1), None],
-            [(self.piece_disks, Piece.BLACK.value, 5, 3, -1, 1), 1],
-            [(self.piece_disks, Piece.WHITE.value, 3, 4, 1, 0), 2],
-            [(self.piece_disks, Piece.WHITE.value, 3, 4, 1, -1), 1],
-            [(self.piece_disks, Piece.WHITE.value, 5, 5, 0, -1), 0],
-            [(self.piece_disks, Piece.WHITE.value, 2, 2, -1, 0), None],
-            [(self.sprite_disks, Piece.BLACK, 5, 3, -1, 0), 2],
-            [(self.sprite_disks, Piece.BLACK, 5, 3, -1, -1), None],
-            [(self.sprite_disks, Piece.BLACK, 5, 3, -1, 1), 1],
-            [(self.sprite_disks, Piece.WHITE, 3, 4, 1, 0), 2],
-            [(self.sprite_disks, Piece.WHITE, 3, 4, 1, -1), 1],
-            [(self.sprite_disks, Piece.WHITE, 5, 5, 0, -1), 0],
-            [(self.sprite_disks, Piece.WHITE, 2, 2, -1, 0), None]
-        ]
-        for test, expect in tests:
-            with self.subTest(test):
-                result = self.game_logic.reverse_check(*test)
-                self.assertEqual(result, expect)
-
     def test_is_placeable(self):
         tests = [
             [(0, 2, self.piece_disks, Piece.BLACK.value), False],
@@ -117,17 +99,12 @@ class GameLogicTestCase(TestCase, TestUtils):
                 result = self.game_logic.is_placeable(*test)
                 self.assertEqual(result, expect)
 
-    def test_get_reversibles(self):
-        expect = [(3, 4), (4, 3), (5, 2)]
-        result = [pos for pos in self.game_logic.get_reversibles(3, 4, 1, -1, 3)]
-        self.assertEqual(result, expect)
-
     def test_find_reversibles(self):
         tests = [
-            [(6, 3, self.piece_disks, Piece.BLACK.value), [(5, 3), (4, 3)]],
+            [(6, 3, self.piece_disks, Piece.BLACK.value), [(4, 3), (5, 3)]],
             [(1, 1, self.piece_disks, Piece.WHITE.value), [(2, 2), (3, 3), (4, 4)]],
             [(2, 3, self.piece_disks, Piece.WHITE.value), [(3, 3)]],
-            [(6, 3, self.sprite_disks, Piece.BLACK), [(5, 3), (4, 3)]],
+            [(6, 3, self.sprite_disks, Piece.BLACK), [(4, 3), (5, 3)]],
             [(1, 1, self.sprite_disks, Piece.WHITE), [(2, 2), (3, 3), (4, 4)]],
             [(2, 3, self.sprite_disks, Piece.WHITE), [(3, 3)]]
         ]
@@ -240,12 +217,43 @@ class PlayerTestCase(PlayerCommon):
         super().setUp()
         self.player = Player(self.mock_board, Piece.BLACK)
 
+    def test_bitboards(self):
+        self.mock_board.bitboards.return_value = (1, 2)
+        self.assertEqual(self.player.bitboards(self.disks, Piece.BLACK), (1, 2))
+        self.mock_board.bitboards.assert_called_once_with(Piece.BLACK)
+
+        disks = [row[:] for row in self.disks]
+        self.assertEqual(self.player.bitboards(disks, Piece.BLACK), to_bitboards(disks, Piece.BLACK))
+        self.mock_board.bitboards.assert_called_once()
+
+    def test_is_placeable_board(self):
+        self.mock_board.legal_moves.return_value = get_moves(*to_bitboards(self.disks, Piece.BLACK))
+        tests = [[(6, 3), True], [(0, 2), False], [(3, 3), False]]
+
+        for pos, expect in tests:
+            with self.subTest(pos):
+                self.assertEqual(self.player.is_placeable(*pos, self.disks, Piece.BLACK), expect)
+        self.mock_board.legal_moves.assert_called_with(Piece.BLACK)
+
+        disks = [row[:] for row in self.disks]
+        self.assertTrue(self.player.is_placeable(6, 3, disks, Piece.BLACK))
+        self.assertEqual(self.mock_board.legal_moves.call_count, 2)
+
+    def test_legal_moves(self):
+        self.mock_board.legal_moves.return_value = 0b100
+        self.assertEqual(self.player.legal_moves(self.disks, Piece.BLACK), 0b100)
+        self.mock_board.legal_moves.assert_called_once_with(Piece.BLACK)
+
+        disks = [row[:] for row in self.disks]
+        self.assertEqual(self.player.legal_moves(disks, Piece.BLACK), 0x5c040400000000)
+        self.mock_board.legal_moves.assert_called_once()
+
     def test_place_true(self):
         pt = Point(397, 512)
         pos = (6, 1)
         self.mock_board.find_position.return_value = pos
 
-        with mock.patch('othello.GameLogic.is_placeable') as mock_placeable, \
+        with mock.patch('othello.Players.is_placeable') as mock_placeable, \
                 mock.patch('othello.Players.click') as mock_click:
             mock_placeable.return_value = True
 
@@ -260,7 +268,7 @@ class PlayerTestCase(PlayerCommon):
         pos = (6, 1)
         self.mock_board.find_position.return_value = pos
 
-        with mock.patch('othello.GameLogic.is_placeable') as mock_placeable, \
+        with mock.patch('othello.Players.is_placeable') as mock_placeable, \
                 mock.patch('othello.Players.click') as mock_click:
             mock_placeable.return_value = False
 
@@ -277,134 +285,46 @@ class OpponentTestCase(PlayerCommon):
 
     def setUp(self):
         super().setUp()
+        self.mock_board.state = GameState(*to_bitboards(self.disks, Piece.BLACK))
         self.opponent = Opponent(self.mock_board, Piece.WHITE)
 
-    def test_get_placeables(self):
-        black_pos = [(2, 2), (3, 3), (3, 4), (4, 4)]
-        white_pos = [(4, 3), (5, 3), (5, 4), (5, 5)]
-        disks = self.get_disks(black_pos, white_pos, Piece.BLACK, Piece.WHITE)
-        expects = [(1, 1), (2, 3), (2, 4), (2, 5), (3, 5), (4, 5)]
-        result = [pos for pos in self.opponent.get_placeables(disks, Piece.WHITE)]
-        self.assertEqual(result, expects)
-
-    def test_find_corners(self):
-        grids = ((0, 3), (0, 7), (5, 6), (7, 0), (7, 1))
-        expect = (0, 7)
-        result = self.opponent.find_corners(grids)
-        self.assertEqual(result, expect)
-
-    def test_counter_corners(self):
-        black_pos = [(7, 7)]
-        white_pos = [(0, 7), (7, 0), (0, 0)]
-        disks = self.get_disks(black_pos, white_pos, Piece.BLACK, Piece.WHITE)
-
-        tests = [
-            [Piece.BLACK, (3, 1)],
-            [Piece.WHITE, (1, 3)]
-        ]
-        for color, expect in tests:
-            with self.subTest(color):
-                self.opponent.color = color
-                result = self.opponent.counter(disks, self.opponent._corners)
-                self.assertEqual(result, expect)
-
-    def test_counter_non_corners(self):
-        black_pos = [(7, 7), (1, 0), (3, 2), (5, 3)]
-        white_pos = [(0, 7), (7, 6), (4, 3)]
-        disks = self.get_disks(black_pos, white_pos, Piece.BLACK, Piece.WHITE)
-
-        tests = [
-            [Piece.BLACK, (2, 3)],
-            [Piece.WHITE, (3, 2)]
-        ]
-        for color, expect in tests:
-            with self.subTest(color):
-                self.opponent.color = color
-                result = self.opponent.counter(disks, self.opponent._non_corners)
-                self.assertEqual(result, expect)
-
-    def test_counter_around_corners(self):
-        black_pos = [(1, 0), (3, 2), (1, 7)]
-        white_pos = [(0, 7), (7, 6), (6, 6), (6, 7), (4, 3)]
-        disks = self.get_disks(black_pos, white_pos, Piece.BLACK, Piece.WHITE)
-
-        tests = [
-            [Piece.BLACK, (3, 1)],
-            [Piece.WHITE, (1, 3)]
-        ]
-        for color, expect in tests:
-            with self.subTest(color):
-                self.opponent.color = color
-                corners = [None, Piece.WHITE, None, None]
-                result = self.opponent.counter(
-                    disks, lambda: self.opponent._around_corners(corners))
-                self.assertEqual(result, expect)
-
-    def test_counter_sides(self):
-        black_pos = [(1, 0), (3, 2), (1, 7), (0, 2), (0, 3), (4, 0)]
-        white_pos = [(0, 7), (7, 6), (6, 6), (4, 3), (7, 4), (4, 7)]
-        disks = self.get_disks(black_pos, white_pos, Piece.BLACK, Piece.WHITE)
-
-        tests = [
-            [Piece.BLACK, (2, 3)],
-            [Piece.WHITE, (3, 2)]
-        ]
-        for color, expect in tests:
-            with self.subTest(color):
-                self.opponent.color = color
-                result = self.opponent.counter(disks, self.opponent._sides)
-                self.assertEqual(result, expect)
-
-    def test_copy_currnet_board(self):
-        result = self.opponent.copy_current_board()
-
-        for r in range(8):
-            for c in range(8):
-                with self.subTest((r, c)):
-                    if item := self.opponent.board.disks[r][c]:
-                        self.assertEqual(item.color, result[r][c])
-                    else:
-                        self.assertTrue(result[r][c] is None)
-
-    def test_simulate(self):
+    def test_count_replies(self):
         white_pos = [(0, 4), (1, 4), (2, 1), (2, 2), (2, 3), (2, 4), (2, 5), (2, 6), (4, 2), (5, 1)]
         black_pos = [(3, 2), (3, 3), (3, 4), (4, 3), (4, 4), (4, 5), (5, 5), (6, 5)]
         disks = self.get_disks(black_pos, white_pos, Piece.BLACK, Piece.WHITE)
-        tests = [Piece.BLACK, Piece.WHITE]
-        expects = [(0, 4, 1), (0, 1, 0)]
+        black, white = to_bitboards(disks, Piece.BLACK.value)
+        tests = [[(black, white), (0, 4, 1)], [(white, black), (0, 1, 0)]]
 
-        for test, expect in zip(tests, expects):
-            with self.subTest():
-                result = self.opponent.simulate(disks, test)
-                self.assertEqual(result, expect)
+        for test, expect in tests:
+            with self.subTest(test):
+                self.assertEqual(self.opponent.count_replies(*test), expect)
 
     def test_evaluate(self):
         white_pos = [(0, 0), (0, 1), (0, 2), (1, 0), (2, 0)]
         black_pos = [(0, 5), (1, 2), (1, 3), (1, 4), (2, 2), (2, 3), (3, 2), (3, 3)]
         disks = self.get_disks(black_pos, white_pos, Piece.BLACK, Piece.WHITE)
-        result = self.opponent.evaluate(disks)
+        result = self.opponent.evaluate(*to_bitboards(disks, Piece.WHITE.value))
         self.assertEqual(result, 34)
 
     def test_find_best_move(self):
-        grids = [(2, 4), (4, 1)]
-        disks = self.get_disks([], [])
-        expect = [
-            Candidate(evaluation=10, row=2, col=4, corners=1, arounds=2, sides=3),
-            Candidate(evaluation=20, row=4, col=1, corners=4, arounds=5, sides=6)
-        ]
-
-        def find_reversibles(li):
-            for r, c in li:
-                yield (r, c)
-
-        with mock.patch('othello.GameLogic.find_reversibles') as mock_find, \
-                mock.patch('othello.Opponent.evaluate') as mock_evaluate, \
-                mock.patch('othello.Opponent.simulate') as mock_simulate:
-            mock_find.side_effect = [find_reversibles([(3, 4), (4, 4)]), find_reversibles([(4, 2), (4, 3)])]
-            mock_evaluate.side_effect = [10, 20]
-            mock_simulate.side_effect = [(1, 2, 3), (4, 5, 6)]
-            result = [cand for cand in self.opponent.find_best_move(grids, disks, Piece.WHITE)]
-            self.assertEqual(result, expect)
+        white_pos = [(0, 4), (1, 4), (2, 1), (2, 2), (2, 3), (2, 4), (2, 5), (2, 6), (4, 2), (5, 1)]
+        black_pos = [(3, 2), (3, 3), (3, 4), (4, 3), (4, 4), (4, 5), (5, 5), (6, 5)]
+        disks = self.get_disks(black_pos, white_pos, Piece.BLACK, Piece.WHITE)
+        own, opp = to_bitboards(disks, Piece.WHITE.value)
+        grids = [position(sq) for sq in iter_squares(get_moves(own, opp))]
+        result = list(self.opponent.find_best_move(grids, own, opp))
+        self.assertEqual([(cand.row, cand.col) for cand in result], grids)
+
+        for cand in result:
+            with self.subTest((cand.row, cand.col)):
+                next_own, next_opp = make_move(own, opp, square(cand.row, cand.col))
+                self.assertEqual(cand.evaluation, self.opponent.evaluate(next_own, next_opp))
+                self.assertEqual(cand[3:6], self.opponent.count_replies(next_opp, next_own))
+                self.assertEqual(cand.mobility, mobility_score(next_own, next_opp))
+
+    def test_candidate_score(self):
+        self.assertEqual(Candidate(10, 2, 4, 0, 0, 0).score, 10)
+        self.assertEqual(Candidate(10, 2, 4, 0, 0, 0, -4).score, 6)
 
     def test_guess_choice(self):
         cands = [Candidate(0, 2, 4, 0, 0, 0), Candidate(0, 3, 4, 0, 0, 0), Candidate(0, 3, 5, 0, 0, 0)]
@@ -413,7 +333,7 @@ class OpponentTestCase(PlayerCommon):
                 mock.patch('othello.random.choice') as mock_choice:
             mock_best_move.return_value = self.find_best_move(cands)
             mock_choice.return_value = cands[1]
-            result = self.opponent.guess(mock.MagicMock(), mock.MagicMock())
+            result = self.opponent.guess(mock.MagicMock(), 0, 0)
             mock_choice.assert_called_once()
             self.assertEqual(result, (3, 4))
 
@@ -434,20 +354,82 @@ class OpponentTestCase(PlayerCommon):
             for test, expect in zip(tests, expects):
                 with self.subTest(test):
                     mock_best_move.return_value = self.find_best_move(test)
-                    result = self.opponent.guess(mock.MagicMock(), mock.MagicMock())
+                    result = self.opponent.guess(mock.MagicMock(), 0, 0)
                     self.assertEqual(result, (expect))
 
+    def test_guess_mobility(self):
+        cands = [Candidate(20, 2, 4, 0, 0, 0, -6), Candidate(10, 3, 4, 0, 0, 0, 8), Candidate(15, 3, 5, 0, 0, 0)]
+
+        with mock.patch('othello.Opponent.find_best_move') as mock_best_move:
+            mock_best_move.return_value = self.find_best_move(cands)
+            result = self.opponent.guess(mock.MagicMock(), 0, 0)
+            self.assertEqual(result, (3, 4))
+
     def test_place_corner(self):
         positions = [(0, 0), (0, 7)]
 
-        with mock.patch('othello.Opponent.get_placeables') as mock_placeables, \
+        with mock.patch('othello.GameState.legal_moves') as mock_moves, \
                 mock.patch('othello.Opponent.guess') as mock_guess, \
                 mock.patch('othello.Players.click') as mock_click:
-            mock_placeables.return_value = self.get_placeables(positions)
+            mock_moves.return_value = self.get_moves(positions)
             self.opponent.place()
             mock_click.assert_called_once_with(*positions[0])
             mock_guess.assert_not_called()
 
+    def test_book_move(self):
+        self.mock_board.state = GameState()
+        self.opponent.book = mock.MagicMock()
+        tests = [[19, (2, 3)], [None, None]]
+
+        for move, expect in tests:
+            with self.subTest(move):
+                self.opponent.book.best_move.return_value = move
+                result = self.opponent.book_move()
+                self.assertEqual(result, expect)
+                state = self.opponent.book.best_move.call_args.args[0]
+                self.assertEqual(state.turn, Piece.WHITE.value)
+
+    def test_place_book(self):
+        with mock.patch('othello.Opponent.book_move') as mock_book_move, \
+                mock.patch('othello.GameState.legal_moves') as mock_moves, \
+                mock.patch('othello.Players.click') as mock_click:
+            mock_book_move.return_value = (2, 3)
+            self.opponent.place()
+            mock_click.assert_called_once_with(2, 3)
+            mock_moves.assert_not_called()
+
+    def test_endgame_move(self):
+        state = GameState(0xFFFFFFFFFFFFF000, 0x0E0)
+        tests = [
+            [SolveResult(3, 10, 100), (0, 3)],
+            [SolveResult(PASS, -4, 100), None],
+            [TimeUp(), None]
+        ]
+        with mock.patch('othello.EndgameSolver.solve') as mock_solve:
+            for effect, expect in tests:
+                with self.subTest(effect):
+                    mock_solve.side_effect = [effect]
+                    self.assertEqual(self.opponent.endgame_move(state), expect)
+                    mock_solve.assert_called_once_with(state)
+                    mock_solve.reset_mock()
+
+    def test_endgame_move_too_many_empties(self):
+        with mock.patch('othello.EndgameSolver.solve') as mock_solve:
+            self.assertEqual(self.opponent.endgame_move(GameState()), None)
+            mock_solve.assert_not_called()
+
+    def test_place_endgame(self):
+        with mock.patch('othello.Opponent.endgame_move') as mock_endgame_move, \
+                mock.patch('othello.GameState.legal_moves') as mock_moves, \
+                mock.patch('othello.Players.click') as mock_click:
+            mock_endgame_move.return_value = (7, 7)
+            self.opponent.place()
+            state = mock_endgame_move.call_args.args[0]
+            self.assertEqual(state.turn, Piece.WHITE.value)
+            self.assertEqual(state.count(Piece.WHITE.value), 4)
+            mock_click.assert_called_once_with(7, 7)
+            mock_moves.assert_not_called()
+
     def test_place_filtered(self):
         black_pos = [(2, 2), (3, 3), (3, 4), (4, 4)]
         white_pos = [(4, 3), (5, 3), (5, 4), (5, 5)]
@@ -457,15 +439,15 @@ class OpponentTestCase(PlayerCommon):
         filtered = [(2, 3), (3, 4), (4, 5)]
         guessed = (1, 3)
 
-        with mock.patch('othello.Opponent.get_placeables') as mock_placeables, \
+        with mock.patch('othello.GameState.legal_moves') as mock_moves, \
                 mock.patch('othello.Opponent.guess') as mock_guess, \
                 mock.patch('othello.Players.click') as mock_click:
-            mock_placeables.return_value = self.get_placeables(positions)
+            mock_moves.return_value = self.get_moves(positions)
             mock_guess.return_value = guessed
             self.opponent.place()
 
-            mock_placeables.assert_called_once_with(disks, Piece.WHITE)
-            mock_guess.assert_called_once_with(filtered, disks)
+            mock_moves.assert_called_once_with()
+            mock_guess.assert_called_once_with(filtered, *to_bitboards(disks, Piece.WHITE.value))
             mock_click.assert_called_once_with(*guessed)
 
     def test_place_no_filtered(self):
@@ -476,17 +458,72 @@ class OpponentTestCase(PlayerCommon):
         positions = [(0, 1), (1, 0), (1, 1)]
         guessed = (1, 3)
 
-        with mock.patch('othello.Opponent.get_placeables') as mock_placeables, \
+        with mock.patch('othello.GameState.legal_moves') as mock_moves, \
                 mock.patch('othello.Opponent.guess') as mock_guess, \
                 mock.patch('othello.Players.click') as mock_click:
-            mock_placeables.return_value = self.get_placeables(positions)
+            mock_moves.return_value = self.get_moves(positions)
             mock_guess.return_value = guessed
             self.opponent.place()
 
-            mock_placeables.assert_called_once_with(disks, Piece.WHITE)
-            mock_guess.assert_called_once_with(positions, disks)
+            mock_moves.assert_called_once_with()
+            mock_guess.assert_called_once_with(positions, *to_bitboards(disks, Piece.WHITE.value))
             mock_click.assert_called_once_with(*guessed)
 
 
+class SearchOpponentTestCase(PlayerCommon):
+    """Tests for SearchOpponent class
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.mock_board.state = GameState()
+        self.opponent = SearchOpponent(self.mock_board, Piece.WHITE, time_limit=0.5)
+
+    def test_place(self):
+        with mock.patch('othello.Searcher.search') as mock_search, \
+                mock.patch('othello.Players.click') as mock_click:
+            mock_search.return_value = SearchResult(20, 3, 4, 100)
+            self.opponent.place()
+            state = mock_search.call_args.args[0]
+            self.assertEqual(state.boards, self.mock_board.state.boards)
+            self.assertEqual(state.turn, Piece.WHITE.value)
+            mock_click.assert_called_once_with(2, 4)
+
+    def test_time_limit(self):
+        self.assertEqual(self.opponent.searcher.time_limit, 0.5)
+        self.assertEqual(self.opponent.solver.time_limit, 0.25)
+
+    def test_select_after_solve(self):
+        # The time a solve ran out of comes off the search.
+        state = GameState(0xFFFFFFFFFFFFF000, 0x0E0)
+        tests = [[TimeUp(), 0.25], [SolveResult(PASS, -4, 100), 0.4]]
+
+        with mock.patch('othello.EndgameSolver.solve') as mock_solve, \
+                mock.patch('othello.Searcher.search') as mock_search, \
+                mock.patch('othello.time.perf_counter') as mock_clock:
+            mock_search.return_value = SearchResult(20, 3, 4, 100)
+            for effect, expect in tests:
+                with self.subTest(effect):
+                    mock_solve.side_effect = [effect]
+                    mock_clock.side_effect = [10.0, 10.5 - expect]
+                    self.assertEqual(self.opponent.select(state), (2, 4))
+                    self.assertAlmostEqual(self.opponent.searcher.time_limit, expect)
+
+    def test_evaluate(self):
+        self.assertIs(Opponent.evaluate, evaluate)
+        self.assertEqual(self.opponent.searcher.evaluate, Opponent.evaluate)
+
+    def test_processes(self):
+        with mock.patch('othello.ParallelSearcher') as mock_parallel:
+            opponent = SearchOpponent(self.mock_board, Piece.WHITE, 0.5, processes=4)
+            mock_parallel.assert_called_once_with(4, 0.5, evaluate=Opponent.evaluate)
+            self.assertIs(opponent.searcher, mock_parallel.return_value)
+
+    def test_stop(self):
+        self.opponent.stop()
+        self.assertTrue(self.opponent.searcher.stopped)
+        self.assertTrue(self.opponent.solver.stopped)
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
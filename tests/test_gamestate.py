@@ -0,0 +1,126 @@
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+from bitboard import START_BLACK, START_WHITE, iter_squares, popcount, square
+from gamestate import BLACK, WHITE, PASS, GameState
+
+
+class TestUtils:
+
+    def get_bitboard(self, positions):
+        bb = 0
+        for r, c in positions:
+            bb |= 1 << square(r, c)
+        return bb
+
+
+class GameStateTestCase(TestCase, TestUtils):
+    """Tests for GameState class
+    """
+
+    def setUp(self):
+        self.state = GameState()
+
+    def test_initialization(self):
+        self.assertEqual(self.state.boards, [START_BLACK, START_WHITE])
+        self.assertEqual(self.state.turn, BLACK)
+        self.assertEqual((self.state.count(BLACK), self.state.count(WHITE)), (2, 2))
+
+    def test_get_set(self):
+        self.state.set(3, 3, BLACK)
+        tests = [[(3, 3), BLACK], [(3, 4), BLACK], [(4, 4), WHITE], [(4, 3), BLACK], [(0, 0), None]]
+        for pos, expect in tests:
+            with self.subTest(pos):
+                self.assertEqual(self.state.get(*pos), expect)
+
+    def test_play_undo(self):
+        self.state.play(square(2, 3))
+        self.assertEqual(self.state.black, self.get_bitboard([(2, 3), (3, 3), (3, 4), (4, 3)]))
+        self.assertEqual(self.state.white, self.get_bitboard([(4, 4)]))
+        self.assertEqual(self.state.turn, WHITE)
+
+        self.state.undo()
+        self.assertEqual(self.state.boards, [START_BLACK, START_WHITE])
+        self.assertEqual(self.state.turn, BLACK)
+        self.assertEqual(self.state.history, [])
+
+    def test_pass(self):
+        black = self.get_bitboard([(0, 0), (0, 1)])
+        white = self.get_bitboard([(0, 2)])
+        state = GameState(black, white, WHITE)
+        self.assertTrue(state.must_pass())
+        state.play(PASS)
+        self.assertEqual(state.turn, BLACK)
+        self.assertFalse(state.must_pass())
+        state.undo()
+        self.assertEqual(state.turn, WHITE)
+        self.assertEqual(state.boards, [black, white])
+
+    def test_is_game_over(self):
+        tests = [
+            [GameState(), False],
+            [GameState(self.get_bitboard([(0, 0)]), 0), True],
+            [GameState(0xFFFFFFFFFFFFFFFF, 0), True],
+        ]
+        for state, expect in tests:
+            with self.subTest(expect):
+                self.assertEqual(state.is_game_over(), expect)
+
+    def test_winner(self):
+        tests = [
+            [GameState(), None],
+            [GameState(0b111, 0b11000), BLACK],
+            [GameState(0b1, 0b11000), WHITE]
+        ]
+        for state, expect in tests:
+            with self.subTest(expect):
+                self.assertEqual(state.winner(), expect)
+
+    def test_random_game_undo(self):
+        rand = random.Random(3)
+        boards = []
+
+        while not self.state.is_game_over():
+            self.assertEqual(self.state.counts, [popcount(bb) for bb in self.state.boards])
+            boards.append((self.state.boards[:], self.state.turn))
+            if moves := [sq for sq in iter_squares(self.state.legal_moves())]:
+                self.state.play(rand.choice(moves))
+            else:
+                self.state.play(PASS)
+
+        self.assertEqual(self.state.count(BLACK) + self.state.count(WHITE) + len(
+            [sq for sq in iter_squares(self.state.empties)]), 64)
+
+        while boards:
+            self.state.undo()
+            self.assertEqual((self.state.boards, self.state.turn), boards.pop())
+            self.assertEqual(self.state.counts, [popcount(bb) for bb in self.state.boards])
+
+    def test_counts(self):
+        self.state.play(square(2, 3))
+        self.assertEqual((self.state.count(BLACK), self.state.count(WHITE), self.state.empty_count), (4, 1, 59))
+        self.state.set(2, 3, WHITE)
+        self.state.set(0, 0, WHITE)
+        self.state.set(0, 0, WHITE)
+        self.assertEqual((self.state.count(BLACK), self.state.count(WHITE), self.state.empty_count), (3, 3, 58))
+        self.state.clear()
+        self.assertEqual((self.state.count(BLACK), self.state.count(WHITE), self.state.empty_count), (0, 0, 64))
+
+    def test_is_full(self):
+        self.assertFalse(self.state.is_full())
+        self.assertTrue(GameState(0xFFFFFFFF, 0xFFFFFFFF00000000).is_full())
+
+    def test_copy(self):
+        self.state.play(square(2, 3))
+        copied = self.state.copy()
+        copied.play(square(2, 2))
+        self.assertEqual(len(self.state.history), 1)
+        self.assertNotEqual(copied.boards, self.state.boards)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+from instrument import Instrument
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Target:
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def work(self, seconds):
+        self.clock.now += seconds
+        return seconds
+
+    def fail(self):
+        self.clock.now += 0.001
+        raise ValueError()
+
+
+class InstrumentTestCase(TestCase):
+    """Tests for Instrument class
+    """
+
+    def setUp(self):
+        self.clock = Clock()
+        self.instrument = Instrument(clock=self.clock)
+        self.target = Target(self.clock)
+
+    def test_time(self):
+        self.instrument.time(self.target, 'work', 'phase')
+        self.instrument.time(self.target, 'fail')
+        self.assertEqual(self.target.work(0.002), 0.002)
+        self.target.work(0.004)
+        with self.assertRaises(ValueError):
+            self.target.fail()
+
+        report = self.instrument.report()['phases']
+        self.assertEqual(report['phase'], dict(count=2, total_ms=6, mean_ms=3, max_ms=4))
+        self.assertEqual(report['fail']['count'], 1)
+
+    def test_frames(self):
+        self.instrument.time(self.target, 'work', frame=True)
+        for seconds in (0.0005, 0.003, 0.001, 0.3):
+            self.target.work(seconds)
+            self.target.work(seconds)
+            self.instrument.end_frame()
+
+        report = self.instrument.report()
+        self.assertEqual(report['frames']['count'], 4)
+        self.assertEqual(report['frames']['max_ms'], 600)
+        self.assertEqual(
+            [label for label, count in report['frame_histogram'].items() if count],
+            ['<2ms', '<4ms', '<8ms', '>=250ms'])
+        self.assertEqual(self.instrument.summary(), 'frame 600.0 ms (max 600.0)')
+
+    def test_count(self):
+        self.instrument.count(self.target, 'work', 'calls')
+        for _ in range(3):
+            self.target.work(0)
+        self.assertEqual(self.instrument.report()['calls'], {'calls': 3})
+        self.assertEqual(self.target.work.__name__, 'work')
+
+    def test_dump(self):
+        self.instrument.count(self.target, 'work')
+        self.target.work(0)
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, 'profile.json')
+            self.instrument.dump(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)['calls'], {'work': 1})
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import os
 import sys
+import threading
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from pathlib import Path
@@ -7,8 +8,10 @@ import pygame
 from pygame.locals import *
 from unittest import TestCase, main, mock
 
+from instrument import Instrument
 from othello import Board, Cursor, Disk, Piece, Player, \
-    Othello, Opponent, Status, Images, Point
+    Othello, Opponent, SearchOpponent, Status, Images, Point, ImageCache, TextCache
+from parallel import ParallelSearcher
 
 
 class TestUtils:
@@ -38,6 +41,8 @@ class TestUtils:
 class OthelloTestCase(TestCase, TestUtils):
 
     def setUp(self):
+        ImageCache.clear()
+        TextCache.clear()
         targets = [
             'othello.pygame.init',
             'othello.pygame.display.set_mode',
@@ -68,9 +73,9 @@ class OthelloTestCase(TestCase, TestUtils):
 
     def test_calc_score_true(self):
         for r, c in [(2, 3), (3, 5), (3, 6)]:
-            self.othello.disks[r][c] = self.get_disk(Piece.BLACK)
+            self.othello.board.place(r, c, Piece.BLACK)
         for r, c in [(0, 1), (0, 2), (0, 3), (7, 0)]:
-            self.othello.disks[r][c] = self.get_disk(Piece.WHITE)
+            self.othello.board.place(r, c, Piece.WHITE)
 
         with mock.patch('othello.Board.set_score') as mock_set:
             result = self.othello.calc_score()
@@ -81,9 +86,9 @@ class OthelloTestCase(TestCase, TestUtils):
         for r in range(8):
             for c in range(8):
                 if r <= 3:
-                    self.othello.disks[r][c] = self.get_disk(Piece.BLACK)
+                    self.othello.board.place(r, c, Piece.BLACK)
                 else:
-                    self.othello.disks[r][c] = self.get_disk(Piece.WHITE)
+                    self.othello.board.place(r, c, Piece.WHITE)
 
         with mock.patch('othello.Board.set_score') as mock_set:
             result = self.othello.calc_score()
@@ -98,13 +103,15 @@ class OthelloTestCase(TestCase, TestUtils):
             self.assertEqual(mock_set.call_args_list, calls)
 
     def test_start(self):
-        self.set_attrs(self.othello, timer=10, status=Status.GAMEOVER)
+        self.set_attrs(self.othello, status=Status.GAMEOVER)
+        timer = self.othello.set_timer(3)
 
         with mock.patch('othello.Board.setup') as mock_setup, \
                 mock.patch('othello.Board.set_turn') as mock_setturn:
             self.othello.start()
             self.assertEqual(self.othello.status, Status.PLAY)
-            self.assertEqual(self.othello.timer, 0)
+            self.assertTrue(timer.cancelled)
+            self.assertEqual(len(self.othello.scheduler), 0)
             mock_setup.assert_called_once()
             mock_setturn.assert_called_once_with(Images.BLACK_DISPLAY)
 
@@ -112,11 +119,18 @@ class OthelloTestCase(TestCase, TestUtils):
         event = mock.MagicMock()
         self.othello.status = Status.PLAY
 
-        with mock.patch('othello.pygame.event.Event') as mock_event:
-            self.othello.set_timer(event, 10)
+        with mock.patch('othello.pygame.event.Event') as mock_event, \
+                mock.patch('othello.Scheduler.schedule') as mock_schedule:
+            self.othello.set_timer(event, 0.5)
             self.assertEqual(self.othello.status, Status.SET_TIMER)
-            self.assertEqual(self.othello.timer, 10)
             mock_event.assert_called_once_with(event)
+            mock_schedule.assert_called_once_with(0.5, self.othello.post_event, mock_event.return_value)
+
+    def test_post_event(self):
+        self.othello.status = Status.SET_TIMER
+        self.othello.post_event(3)
+        self.assertEqual(self.othello.status, Status.PLAY)
+        self.mock_event_post.assert_called_once_with(3)
 
     def test_current_player(self):
         tests = [
@@ -196,6 +210,60 @@ class OthelloTestCase(TestCase, TestUtils):
             mock_place.assert_called_once()
             mock_timer.assert_called_once_with(1)
 
+    def test_place_disk_async(self):
+        self.othello.async_ai = True
+        game_id = self.othello.game_id
+
+        with mock.patch('othello.Opponent.book_move') as mock_book, \
+                mock.patch('othello.Opponent.select') as mock_select, \
+                mock.patch('othello.Othello.set_timer') as mock_timer:
+            mock_book.return_value = None
+            mock_select.return_value = (2, 3)
+            self.othello.place_disk()
+            self.othello.worker.join()
+            mock_timer.assert_not_called()
+            event = self.mock_event_post.call_args.args[0]
+            self.assertEqual((event.type, event.pos, event.game), (6, (2, 3), game_id))
+
+    def test_place_disk_async_book(self):
+        self.othello.async_ai = True
+
+        with mock.patch('othello.Opponent.book_move') as mock_book, \
+                mock.patch('othello.Opponent.select') as mock_select:
+            mock_book.return_value = (2, 3)
+            self.othello.place_disk()
+            mock_select.assert_not_called()
+            self.assertIsNone(self.othello.worker)
+            event = self.mock_event_post.call_args.args[0]
+            self.assertEqual(event.pos, (2, 3))
+
+    def test_move_opponent(self):
+        tests = [
+            [self.othello.game_id, 1],
+            [self.othello.game_id - 1, 0],
+        ]
+        with mock.patch('othello.Players.click') as mock_click, \
+                mock.patch('othello.Othello.set_timer') as mock_timer:
+            for game_id, expect in tests:
+                with self.subTest(game_id):
+                    self.othello.move_opponent(mock.MagicMock(pos=(2, 3), game=game_id))
+                    self.assertEqual(mock_click.call_count, expect)
+                    self.assertEqual(mock_timer.call_count, expect)
+                    self.reset_mocks(mock_click, mock_timer)
+
+    def test_cancel_thinking(self):
+        stopped = threading.Event()
+        self.othello.worker = threading.Thread(target=stopped.wait)
+        self.othello.worker.start()
+        game_id = self.othello.game_id
+
+        with mock.patch('othello.Opponent.stop') as mock_stop:
+            mock_stop.side_effect = stopped.set
+            self.othello.cancel_thinking()
+            mock_stop.assert_called()
+            self.assertIsNone(self.othello.worker)
+            self.assertEqual(self.othello.game_id, game_id + 1)
+
     def test_reverse_disks(self):
         tests = [
             [True, 2],
@@ -297,7 +365,9 @@ class OthelloTestCase(TestCase, TestUtils):
             self.othello.run()
 
     def test_run_timer(self):
-        self.set_attrs(self.othello, timer=1, status=Status.SET_TIMER, event=3)
+        self.othello.scheduler.fast = True
+        self.othello.scheduler.schedule(0, self.othello.post_event, 3)
+        self.othello.status = Status.SET_TIMER
         dummy_events = self.set_event(dict(type=QUIT))
         self.mock_event_get.return_value = dummy_events()
 
@@ -357,6 +427,163 @@ class OthelloTestCase(TestCase, TestUtils):
             mock_player_click.assert_called_once()
             self.othello.board.button.rect.collidepoint.assert_called_once_with(150, 120)
 
+    def test_get_events(self):
+        self.mock_event_get.return_value = ['event']
+
+        with mock.patch('othello.pygame.event.wait') as mock_wait:
+            self.assertEqual(self.othello.get_events(), ['event'])
+            mock_wait.assert_not_called()
+
+    def test_get_events_wait(self):
+        tests = [
+            [None, 1000],
+            [0.2, 200],
+            [5, 1000],
+        ]
+        with mock.patch('othello.pygame.event.wait') as mock_wait, \
+                mock.patch('othello.Scheduler.next_due') as mock_due:
+            mock_wait.return_value = pygame.event.Event(NOEVENT)
+            for due, expect in tests:
+                with self.subTest(due):
+                    self.mock_event_get.return_value = []
+                    mock_due.return_value = due
+                    self.assertEqual(self.othello.get_events(), [])
+                    mock_wait.assert_called_once_with(expect)
+                    mock_wait.reset_mock()
+
+            mock_due.return_value = 0
+            self.assertEqual(self.othello.get_events(), [])
+            mock_wait.assert_not_called()
+
+    def test_get_events_wake(self):
+        event = pygame.event.Event(MOUSEMOTION, pos=(10, 10))
+        self.mock_event_get.side_effect = [[], ['next']]
+
+        with mock.patch('othello.pygame.event.wait') as mock_wait:
+            mock_wait.return_value = event
+            self.assertEqual(self.othello.get_events(), [event, 'next'])
+
+    def test_attach(self):
+        instrument = Instrument()
+        self.othello.attach(instrument)
+        self.othello.board.setup()
+        self.othello.player.is_placeable(2, 3, self.othello.disks, Piece.BLACK)
+        self.othello.opponent.select(self.othello.opponent.current_state())
+        self.othello.render()
+        self.othello.scheduler.run_due()
+        self.othello.handle_events([])
+        instrument.end_frame()
+
+        report = instrument.report()
+        # one evaluation for each of the four opening moves
+        self.assertEqual(report['calls'], {'evaluate': 4, 'is_placeable': 1})
+        self.assertIsNot(self.othello.opponent.evaluate, Opponent.evaluate)
+        self.assertEqual(set(report['phases']), {'ai', 'board', 'display', 'events', 'render', 'sprites', 'timers'})
+        self.assertEqual(report['phases']['sprites']['count'], 2)
+        self.assertEqual(report['frames']['count'], 1)
+
+    def test_attach_search(self):
+        self.othello.opponent = SearchOpponent(self.othello.board, Piece.WHITE)
+        instrument = Instrument()
+        self.othello.attach(instrument)
+        self.othello.opponent.searcher.evaluate(0, 0)
+        self.assertEqual(instrument.calls['search.evaluate'], 1)
+
+    def test_attach_parallel_search(self):
+        with mock.patch('othello.ParallelSearcher') as mock_parallel:
+            mock_parallel.return_value = mock.create_autospec(spec=ParallelSearcher, instance=True)
+            self.othello.opponent = SearchOpponent(self.othello.board, Piece.WHITE, processes=2)
+
+        instrument = Instrument()
+        self.othello.attach(instrument)
+        self.assertNotIn('search.evaluate', instrument.calls)
+
+    def test_render_overlay(self):
+        self.othello.attach(Instrument(), overlay=True)
+        self.othello.dirty_rects = True
+
+        with mock.patch('othello.Othello.draw_changes') as mock_changes, \
+                mock.patch('othello.Othello.draw_overlay') as mock_overlay, \
+                mock.patch('othello.pygame.display.update') as mock_update:
+            mock_changes.return_value = []
+            mock_overlay.return_value = Rect(550, 10, 280, 30)
+            self.othello.render()
+            mock_update.assert_called_once_with([Rect(550, 10, 280, 30)])
+
+    def test_quit(self):
+        instrument = Instrument('profile.json')
+        self.othello.attach(instrument)
+
+        with mock.patch('othello.Instrument.dump') as mock_dump, \
+                mock.patch('othello.pygame.quit') as mock_quit:
+            with self.assertRaises(SystemExit):
+                self.othello.handle_events(self.set_event(dict(type=QUIT))())
+            mock_dump.assert_called_once()
+            mock_quit.assert_called_once()
+
+    def set_scene(self):
+        self.set_attrs(
+            self.othello.board, status=Status.PLAY, black_score='2', white_score='2', player_color=Piece.BLACK)
+        self.othello.board.state.set(3, 3, Piece.WHITE.value)
+        self.othello.cursor.rect = Rect(100, 100, 50, 50)
+
+    def test_draw_changes_first_frame(self):
+        self.set_scene()
+        self.othello.cursor.visible = True
+        rects = self.othello.draw_changes()
+        self.assertEqual(rects, [Rect(0, 0, 840, 700), Rect(100, 100, 50, 50)])
+        self.othello.screen.blit.assert_called_once_with(self.othello.scene, (0, 0))
+        self.othello.cursor_group.draw.assert_called_once_with(self.othello.screen)
+
+    def test_draw_changes_nothing_changed(self):
+        self.set_scene()
+        self.othello.draw_changes()
+        self.othello.screen.blit.reset_mock()
+        self.assertEqual(self.othello.draw_changes(), [])
+        self.othello.screen.blit.assert_not_called()
+
+    def test_draw_changes_disks(self):
+        self.set_scene()
+        self.othello.draw_changes()
+        self.othello.board.state.set(3, 4, Piece.BLACK.value)
+        self.assertEqual(self.othello.draw_changes(), [Rect(200, 50, 600, 600)])
+
+    def test_draw_changes_panels(self):
+        self.set_scene()
+        self.othello.draw_changes()
+        self.othello.board.black_score = '3'
+        self.assertEqual(self.othello.draw_changes(), [Rect(0, 0, 840, 700)])
+
+    def test_draw_changes_cursor(self):
+        self.set_scene()
+        self.othello.cursor.visible = True
+        self.othello.draw_changes()
+        self.othello.screen.blit.reset_mock()
+        self.othello.cursor_group.draw.reset_mock()
+
+        self.othello.cursor.rect = Rect(200, 100, 50, 50)
+        rects = self.othello.draw_changes()
+        self.assertEqual(rects, [Rect(100, 100, 50, 50), Rect(200, 100, 50, 50)])
+        self.othello.screen.blit.assert_called_once_with(
+            self.othello.scene, Rect(100, 100, 50, 50), Rect(100, 100, 50, 50))
+        self.othello.cursor_group.draw.assert_called_once_with(self.othello.screen)
+
+        self.othello.cursor.visible = False
+        self.assertEqual(self.othello.draw_changes(), [Rect(200, 100, 50, 50)])
+
+    def test_run_dirty_rects(self):
+        self.othello.dirty_rects = True
+        dummy_events = self.set_event(dict(type=QUIT))
+        self.mock_event_get.return_value = dummy_events()
+
+        with mock.patch('othello.Othello.draw_changes') as mock_changes, \
+                mock.patch('othello.Othello.draw') as mock_draw, \
+                mock.patch('othello.Othello.start'):
+            mock_changes.return_value = [Rect(0, 0, 10, 10)]
+            self.run_game()
+            mock_changes.assert_called_once()
+            mock_draw.assert_not_called()
+
     def test_run_player_click(self):
         self.othello.board.button.rect.collidepoint.return_value = True
         dummy_events = self.set_event(
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+from bitboard import iter_squares, square
+from gamestate import BLACK, WHITE, PASS, GameState
+from parallel import ParallelSearcher, init_worker, search_moves
+from perft import get_position
+from search import DISC_SCORE, Searcher, SearchResult, ordered_moves
+
+
+class ParallelSearcherTestCase(TestCase):
+    """Tests for ParallelSearcher class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.searcher = ParallelSearcher(processes=2, time_limit=30, max_depth=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.searcher.close()
+
+    def test_search_pass(self):
+        state = GameState(0b11, 0b100, WHITE)
+        self.assertEqual(self.searcher.search(state), SearchResult(PASS, None, 0, 0))
+
+    def test_search_winning_move(self):
+        # Black wipes out white by taking (0, 3).
+        state = GameState(1 << square(0, 0), (1 << square(0, 1)) | (1 << square(0, 2)), BLACK)
+        result = self.searcher.search(state)
+        self.assertEqual(result.move, square(0, 3))
+        self.assertEqual(result.score, 4 * DISC_SCORE)
+
+    def test_search_same_score(self):
+        for name in ('start', 'midgame', 'pass'):
+            with self.subTest(name):
+                state = get_position(name)
+                expect = Searcher(time_limit=None, max_depth=3).search(state)
+                result = self.searcher.search(state)
+                self.assertEqual((result.score, result.depth), (expect.score, expect.depth))
+                self.assertIn(result.move, [sq for sq in iter_squares(state.legal_moves())])
+                self.assertTrue(result.nodes > 0)
+
+    def test_search_time_limit(self):
+        with ParallelSearcher(processes=2, time_limit=0.2) as searcher:
+            searcher.search(GameState())
+            start = time.perf_counter()
+            result = searcher.search(get_position('midgame'))
+            self.assertTrue(time.perf_counter() - start < 1.0)
+        self.assertTrue(result.depth >= 1)
+
+    def test_search_moves(self):
+        init_worker(1024 * 1024)
+        state = get_position('midgame')
+        moves = ordered_moves(state.legal_moves())
+        move, score, nodes = search_moves((state.own, state.opp, state.turn, state.hash, moves, 2, 10))
+        expect = Searcher(time_limit=None, max_depth=2).search(state)
+        self.assertEqual((move, score), (expect.move, expect.score))
+
+        move, score, nodes = search_moves((state.own, state.opp, state.turn, state.hash, moves, 4, 0))
+        self.assertEqual((move, score), (None, None))
+
+
+if __name__ == '__main__':
+    main()
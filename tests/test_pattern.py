@@ -0,0 +1,107 @@
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from array import array
+from unittest import TestCase, main
+
+from bitboard import square
+from evaluation import evaluate
+from gamestate import PASS, GameState
+from pattern import INSTANCES, PATTERNS, PHASE, PHASES, SIZES, PatternEvaluator, linear_weights, \
+    pattern_indices
+
+
+def random_positions(games, seed=0):
+    rand = random.Random(seed)
+    positions = []
+
+    for _ in range(games):
+        state = GameState()
+        while not state.is_game_over():
+            moves = [sq for sq in range(64) if state.legal_moves() >> sq & 1]
+            state.play(rand.choice(moves) if moves else PASS)
+            positions.append((state.own, state.opp))
+    return positions
+
+
+class PatternTestCase(TestCase):
+    """Tests for pattern tables
+    """
+
+    def test_instances(self):
+        counts = {}
+        for i, instance in INSTANCES:
+            counts[PATTERNS[i][0]] = counts.get(PATTERNS[i][0], 0) + 1
+            self.assertEqual(len(instance), len(PATTERNS[i][1]))
+
+        expect = {
+            'corner3x3': 4, 'edge2x': 4, 'corner2x5': 8, 'hv2': 4, 'hv3': 4, 'hv4': 4,
+            'diag8': 2, 'diag7': 4, 'diag6': 4, 'diag5': 4, 'diag4': 4
+        }
+        self.assertEqual(counts, expect)
+        self.assertEqual(set(sq for _, instance in INSTANCES for sq in instance), set(range(64)))
+
+    def test_phase(self):
+        self.assertEqual(PHASE[4], 0)
+        self.assertEqual(PHASE[64], PHASES - 1)
+        self.assertEqual(sorted(set(PHASE)), list(range(PHASES)))
+
+    def test_pattern_indices(self):
+        for own, opp in random_positions(5):
+            with self.subTest(own=own, opp=opp):
+                expect = [
+                    sum(3 ** k * ((own >> sq & 1) + 2 * (opp >> sq & 1)) for k, sq in enumerate(instance))
+                    for _, instance in INSTANCES
+                ]
+                self.assertEqual(list(pattern_indices(own, opp)), expect)
+
+    def test_pattern_indices_full(self):
+        indices = pattern_indices(0, 0xFFFFFFFFFFFFFFFF)
+        self.assertEqual(list(indices), [SIZES[i] - 1 for i, _ in INSTANCES])
+
+
+class PatternEvaluatorTestCase(TestCase):
+    """Tests for PatternEvaluator class
+    """
+
+    def test_linear_weights(self):
+        evaluator = PatternEvaluator()
+        for own, opp in random_positions(20):
+            with self.subTest(own=own, opp=opp):
+                self.assertEqual(evaluator.evaluate(own, opp), evaluate(own, opp))
+
+    def test_evaluate_around_corners(self):
+        evaluator = PatternEvaluator()
+        own = (1 << square(0, 1)) | (1 << square(1, 1))
+        opp = 1 << square(7, 7)
+        self.assertEqual(evaluator.evaluate(own, opp), evaluate(own, opp))
+        self.assertEqual(evaluator.evaluate(own, opp), -22 - 11 - 11)
+
+    def test_evaluate_phases(self):
+        weights = []
+        for phase in range(PHASES):
+            tables = [array('f', [0.0]) * size for size in SIZES]
+            # an own disc on the X square of an edge pattern and nothing else on the edge
+            tables[1][3 ** 8] = phase
+            weights.append(tables)
+        evaluator = PatternEvaluator(weights)
+
+        # (1, 1) is the X square of the top and the left edge patterns
+        own = 1 << square(1, 1)
+        edges = {square(r, c) for r in range(8) for c in range(8) if r == 0 or c == 0}
+        edges |= {square(1, 1), square(1, 6), square(6, 1)}
+        others = [sq for sq in range(64) if sq not in edges]
+
+        for n in (1, 30, len(others)):
+            opp = sum(1 << sq for sq in others[:n])
+            with self.subTest(discs=n + 1):
+                self.assertEqual(evaluator.evaluate(own, opp), 2 * PHASE[n + 1])
+
+    def test_shared_linear_weights(self):
+        self.assertIs(linear_weights(), linear_weights())
+
+
+if __name__ == '__main__':
+    main()
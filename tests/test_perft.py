@@ -0,0 +1,75 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+from bitboard import get_flips, get_moves, position, square
+from gamestate import PASS, GameState, notation, parse_notation
+from perft import KNOWN_COUNTS, POSITIONS, get_position, perft, run
+
+
+class TestUtils:
+
+    def naive_flips(self, own, opp, sq):
+        row, col = position(sq)
+        flips = 0
+        for i in range(-1, 2):
+            for j in range(-1, 2):
+                line = 0
+                r, c = row + i, col + j
+                while (i or j) and 0 <= r < 8 and 0 <= c < 8 and opp & (1 << square(r, c)):
+                    line |= 1 << square(r, c)
+                    r, c = r + i, c + j
+                if (i or j) and 0 <= r < 8 and 0 <= c < 8 and own & (1 << square(r, c)):
+                    flips |= line
+        return flips
+
+    def naive_moves(self, own, opp):
+        moves = 0
+        for sq in range(64):
+            if not (own | opp) & (1 << sq) and self.naive_flips(own, opp, sq):
+                moves |= 1 << sq
+        return moves
+
+
+class PerftTestCase(TestCase, TestUtils):
+    """Tests for perft
+    """
+
+    def test_notation(self):
+        moves = [37, 43, PASS, 0]
+        self.assertEqual(notation(moves), 'f5d6--a1')
+        self.assertEqual(parse_notation('f5d6--a1'), moves)
+
+    def test_known_counts(self):
+        for name in POSITIONS:
+            state = get_position(name)
+            for depth, expect in enumerate(KNOWN_COUNTS[name][:4], 1):
+                with self.subTest((name, depth)):
+                    self.assertEqual(perft(state.own, state.opp, depth), expect)
+
+    def test_start_depth_6(self):
+        state = GameState()
+        self.assertEqual(perft(state.own, state.opp, 6), 8200)
+
+    def test_naive_generator(self):
+        for name in POSITIONS:
+            state = get_position(name)
+            with self.subTest(name):
+                result = perft(state.own, state.opp, 3, False, self.naive_moves, self.naive_flips)
+                self.assertEqual(result, KNOWN_COUNTS[name][2])
+
+    def test_game_over_leaf(self):
+        state = GameState(0xFFFFFFFF, 0xFFFFFFFF00000000)
+        self.assertEqual(perft(state.own, state.opp, 5), 1)
+
+    def test_run(self):
+        results = [r for r in run(2, ['start', 'pass'])]
+        self.assertEqual([(r.name, r.depth, r.nodes, r.expected) for r in results], [
+            ('start', 1, 4, 4), ('start', 2, 12, 12), ('pass', 1, 13, 13), ('pass', 2, 43, 43)
+        ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+from gamestate import PASS, WHITE, GameState, parse_notation
+from record import MAGIC, FRAME, GameRecord, RecordError, RecordWriter, count_records, decode, encode, \
+    from_state, read_records, replay
+
+
+class RecordTestCase(TestCase):
+    """Tests for game record functions
+    """
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, 'games.ogr')
+        self.records = [
+            GameRecord('search:0.1', 'random', bytes(parse_notation('f5d6c3--d3')), 40, 24),
+            GameRecord('ヒューリスティック', '', b'', 2, 2),
+            GameRecord('heuristic', 'search', bytes(range(60)), 64, 0),
+        ]
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def write(self, records):
+        with RecordWriter(self.path) as writer:
+            for record in records:
+                writer.write(record)
+
+    def test_encode_decode(self):
+        data = b''.join(encode(record) for record in self.records)
+        self.assertEqual(len(encode(self.records[0])), FRAME.size + 10 + 6 + 5)
+
+        offset = 0
+        for record in self.records:
+            with self.subTest(record.black):
+                result, offset = decode(data, offset)
+                self.assertEqual(result, record)
+        self.assertEqual(offset, len(data))
+
+    def test_from_state(self):
+        state = GameState()
+        for move in parse_notation('f5d6c3d3c4'):
+            state.play(move)
+        record = from_state(state, 'a', 'b')
+        self.assertEqual(record, GameRecord('a', 'b', bytes(parse_notation('f5d6c3d3c4')), 6, 3))
+        self.assertEqual(replay(record).boards, state.boards)
+
+    def test_pass(self):
+        state = GameState(0b11, 0b100, WHITE)
+        state.play(PASS)
+        state.play(3)
+        record = from_state(state, 'a', 'b')
+        self.assertEqual(record.moves, bytes([64, 3]))
+
+    def test_write_read(self):
+        self.write(self.records[:2])
+        self.write(self.records[2:])
+        self.assertEqual(list(read_records(self.path)), self.records)
+        self.assertEqual(count_records(self.path), 3)
+
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(len(MAGIC)), MAGIC)
+
+    def test_truncated(self):
+        self.write(self.records)
+        size = os.path.getsize(self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(size - 10)
+        self.assertEqual(list(read_records(self.path)), self.records[:2])
+        self.assertEqual(count_records(self.path), 2)
+
+        self.write(self.records[:1])
+        self.assertEqual(list(read_records(self.path)), self.records[:2] + self.records[:1])
+
+    def test_not_record_file(self):
+        with open(self.path, 'w') as f:
+            f.write('f5d6c3 -4\n')
+
+        with self.assertRaises(RecordError):
+            list(read_records(self.path))
+        with self.assertRaises(RecordError):
+            RecordWriter(self.path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main, mock
+
+from scheduler import Scheduler
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class SchedulerTestCase(TestCase):
+    """Tests for Scheduler class
+    """
+
+    def setUp(self):
+        self.clock = Clock()
+        self.scheduler = Scheduler(clock=self.clock)
+        self.callback = mock.MagicMock()
+
+    def test_run_due(self):
+        self.scheduler.schedule(0.5, self.callback, 'b')
+        self.scheduler.schedule(0.2, self.callback, 'a')
+        self.scheduler.schedule(1.0, self.callback, 'c')
+        self.assertEqual(len(self.scheduler), 3)
+
+        tests = [[0.1, []], [0.5, ['a', 'b']], [0.9, []], [1.0, ['c']]]
+        for elapsed, expect in tests:
+            with self.subTest(elapsed):
+                self.clock.now = 100.0 + elapsed
+                self.assertEqual(self.scheduler.run_due(), len(expect))
+                self.assertEqual(self.callback.call_args_list, [mock.call(arg) for arg in expect])
+                self.callback.reset_mock()
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_same_time_order(self):
+        for arg in range(5):
+            self.scheduler.schedule(0.3, self.callback, arg)
+        self.clock.now += 0.3
+        self.scheduler.run_due()
+        self.assertEqual(self.callback.call_args_list, [mock.call(arg) for arg in range(5)])
+
+    def test_cancel(self):
+        first = self.scheduler.schedule(0.2, self.callback, 'a')
+        self.scheduler.schedule(0.4, self.callback, 'b')
+        self.scheduler.cancel(first)
+        self.assertTrue(first.cancelled)
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertAlmostEqual(self.scheduler.next_due(), 0.4)
+
+        self.clock.now += 1
+        self.scheduler.run_due()
+        self.callback.assert_called_once_with('b')
+
+    def test_cancel_in_callback(self):
+        second = self.scheduler.schedule(0.2, self.callback, 'b')
+        self.scheduler.schedule(0.1, second.cancel)
+        self.clock.now += 1
+        self.assertEqual(self.scheduler.run_due(), 1)
+        self.callback.assert_not_called()
+
+    def test_cancel_all(self):
+        timers = [self.scheduler.schedule(delay, self.callback) for delay in (0.1, 0.2)]
+        self.scheduler.cancel_all()
+        self.assertTrue(all(timer.cancelled for timer in timers))
+        self.assertIsNone(self.scheduler.next_due())
+
+    def test_next_due(self):
+        self.assertIsNone(self.scheduler.next_due())
+        self.scheduler.schedule(0.5, self.callback)
+        self.assertAlmostEqual(self.scheduler.next_due(), 0.5)
+        self.clock.now += 2
+        self.assertEqual(self.scheduler.next_due(), 0)
+
+    def test_fast(self):
+        self.scheduler.fast = True
+        self.scheduler.schedule(10, self.callback)
+        self.assertEqual(self.scheduler.next_due(), 0)
+        self.assertEqual(self.scheduler.run_due(), 1)
+
+    def test_scheduled_by_callback(self):
+        self.scheduler.fast = True
+        self.scheduler.schedule(0, self.scheduler.schedule, 0, self.callback)
+        self.assertEqual(self.scheduler.run_due(), 1)
+        self.callback.assert_not_called()
+        self.assertEqual(self.scheduler.run_due(), 1)
+        self.callback.assert_called_once()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main, mock
+
+from bitboard import START_BLACK, START_WHITE, iter_squares, square
+from evaluation import Features, evaluate, features, mobility_score
+from gamestate import BLACK, WHITE, PASS, GameState
+from search import DISC_SCORE, Searcher, SearchResult, final_score, ordered_moves
+
+
+class TestUtils:
+
+    def get_bitboard(self, positions):
+        bb = 0
+        for r, c in positions:
+            bb |= 1 << square(r, c)
+        return bb
+
+
+class EvaluateTestCase(TestCase, TestUtils):
+    """Tests for evaluate function
+    """
+
+    def test_evaluate(self):
+        white = self.get_bitboard([(0, 0), (0, 1), (0, 2), (1, 0), (2, 0)])
+        black = self.get_bitboard([(0, 5), (1, 2), (1, 3), (1, 4), (2, 2), (2, 3), (3, 2), (3, 3)])
+        self.assertEqual(evaluate(white, black), 34)
+        self.assertEqual(evaluate(black, white), -34)
+
+    def test_evaluate_around_corners(self):
+        own = self.get_bitboard([(1, 1), (6, 6)])
+        opp = self.get_bitboard([(7, 7)])
+        # (1, 1) is next to an empty corner, (6, 6) is not.
+        self.assertEqual(evaluate(own, opp), -1 - 2 - 21 - 10)
+
+    def test_features(self):
+        own = self.get_bitboard([(0, 0)])
+        opp = self.get_bitboard([(0, 1)])
+        # own can take (0, 2) and opp has no move; opp touches 4 empty squares
+        # and own 2; both discs are next to empty squares.
+        self.assertEqual(features(own, opp), Features(1, 2, 0))
+        self.assertEqual(features(opp, own), Features(-1, -2, 0))
+        self.assertEqual(mobility_score(own, opp), 3 * 1 + 2)
+
+    def test_features_start(self):
+        self.assertEqual(features(START_BLACK, START_WHITE), Features(0, 0, 0))
+
+    def test_frontier(self):
+        # The center disc of a filled 3x3 block touches no empty square.
+        own = self.get_bitboard([(r, c) for r in range(2, 5) for c in range(2, 5)])
+        opp = self.get_bitboard([(6, 6)])
+        self.assertEqual(features(own, opp).frontier, 8 - 1)
+
+
+class SearcherTestCase(TestCase, TestUtils):
+    """Tests for Searcher class
+    """
+
+    def test_ordered_moves(self):
+        moves = self.get_bitboard([(1, 1), (0, 0), (2, 2), (0, 2)])
+        result = ordered_moves(moves)
+        self.assertEqual(result, [square(0, 0), square(0, 2), square(2, 2), square(1, 1)])
+
+    def test_final_score(self):
+        self.assertEqual(final_score(0b111, 0b1000), 2 * DISC_SCORE)
+
+    def test_search_pass(self):
+        state = GameState(self.get_bitboard([(0, 0), (0, 1)]), self.get_bitboard([(0, 2)]), WHITE)
+        result = Searcher().search(state)
+        self.assertEqual(result, SearchResult(PASS, None, 0, 0))
+
+    def test_search_winning_move(self):
+        # Black wipes out white by taking (0, 3).
+        black = self.get_bitboard([(0, 0)])
+        white = self.get_bitboard([(0, 1), (0, 2)])
+        state = GameState(black, white, BLACK)
+        result = Searcher(time_limit=None, max_depth=4).search(state)
+        self.assertEqual(result.move, square(0, 3))
+        self.assertEqual(result.score, 4 * DISC_SCORE)
+
+    def test_search_start(self):
+        state = GameState()
+        result = Searcher(time_limit=None, max_depth=3).search(state)
+        self.assertIn(result.move, [sq for sq in iter_squares(state.legal_moves())])
+        self.assertEqual(result.depth, 3)
+        self.assertTrue(result.nodes > 0)
+
+    def test_search_node_limit(self):
+        searcher = Searcher(time_limit=None, node_limit=2000)
+        result = searcher.search(GameState())
+        self.assertTrue(result.depth >= 1)
+        self.assertTrue(searcher.nodes < 2000 + searcher.check_interval)
+
+    def test_search_time_limit(self):
+        searcher = Searcher(time_limit=0.05)
+        start = time.perf_counter()
+        result = searcher.search(GameState())
+        self.assertTrue(time.perf_counter() - start < 0.5)
+        self.assertIn(result.move, [sq for sq in iter_squares(GameState().legal_moves())])
+
+    def test_stop(self):
+        searcher = Searcher(time_limit=None)
+
+        def evaluate(own, opp):
+            searcher.stop()
+            return 0
+
+        searcher.evaluate = evaluate
+        searcher.check_interval = 1
+        result = searcher.search(GameState())
+        self.assertEqual(result.depth, 0)
+        self.assertIn(result.move, [sq for sq in iter_squares(GameState().legal_moves())])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+import asyncio
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import IsolatedAsyncioTestCase, TestCase, main, mock, skipUnless
+
+from bitboard import parse_square, square
+from gamestate import BLACK, WHITE, GameState
+from server import GameServer, ProtocolError, bench, choose_move, connect, format_board, parse_board, \
+    parse_engine, percentile, play_session
+
+
+class Client:
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, line):
+        self.writer.write(line.encode() + b'\n')
+        await self.writer.drain()
+
+    async def receive(self):
+        return (await asyncio.wait_for(self.reader.readline(), 5)).decode().strip()
+
+    async def receive_until(self, word):
+        lines = []
+        while not lines or not lines[-1].startswith(word):
+            lines.append(await self.receive())
+        return lines
+
+    def close(self):
+        self.writer.close()
+
+
+class BoardTestCase(TestCase):
+    """Tests for board lines
+    """
+
+    def test_format_board(self):
+        line = format_board(GameState())
+        self.assertEqual(line, 'BOARD ' + '.' * 27 + 'OX......XO' + '.' * 27 + ' black')
+
+    def test_parse_board(self):
+        state = GameState()
+        state.play(square(2, 3))
+        result = parse_board(format_board(state))
+        self.assertEqual(result.boards, state.boards)
+        self.assertEqual(result.turn, WHITE)
+
+    def test_percentile(self):
+        values = list(range(100, 0, -1))
+        self.assertEqual(percentile(values, 50), 51)
+        self.assertEqual(percentile(values, 99), 100)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_choose_move(self):
+        state = GameState()
+        move = choose_move('random', None, *state.boards, state.turn)
+        self.assertTrue(state.legal_moves() >> move & 1)
+
+    def test_choose_move_engines(self):
+        state = GameState()
+        with mock.patch.dict('server._engines', clear=True), \
+                mock.patch('server.create_engine') as mock_create:
+            mock_create.return_value.choose.return_value = 19
+            for spec in ('search:0.1', 'search:0.10', 'search:0.1', 'random'):
+                choose_move(*parse_engine(spec), *state.boards, state.turn)
+            self.assertEqual(mock_create.call_args_list, [mock.call('search:0.1'), mock.call('random')])
+
+    def test_parse_engine(self):
+        tests = [
+            ['heuristic', ('heuristic', None)],
+            ['random', ('random', None)],
+            ['search', ('search', 0.2)],
+            ['search:0.5', ('search', 0.5)],
+            ['search:0.50', ('search', 0.5)],
+            ['search:0.26', ('search', 0.3)],
+            ['search:0.01', ('search', 0.1)],
+            ['search:1', ('search', 1.0)],
+        ]
+        for spec, expect in tests:
+            with self.subTest(spec):
+                self.assertEqual(parse_engine(spec, 1.0), expect)
+
+    def test_parse_engine_error(self):
+        tests = [
+            ['minimax', 'unknown engine minimax'],
+            ['heuristic:5', 'unknown engine heuristic:5'],
+            ['search:', 'bad search time '],
+            ['search:fast', 'bad search time fast'],
+            ['search:0', 'bad search time 0'],
+            ['search:-1', 'bad search time -1'],
+            ['search:1.5', 'bad search time 1.5'],
+            ['search:1e9', 'bad search time 1e9'],
+            ['search:inf', 'bad search time inf'],
+            ['search:nan', 'bad search time nan'],
+        ]
+        for spec, expect in tests:
+            with self.subTest(spec):
+                with self.assertRaises(ProtocolError) as cm:
+                    parse_engine(spec, 1.0)
+                self.assertEqual(str(cm.exception), expect)
+
+
+class GameServerTestCase(IsolatedAsyncioTestCase):
+    """Tests for GameServer class
+    """
+
+    async def asyncSetUp(self):
+        self.server = GameServer(2, ThreadPoolExecutor(2))
+        await self.server.start('127.0.0.1', 0)
+        self.port = self.server.server.sockets[0].getsockname()[1]
+        self.clients = []
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            client.close()
+        await self.server.close()
+
+    async def connect(self):
+        client = Client(*await connect(port=self.port))
+        self.clients.append(client)
+        self.assertEqual(await client.receive(), 'HELLO othello 1')
+        return client
+
+    async def test_new_game(self):
+        client = await self.connect()
+        await client.send('NEW random black')
+        self.assertEqual(await client.receive(), format_board(GameState()))
+
+        await client.send('BOARD')
+        self.assertEqual(await client.receive(), format_board(GameState()))
+        self.assertEqual(self.server.games, 1)
+
+    async def test_engine_first(self):
+        client = await self.connect()
+        await client.send('NEW random white')
+        played, board = await client.receive_until('BOARD')
+
+        color, name = played.split()[1:]
+        self.assertEqual(color, 'black')
+        state = GameState()
+        state.play(parse_square(name))
+        self.assertEqual(board, format_board(state))
+
+    async def test_move(self):
+        client = await self.connect()
+        await client.send('NEW random black')
+        await client.receive()
+        await client.send('MOVE f5')
+        lines = await client.receive_until('BOARD')
+
+        self.assertEqual(lines[0], 'PLAYED black f5')
+        self.assertTrue(lines[1].startswith('PLAYED white '))
+        state = parse_board(lines[-1])
+        self.assertEqual(state.turn, BLACK)
+        self.assertEqual(state.count(BLACK) + state.count(WHITE), 6)
+        self.assertEqual(len(self.server.latencies), 1)
+
+    async def test_errors(self):
+        client = await self.connect()
+        tests = [
+            ['MOVE f5', 'ERROR no game'],
+            ['BOARD', 'ERROR no game'],
+            ['JUMP', 'ERROR unknown command JUMP'],
+            ['NEW minimax', 'ERROR unknown engine minimax'],
+            ['NEW search:inf white', 'ERROR bad search time inf'],
+            ['NEW search:5 white', 'ERROR bad search time 5'],
+            ['NEW random red', 'ERROR unknown color red'],
+            ['NEW random black', format_board(GameState())],
+            ['MOVE a1', 'ERROR illegal move a1'],
+            ['MOVE z9', 'ERROR bad square z9'],
+            ['MOVE', 'ERROR bad square None'],
+            ['MOVE f55', 'ERROR illegal move f55'],
+        ]
+        for line, expect in tests:
+            with self.subTest(line):
+                await client.send(line)
+                self.assertEqual(await client.receive(), expect)
+
+    async def test_play_session(self):
+        reader, writer = await connect(port=self.port)
+        end, latencies = await play_session(reader, writer, 'random', rand=random.Random(1))
+
+        _, black, white, winner = end.split()
+        self.assertTrue(int(black) + int(white) <= 64)
+        self.assertIn(winner, ('black', 'white', 'draw'))
+        self.assertTrue(latencies)
+
+    async def test_bench(self):
+        games, moves, latencies, _ = await bench(20, 'random', port=self.port)
+        self.assertEqual(games, 20)
+        self.assertEqual(moves, len(latencies))
+        self.assertEqual(self.server.games, 20)
+        self.assertEqual(self.server.sessions, 0)
+
+    async def test_stats(self):
+        await bench(2, 'random', port=self.port)
+        client = await self.connect()
+        await client.send('STATS')
+        words = (await client.receive()).split()
+
+        self.assertEqual(words[:7], ['STATS', 'sessions', '1', 'games', '2', 'moves', str(self.server.moves)])
+        self.assertEqual((words[7], words[9]), ('p50', 'p99'))
+        self.assertTrue(float(words[8]) <= float(words[10]))
+
+    async def test_slow_engine(self):
+        # A session whose engine never returns does not hold up the others.
+        release = threading.Event()
+
+        def slow_choose_move(spec, *args):
+            if spec == 'search':
+                release.wait(5)
+            return choose_move('random', *args)
+
+        with mock.patch('server.choose_move', slow_choose_move):
+            slow = await self.connect()
+            await slow.send('NEW search white')
+            await asyncio.sleep(0.05)
+
+            games, _, _, _ = await asyncio.wait_for(bench(3, 'random', port=self.port), 5)
+            self.assertEqual(games, 3)
+            release.set()
+            self.assertTrue((await slow.receive()).startswith('PLAYED black'))
+
+    async def test_quit(self):
+        client = await self.connect()
+        await client.send('QUIT')
+        self.assertEqual(await client.receive(), 'BYE')
+        self.assertEqual(await client.receive(), '')
+
+
+@skipUnless(hasattr(socket, 'AF_UNIX'), 'needs Unix sockets')
+class UnixServerTestCase(IsolatedAsyncioTestCase):
+    """Tests for GameServer class on a Unix socket
+    """
+
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, 'othello.sock')
+            server = GameServer(1, ThreadPoolExecutor(1))
+            await server.start(path=path)
+            try:
+                games, _, _, _ = await bench(2, 'random', path=path)
+                self.assertEqual(games, 2)
+            finally:
+                await server.close()
+
+
+if __name__ == '__main__':
+    main()
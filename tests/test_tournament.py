@@ -0,0 +1,120 @@
+import os
+import json
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main, mock
+
+from gamestate import BLACK, WHITE, PASS, GameState
+from othello import Opponent, Piece
+from pattern import PHASES, PatternEvaluator, save_weights
+from record import read_records
+from tournament import HeuristicEngine, RandomEngine, SearchEngine, create_engine, \
+    create_tasks, init_worker, notation, play_game, run
+
+
+class EngineTestCase(TestCase):
+    """Tests for tournament engines
+    """
+
+    def test_create_engine(self):
+        tests = [
+            ['heuristic', HeuristicEngine],
+            ['search', SearchEngine],
+            ['search:0.5', SearchEngine],
+            ['random', RandomEngine]
+        ]
+        for spec, expect in tests:
+            with self.subTest(spec):
+                self.assertIsInstance(create_engine(spec), expect)
+        self.assertEqual(create_engine('search:0.5').searcher.time_limit, 0.5)
+
+    def test_create_engine_error(self):
+        with self.assertRaises(ValueError):
+            create_engine('minimax')
+
+    def test_choose(self):
+        state = GameState()
+        state.play(19)
+        engine = HeuristicEngine()
+        move = engine.choose(state)
+        self.assertEqual(engine.color, Piece.WHITE)
+        self.assertTrue(state.legal_moves() >> move & 1)
+
+
+class TournamentTestCase(TestCase):
+    """Tests for tournament functions
+    """
+
+    def test_notation(self):
+        self.assertEqual(notation([37, 43, PASS, 0]), 'f5d6--a1')
+
+    def test_create_tasks(self):
+        result = list(create_tasks(['heuristic,random', 'search,random'], 2, 10))
+        expect = [
+            (0, 'heuristic', 'random', 10),
+            (1, 'random', 'heuristic', 11),
+            (2, 'search', 'random', 12),
+            (3, 'random', 'search', 13)
+        ]
+        self.assertEqual(result, expect)
+
+    def test_play_game(self):
+        result = play_game((0, 'heuristic', 'random', 5))
+        again = play_game((0, 'heuristic', 'random', 5))
+        self.assertEqual(result['moves'], again['moves'])
+        self.assertEqual(len(result['moves']), len(result['times']) * 2)
+        self.assertTrue(result['black_discs'] + result['white_discs'] <= 64)
+        winner = 'black' if result['black_discs'] > result['white_discs'] else 'white'
+        if result['black_discs'] == result['white_discs']:
+            winner = 'draw'
+        self.assertEqual(result['winner'], winner)
+
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            out = os.path.join(tempdir, 'results.jsonl')
+            wins = run(['heuristic,random'], 2, out, processes=2, seed=1)
+
+            with open(out) as f:
+                results = [json.loads(line) for line in f]
+
+        self.assertEqual(sorted(r['game'] for r in results), [0, 1])
+        self.assertEqual(sum(wins.values()), 2)
+        for result in results:
+            with self.subTest(result['game']):
+                task = (result['game'], result['black'], result['white'], result['seed'])
+                self.assertEqual(result['moves'], play_game(task)['moves'])
+
+    def test_run_records(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            out = os.path.join(tempdir, 'results.jsonl')
+            records = os.path.join(tempdir, 'games.ogr')
+            run(['random,random'], 3, out, processes=2, records=records)
+
+            with open(out) as f:
+                results = {json.loads(line)['moves']: json.loads(line) for line in f}
+            games = list(read_records(records))
+
+        self.assertEqual(len(games), 3)
+        for game in games:
+            result = results[notation(game.moves)]
+            self.assertEqual((game.black, game.white), (result['black'], result['white']))
+            self.assertEqual((game.black_discs, game.white_discs), (result['black_discs'], result['white_discs']))
+
+    def test_init_worker(self):
+        with tempfile.TemporaryDirectory() as tempdir, \
+                mock.patch('tournament.Opponent.evaluate'):
+            path = os.path.join(tempdir, 'weights.bin')
+            save_weights(PatternEvaluator().weights, path)
+            init_worker(path)
+            self.assertIsInstance(Opponent.evaluate.__self__, PatternEvaluator)
+            self.assertEqual(len(Opponent.evaluate.__self__.weights), PHASES)
+
+    def test_run_error(self):
+        with self.assertRaises(ValueError):
+            run(['heuristic,minimax'], 2, os.devnull)
+
+
+if __name__ == '__main__':
+    main()
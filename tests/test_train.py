@@ -0,0 +1,137 @@
+import os
+import random
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+import numpy as np
+
+from bitboard import popcount, square
+from gamestate import PASS, GameState
+from pattern import PHASE, PHASES, SIZES, WEIGHTS_HEADER, WEIGHTS_MAGIC, PatternEvaluator, WeightsError, \
+    load_weights, pattern_indices, save_weights
+from train import POSITION, SCALE, WEIGHT_COUNT, fit, game_positions, iter_batches, predict, shard_paths, \
+    to_tables, write_shards
+
+
+def random_positions(games, seed=0):
+    rand = random.Random(seed)
+    positions = []
+
+    for _ in range(games):
+        state = GameState()
+        while not state.is_game_over():
+            moves = [sq for sq in range(64) if state.legal_moves() >> sq & 1]
+            state.play(rand.choice(moves) if moves else PASS)
+            positions.append((state.own, state.opp))
+    return positions
+
+
+class ShardsTestCase(TestCase):
+    """Tests for writing and reading shards
+    """
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tempdir.name, 'data')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_game_positions(self):
+        # f5 d6, and black won by 10 discs
+        positions = list(game_positions([([square(4, 5), square(5, 3)], 10)]))
+        self.assertEqual(len(positions), 2)
+        self.assertEqual([target for _, _, target in positions], [10, -10])
+        self.assertEqual(popcount(positions[0][0]), 2)
+        self.assertEqual(popcount(positions[1][0]), 1)
+
+    def test_write_shards(self):
+        positions = [(own, opp, i % 129 - 64) for i, (own, opp) in enumerate(random_positions(3))]
+        count = write_shards(iter(positions), self.directory, shard_size=50)
+        self.assertEqual(count, len(positions))
+
+        paths = shard_paths(self.directory)
+        self.assertEqual(len(paths), (len(positions) + 49) // 50)
+        data = np.concatenate([np.load(path, mmap_mode='r') for path in paths])
+        self.assertEqual(data.dtype, POSITION)
+
+        for row, (own, opp, target) in zip(data, positions):
+            self.assertEqual(list(row['indices']), list(pattern_indices(own, opp)))
+            self.assertEqual(row['phase'], PHASE[popcount(own | opp)])
+            self.assertEqual(row['target'], target)
+
+    def test_iter_batches(self):
+        positions = [(own, opp, 0) for own, opp in random_positions(3)]
+        write_shards(positions, self.directory, shard_size=64)
+        batches = list(iter_batches(self.directory, 16, np.random.default_rng(0)))
+
+        self.assertTrue(all(len(batch) <= 16 for batch in batches))
+        self.assertEqual(sum(len(batch) for batch in batches), len(positions))
+        seen = sorted(tuple(row['indices']) for batch in batches for row in batch)
+        self.assertEqual(seen, sorted(tuple(pattern_indices(own, opp)) for own, opp, _ in positions))
+
+
+class FitTestCase(TestCase):
+    """Tests for fit and the weight file
+    """
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tempdir.name, 'data')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_fit_disc_difference(self):
+        # The disc difference is a sum of pattern weights, so it can be fitted closely.
+        positions = [(own, opp, popcount(own) - popcount(opp)) for own, opp in random_positions(100)]
+        write_shards(positions, self.directory)
+
+        weights, losses = fit(self.directory, epochs=6, batch_size=256)
+        self.assertEqual(weights.shape, (PHASES, WEIGHT_COUNT))
+        self.assertEqual(len(losses), 6)
+        self.assertLess(losses[-1], losses[0] / 4)
+
+        data = np.load(shard_paths(self.directory)[0])
+        errors = predict(weights.ravel(), data) - data['target']
+        self.assertLess(np.mean(errors ** 2), 1.0)
+
+    def test_weight_file(self):
+        positions = [(own, opp, popcount(own) - popcount(opp)) for own, opp in random_positions(20)]
+        write_shards(positions, self.directory)
+        weights, _ = fit(self.directory, epochs=2)
+
+        path = os.path.join(self.tempdir.name, 'weights.bin')
+        save_weights(to_tables(weights), path)
+        loaded = load_weights(path)
+        self.assertEqual([len(table) for table in loaded[0]], list(SIZES))
+
+        evaluator = PatternEvaluator(loaded)
+        data = np.load(shard_paths(self.directory)[0])
+        for (own, opp, _), expect in zip(positions, predict(weights.ravel(), data)):
+            self.assertAlmostEqual(evaluator.evaluate(own, opp), expect * SCALE, delta=1)
+
+    def test_default_weights_round_trip(self):
+        path = os.path.join(self.tempdir.name, 'weights.bin')
+        save_weights(PatternEvaluator().weights, path)
+        evaluator = PatternEvaluator(load_weights(path))
+        for own, opp in random_positions(2):
+            self.assertEqual(evaluator.evaluate(own, opp), PatternEvaluator().evaluate(own, opp))
+
+    def test_load_weights_error(self):
+        path = os.path.join(self.tempdir.name, 'weights.bin')
+        tests = [b'OGR1' + bytes(100), WEIGHTS_HEADER.pack(WEIGHTS_MAGIC, PHASES, len(SIZES)) + bytes(100)]
+
+        for data in tests:
+            with self.subTest(data=data[:8]):
+                with open(path, 'wb') as f:
+                    f.write(data)
+                with self.assertRaises(WeightsError):
+                    load_weights(path)
+
+
+if __name__ == '__main__':
+    main()
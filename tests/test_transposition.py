@@ -0,0 +1,124 @@
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+from bitboard import iter_squares
+from gamestate import BLACK, WHITE, PASS, GameState
+from transposition import EXACT, LOWER, UPPER, NO_MOVE, ZOBRIST_SIDE, Entry, \
+    TranspositionTable, flip_key, zobrist_hash
+
+
+class ZobristTestCase(TestCase):
+    """Tests for zobrist hashing
+    """
+
+    def test_zobrist_hash(self):
+        state = GameState()
+        self.assertEqual(state.hash, zobrist_hash(state.black, state.white, BLACK))
+        self.assertEqual(
+            zobrist_hash(state.black, state.white, WHITE), state.hash ^ ZOBRIST_SIDE)
+
+    def test_flip_key(self):
+        black, white = 0b0110, 0b1001
+        expect = zobrist_hash(white, black, BLACK)
+        self.assertEqual(zobrist_hash(black, white, BLACK) ^ flip_key(0b1111), expect)
+
+    def test_incremental_hash(self):
+        rand = random.Random(7)
+        state = GameState()
+        hashes = []
+
+        while not state.is_game_over():
+            hashes.append(state.hash)
+            if moves := [sq for sq in iter_squares(state.legal_moves())]:
+                state.play(rand.choice(moves))
+            else:
+                state.play(PASS)
+            self.assertEqual(state.hash, zobrist_hash(state.black, state.white, state.turn))
+
+        while hashes:
+            state.undo()
+            self.assertEqual(state.hash, hashes.pop())
+
+    def test_set_and_turn(self):
+        state = GameState.empty()
+        state.set(0, 0, BLACK)
+        state.set(0, 0, WHITE)
+        state.turn = WHITE
+        self.assertEqual(state.hash, zobrist_hash(0, 1, WHITE))
+        state.clear()
+        self.assertEqual(state.hash, 0)
+
+
+class TranspositionTableTestCase(TestCase):
+    """Tests for TranspositionTable class
+    """
+
+    def setUp(self):
+        self.tt = TranspositionTable(1024)
+
+    def test_size(self):
+        self.assertEqual(self.tt.size, 64)
+        self.assertEqual(len(self.tt.keys) * 8 + len(self.tt.data) * 8, 1024)
+
+    def test_store_probe(self):
+        tests = [
+            [(12345, 5, EXACT, 42, 19), Entry(5, EXACT, 42, 19)],
+            [(67890, 3, LOWER, -64000, 63), Entry(3, LOWER, -64000, 63)],
+            [(13579, 0, UPPER, 7, NO_MOVE), Entry(0, UPPER, 7, NO_MOVE)],
+        ]
+        for test, expect in tests:
+            with self.subTest(test):
+                self.tt.store(*test)
+                self.assertEqual(self.tt.probe(test[0]), expect)
+        self.assertEqual(self.tt.probe(11111), None)
+
+    def test_depth_preferred(self):
+        buckets = self.tt.buckets
+        deep, shallow, newer = 5, 5 + buckets, 5 + buckets * 2
+        self.tt.store(deep, 8, EXACT, 1, 1)
+        self.tt.store(shallow, 2, EXACT, 2, 2)
+        self.tt.store(newer, 3, EXACT, 3, 3)
+
+        self.assertEqual(self.tt.probe(deep), Entry(8, EXACT, 1, 1))
+        self.assertEqual(self.tt.probe(shallow), None)
+        self.assertEqual(self.tt.probe(newer), Entry(3, EXACT, 3, 3))
+
+    def test_replace_deeper(self):
+        buckets = self.tt.buckets
+        old, deeper = 5, 5 + buckets
+        self.tt.store(old, 4, EXACT, 1, 1)
+        self.tt.store(deeper, 6, EXACT, 2, 2)
+
+        self.assertEqual(self.tt.probe(old), Entry(4, EXACT, 1, 1))
+        self.assertEqual(self.tt.probe(deeper), Entry(6, EXACT, 2, 2))
+        self.assertEqual(self.tt.keys[10], deeper)
+
+    def test_replace_old_search(self):
+        buckets = self.tt.buckets
+        old, new = 5, 5 + buckets
+        self.tt.store(old, 9, EXACT, 1, 1)
+        self.tt.new_search()
+        self.tt.store(new, 1, EXACT, 2, 2)
+        self.assertEqual(self.tt.keys[10], new)
+
+    def test_update_same_key(self):
+        self.tt.store(5, 8, EXACT, 1, 1)
+        self.tt.store(5 + self.tt.buckets, 2, EXACT, 2, 2)
+        self.tt.store(5 + self.tt.buckets, 9, LOWER, 3, 3)
+        self.assertEqual(self.tt.probe(5 + self.tt.buckets), Entry(9, LOWER, 3, 3))
+        self.assertEqual(self.tt.probe(5), Entry(8, EXACT, 1, 1))
+
+    def test_usage_clear(self):
+        self.tt.store(1, 1, EXACT, 0)
+        self.tt.store(2, 1, EXACT, 0)
+        self.assertEqual(self.tt.usage(), 2 / 64)
+        self.tt.clear()
+        self.assertEqual(self.tt.usage(), 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Headless self-play tournaments on a process pool.
+
+    python tournament.py heuristic,search:0.1 search,random --games 100 --out results.jsonl
+
+Each pairing "black,white" plays --games games, swapping colors every
+other game. Engines are "heuristic" (Opponent), "search[:seconds]"
+(SearchOpponent) and "random". Every game seeds the random module
+from --seed and its game number, so runs can be repeated. Results are
+written as one JSON line per game in the order the games finish.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from bitboard import iter_squares, square
+from gamestate import BLACK, PASS, WHITE, GameState, notation, parse_notation
+from othello import Board, Opponent, Piece, SearchOpponent
+from pattern import PatternEvaluator, load_weights
+from record import GameRecord, RecordWriter
+
+
+class HeadlessBoard:
+
+    grid_num = Board.grid_num
+    disks = None
+
+
+class Headless:
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(HeadlessBoard(), Piece.BLACK, *args, **kwargs)
+
+    def create_sounds(self):
+        self.sound = None
+
+    def choose(self, state):
+        self.set_color(Piece(state.turn))
+        return square(*self.select(state))
+
+
+class HeuristicEngine(Headless, Opponent):
+    pass
+
+
+class SearchEngine(Headless, SearchOpponent):
+    pass
+
+
+class RandomEngine:
+
+    def choose(self, state):
+        return random.choice([sq for sq in iter_squares(state.legal_moves())])
+
+
+def create_engine(spec):
+    name, _, arg = spec.partition(':')
+    if name == 'heuristic':
+        return HeuristicEngine()
+    if name == 'search':
+        return SearchEngine(float(arg)) if arg else SearchEngine()
+    if name == 'random':
+        return RandomEngine()
+    raise ValueError(f'unknown engine: {spec}')
+
+
+def init_worker(weights):
+    Opponent.evaluate = staticmethod(PatternEvaluator(load_weights(weights)).evaluate)
+
+
+def play_game(task):
+    number, black, white, seed = task
+    random.seed(seed)
+    engines = (create_engine(black), create_engine(white))
+    state = GameState()
+    moves, times = [], []
+
+    while not state.is_game_over():
+        start = time.perf_counter()
+        if state.legal_moves():
+            move = engines[state.turn].choose(state)
+        else:
+            move = PASS
+        times.append(round(time.perf_counter() - start, 6))
+        moves.append(move)
+        state.play(move)
+
+    winner = state.winner()
+    return {
+        'game': number,
+        'black': black,
+        'white': white,
+        'seed': seed,
+        'winner': 'draw' if winner is None else ('black' if winner == BLACK else 'white'),
+        'black_discs': state.count(BLACK),
+        'white_discs': state.count(WHITE),
+        'moves': notation(moves),
+        'times': times,
+    }
+
+
+def create_tasks(pairings, games, seed):
+    number = 0
+    for pairing in pairings:
+        first, second = pairing.split(',')
+        for i in range(games):
+            black, white = (first, second) if i % 2 == 0 else (second, first)
+            yield number, black, white, seed + number
+            number += 1
+
+
+def to_record(result):
+    return GameRecord(
+        result['black'], result['white'], bytes(parse_notation(result['moves'])),
+        result['black_discs'], result['white_discs'])
+
+
+def run(pairings, games, out, processes=None, seed=0, records=None, weights=None):
+    """Play every pairing and stream the results to out, and the games
+       to the record file records if given. The engines evaluate with the
+       weight file weights if given. Returns a Counter of wins per engine
+       ('draw' counts draws).
+    """
+    tasks = list(create_tasks(pairings, games, seed))
+    for spec in {spec for task in tasks for spec in task[1:3]}:
+        create_engine(spec)
+
+    wins = Counter()
+    initializer, initargs = (init_worker, (weights,)) if weights else (None, ())
+    with multiprocessing.Pool(processes, initializer, initargs) as pool, open(out, 'w') as f, \
+            RecordWriter(records) if records else contextlib.nullcontext() as writer:
+        for result in pool.imap_unordered(play_game, tasks):
+            f.write(json.dumps(result) + '\n')
+            f.flush()
+            if writer:
+                writer.write(to_record(result))
+            wins[result[result['winner']] if result['winner'] != 'draw' else 'draw'] += 1
+    return wins
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play headless engine pairings on all cores')
+    parser.add_argument('pairings', nargs='+', help='pairings such as heuristic,search:0.1')
+    parser.add_argument('--games', type=int, default=10, help='games per pairing')
+    parser.add_argument('--out', default='results.jsonl', help='file to stream results to')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (all cores by default)')
+    parser.add_argument('--seed', type=int, default=0, help='base random seed')
+    parser.add_argument('--records', help='record file to append the games to')
+    parser.add_argument('--weights', help='evaluation weight file fitted with train.py')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    wins = run(args.pairings, args.games, args.out, args.processes, args.seed, args.records, args.weights)
+    elapsed = time.perf_counter() - start
+    for name, count in wins.most_common():
+        print(f'{name}: {count}')
+    print(f'{sum(wins.values())} games in {elapsed:.1f}s')
@@ -0,0 +1,184 @@
+"""Fit pattern evaluation weights to the results of recorded games.
+
+Training runs in two steps. The first replays games (a text file of
+games or a game record file, as for book.py) and writes every position
+before a move, as its pattern indices, game phase and final disc
+difference seen from the side to move, into NumPy shards:
+
+    python train.py shards games.ogr data --shard-size 262144
+
+The second streams the shards in shuffled mini-batches through memory
+maps, so only one batch is held in memory, fits one weight per pattern
+index and phase by stochastic gradient descent on the squared error and
+writes a weight file for pattern.load_weights:
+
+    python train.py fit data weights.bin --epochs 4
+
+The fitted evaluation is in SCALE units per disc, so it stays below the
+score of a decided game in the search.
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from bitboard import popcount
+from book import read_games, replay
+from gamestate import BLACK, PASS
+from pattern import INSTANCES, PHASE, PHASES, SIZES, pattern_indices, save_weights
+from search import DISC_SCORE
+
+
+SCALE = DISC_SCORE // 100
+SHARD_SIZE = 1 << 18
+
+POSITION = np.dtype([('indices', '<u2', (len(INSTANCES),)), ('phase', 'u1'), ('target', 'i1')])
+
+# where the table of each pattern starts in the weights of a phase
+TABLE_OFFSETS = np.cumsum((0,) + SIZES[:-1])
+INSTANCE_OFFSETS = np.array([TABLE_OFFSETS[i] for i, _ in INSTANCES], dtype=np.int64)
+WEIGHT_COUNT = sum(SIZES)
+
+
+def game_positions(games):
+    """Yield (own, opp, disc difference) for every position before a
+       move of (moves, disc difference) games, seen from the side to move.
+    """
+    for moves, diff in games:
+        for state, move in replay(moves):
+            if move != PASS:
+                yield state.own, state.opp, diff if state.turn == BLACK else -diff
+
+
+def shard_path(directory, number):
+    return os.path.join(directory, f'shard-{number:04d}.npy')
+
+
+def shard_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, 'shard-*.npy')))
+
+
+def write_shards(positions, directory, shard_size=SHARD_SIZE):
+    """Write (own, opp, target) positions into shards of shard_size
+       positions and return the number of positions written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    buffer = np.empty(shard_size, dtype=POSITION)
+    indices, phases, targets = buffer['indices'], buffer['phase'], buffer['target']
+    count = shards = filled = 0
+
+    for own, opp, target in positions:
+        indices[filled] = pattern_indices(own, opp)
+        phases[filled] = PHASE[popcount(own | opp)]
+        targets[filled] = target
+        filled += 1
+        if filled == shard_size:
+            np.save(shard_path(directory, shards), buffer)
+            count, shards, filled = count + filled, shards + 1, 0
+
+    if filled:
+        np.save(shard_path(directory, shards), buffer[:filled])
+        count += filled
+    return count
+
+
+def iter_batches(directory, batch_size, rng):
+    """Yield shuffled mini-batches of positions, reading one shard at a
+       time through a memory map.
+    """
+    paths = shard_paths(directory)
+    for i in rng.permutation(len(paths)):
+        data = np.load(paths[i], mmap_mode='r')
+        order = rng.permutation(len(data))
+        for start in range(0, len(data), batch_size):
+            # sorted, so the batch is gathered from the map front to back
+            yield data[np.sort(order[start: start + batch_size])]
+
+
+def weight_keys(batch):
+    """Return the positions of the weights each position of a batch
+       uses in the (PHASES * WEIGHT_COUNT) weight vector.
+    """
+    return batch['indices'] + INSTANCE_OFFSETS + batch['phase'][:, None].astype(np.int64) * WEIGHT_COUNT
+
+
+def predict(weights, batch):
+    return weights[weight_keys(batch)].sum(axis=1)
+
+
+def fit(directory, epochs=4, batch_size=4096, learning_rate=0.5, seed=0, log=None):
+    """Fit the weights to the positions of the shards in directory and
+       return them as a (PHASES, WEIGHT_COUNT) array in discs, with the
+       mean squared error of every epoch.
+
+    Every weight moves by the mean error of the batch positions that
+    use it, divided by the number of instances, so rare and common
+    pattern indices learn at the same pace.
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.zeros(PHASES * WEIGHT_COUNT)
+    step = learning_rate / len(INSTANCES)
+    losses = []
+
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        total = count = 0
+
+        for batch in iter_batches(directory, batch_size, rng):
+            keys = weight_keys(batch)
+            errors = batch['target'] - weights[keys].sum(axis=1)
+            keys = keys.ravel()
+            sums = np.bincount(keys, np.repeat(errors, len(INSTANCES)), minlength=weights.size)
+            counts = np.bincount(keys, minlength=weights.size)
+            used = counts > 0
+            weights[used] += step * sums[used] / counts[used]
+            total += float(errors @ errors)
+            count += len(batch)
+
+        losses.append(total / max(count, 1))
+        if log:
+            log(f'epoch {epoch + 1}: mse {losses[-1]:.2f} ({count} positions, {time.perf_counter() - start:.1f}s)')
+
+    return weights.reshape(PHASES, WEIGHT_COUNT), losses
+
+
+def to_tables(weights, scale=SCALE):
+    """Split fitted weights into the per phase, per pattern tables of
+       PatternEvaluator, in scale units per disc.
+    """
+    return [
+        [(row[offset: offset + size] * scale).astype(np.float32) for offset, size in zip(TABLE_OFFSETS, SIZES)]
+        for row in weights
+    ]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fit pattern evaluation weights to recorded games')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    shards = commands.add_parser('shards', help='write the positions of games into shards')
+    shards.add_argument('games', help='text file with one game per line, or a game record file')
+    shards.add_argument('directory', help='directory to write the shards to')
+    shards.add_argument('--shard-size', type=int, default=SHARD_SIZE, help='positions per shard')
+
+    fitting = commands.add_parser('fit', help='fit weights to the shards and write a weight file')
+    fitting.add_argument('directory', help='directory of shards')
+    fitting.add_argument('weights', help='output weight file')
+    fitting.add_argument('--epochs', type=int, default=4, help='passes over the shards')
+    fitting.add_argument('--batch-size', type=int, default=4096, help='positions per mini-batch')
+    fitting.add_argument('--learning-rate', type=float, default=0.5, help='step size')
+    fitting.add_argument('--seed', type=int, default=0, help='random seed of the shuffling')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'shards':
+        count = write_shards(game_positions(read_games(args.games)), args.directory, args.shard_size)
+        print(f'{count} positions written to {args.directory}')
+    else:
+        weights, _ = fit(args.directory, args.epochs, args.batch_size, args.learning_rate, args.seed, print)
+        save_weights(to_tables(weights), args.weights)
+        print(f'weights written to {args.weights}')
+    print(f'{time.perf_counter() - start:.1f}s')
@@ -0,0 +1,115 @@
+"""Zobrist hashing and a fixed-size transposition table.
+
+Each table slot takes 16 bytes: the full 64-bit key and a packed
+64-bit word holding the score, depth, bound flag, best move and age.
+Slots are paired into buckets; the first slot keeps the deepest
+result of the current search, the second always takes the newest one.
+"""
+
+import random
+from array import array
+from collections import namedtuple
+
+from bitboard import iter_squares
+
+
+ZOBRIST_SEED = 0x0CE110
+
+
+def _create_keys():
+    rand = random.Random(ZOBRIST_SEED)
+    keys = [[rand.getrandbits(64) for _ in range(64)] for _ in range(2)]
+    side = rand.getrandbits(64)
+    return keys, side
+
+
+ZOBRIST_KEYS, ZOBRIST_SIDE = _create_keys()
+ZOBRIST_FLIPS = [black ^ white for black, white in zip(*ZOBRIST_KEYS)]
+
+
+def zobrist_hash(black, white, turn):
+    h = ZOBRIST_SIDE if turn else 0
+    for sq in iter_squares(black):
+        h ^= ZOBRIST_KEYS[0][sq]
+    for sq in iter_squares(white):
+        h ^= ZOBRIST_KEYS[1][sq]
+    return h
+
+
+def flip_key(flips):
+    """Return the value to xor into a hash when the disks on flips change color.
+    """
+    h = 0
+    while flips:
+        lowest = flips & -flips
+        h ^= ZOBRIST_FLIPS[lowest.bit_length() - 1]
+        flips ^= lowest
+    return h
+
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+NO_MOVE = 127
+SCORE_OFFSET = 1 << 31
+
+Entry = namedtuple('Entry', 'depth flag score move')
+
+
+class TranspositionTable:
+
+    entry_size = 16
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.buckets = max(1, max_bytes // (self.entry_size * 2))
+        self.size = self.buckets * 2
+        self.age = 0
+        self.clear()
+
+    def clear(self):
+        self.keys = array('Q', bytes(8 * self.size))
+        self.data = array('Q', bytes(8 * self.size))
+
+    def new_search(self):
+        self.age = (self.age + 1) & 0xFF
+
+    def probe(self, key):
+        i = (key % self.buckets) * 2
+        if self.keys[i] == key:
+            data = self.data[i]
+        elif self.keys[i + 1] == key:
+            data = self.data[i + 1]
+        else:
+            return None
+
+        return Entry(
+            (data >> 32) & 0xFF,
+            (data >> 40) & 0x3,
+            (data & 0xFFFFFFFF) - SCORE_OFFSET,
+            (data >> 42) & 0x7F
+        )
+
+    def store(self, key, depth, flag, score, move=NO_MOVE):
+        i = (key % self.buckets) * 2
+        data = (score + SCORE_OFFSET) | depth << 32 | flag << 40 | move << 42 | self.age << 49
+        kept = self.data[i]
+
+        if self.keys[i] == key or not self.keys[i] or depth >= (kept >> 32) & 0xFF \
+                or (kept >> 49) & 0xFF != self.age:
+            if self.keys[i] != key and self.keys[i]:
+                # The entry pushed out of the depth-preferred slot moves to the second one.
+                self.keys[i + 1] = self.keys[i]
+                self.data[i + 1] = kept
+            elif self.keys[i + 1] == key:
+                self.keys[i + 1] = 0
+            self.keys[i] = key
+            self.data[i] = data
+        else:
+            self.keys[i + 1] = key
+            self.data[i + 1] = data
+
+    def usage(self):
+        """Return the fraction of slots holding an entry.
+        """
+        return sum(1 for key in self.keys if key) / self.size